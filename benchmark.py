@@ -0,0 +1,550 @@
+# benchmark.py
+# Benchmarks de rendimiento para horarios.py
+# Uso: python benchmark.py blocks --blocks 20000
+#      python benchmark.py ics --subjects 500
+#      python benchmark.py suite --subjects 10 40 160
+#      python benchmark.py compact --subjects 40
+#      python benchmark.py pdf --count 20 --output-dir pdfs/
+#      python benchmark.py regression
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+try:
+    import pymupdf as fitz
+except ImportError:  # PyMuPDF < 1.24.3 solo incluye el módulo fitz
+    import fitz
+
+import horarios
+
+# ================================= #
+# DATOS SINTÉTICOS PARA LAS PRUEBAS #
+# ================================= #
+
+SUBJECT_NAMES = [
+    'Pensamiento computacional para ingeniería', 'Matemáticas I', 'Física I',
+    'Modelación de sistemas mínimos', 'Ética, persona y sociedad', 'Química I',
+    'Análisis de sistemas dinámicos', 'Diseño de sistemas digitales'
+]
+PROFESSOR_NAMES = [
+    'Gómez Ana', 'López Luis', 'Hernández Ruiz María', 'Pérez Soto Jorge',
+    'Ramírez Díaz Laura', 'Torres Vega Carlos'
+]
+FORMATS = ['Presencial', 'Remoto nacional', 'En línea']
+LOCATIONS = ['Aulas 1 | 101', 'Aulas 3 | 301', 'CEDES | 204', 'Biblioteca | 5', 'NAL | Remoto']
+DAY_COMBINATIONS = [['Lun', 'Jue'], ['Mar', 'Vie'], ['Lun', 'Mié', 'Vie'], ['Mié'], ['Lun', 'Mar', 'Mié', 'Jue', 'Vie']]
+SUB_PERIODS = ['1', '2', '3', '1, 2', '2, 3', '1, 2, 3']
+SEMANA_TEC_NAMES = ['Semana Tec - Innovación', 'Semana Tec - Liderazgo', 'Semana 18 - Proyecto integrador']
+SEMANA_TEC_WEEKS = ['17.03.2025 - 21.03.2025', '21.04.2025 - 25.04.2025', '09.06.2025 - 13.06.2025']
+HEADER_LINES = [
+    'Resumen del proceso',
+    'Última hora del comprobante: 05.01.2025 10:23',
+    'MTY / Campus Monterrey / ITC',
+]
+
+# Bloques con formatos poco comunes cuyo resultado ya se conoce (ver `check_regression_blocks`)
+REGRESSION_BLOCKS = [
+    (
+        "Ubicación en la línea de horario",
+        ["Unidad de formación: TC1001", "Materia", "Profesor A", "Lun 10:00 - 11:00 | Aulas 3 | 301",
+         "Presencial", "Sub-período 1 CRN 55", "", "10.02.2025 - 06.06.2025", ""],
+        {'location': 'Lun 10:00 - 11:00 | Aulas 3 | 301', 'crn': '55', 'sub_period_clean': '1',
+         'format': 'Presencial'},
+    ),
+    (
+        "Sub-período y CRN en la línea de horario",
+        ["Unidad de formación: TC1002", "Materia", "Profesor A", "Lun 10:00 - 11:00 Sub-período 1 CRN 77",
+         "Aulas 1 | 101", "Presencial", "", "10.02.2025 - 06.06.2025", ""],
+        {'location': 'Aulas 1 | 101', 'crn': '77', 'sub_period_clean': '1', 'format': 'Presencial'},
+    ),
+]
+
+def generate_subject_block(rng: random.Random, index: int, max_schedule_lines: int = 3,
+                           semana_tec_ratio: float = 0.0, english_ratio: float = 0.5) -> List[str]:
+    """
+    Genera las líneas de un bloque de materia con la estructura del comprobante.
+    
+    Args:
+        rng: Generador de números aleatorios
+        index: Número de la materia (se usa para el código y el CRN)
+        max_schedule_lines: Máximo de líneas de horario del bloque
+        semana_tec_ratio: Proporción de bloques que son clases de Semana Tec
+        english_ratio: Proporción de bloques impartidos en inglés
+    
+    Returns:
+        Líneas del bloque de la materia
+    """
+    if semana_tec_ratio and rng.random() < semana_tec_ratio:
+        return [
+            f"Unidad de formación: ST{1000 + index % 9000}", rng.choice(SEMANA_TEC_NAMES),
+            rng.choice(PROFESSOR_NAMES),
+            "Lun Mar Mié Jue Vie 08:00 - 14:00",
+            rng.choice(LOCATIONS),
+            'Presencial',
+            f"Sub-período {rng.choice(['1', '2', '3'])} CRN {10000 + index}",
+            '',
+            rng.choice(SEMANA_TEC_WEEKS),
+            '',
+        ]
+
+    lines = [f"Unidad de formación: TC{1000 + index % 9000}", rng.choice(SUBJECT_NAMES)]
+    lines.extend(rng.sample(PROFESSOR_NAMES, rng.randint(1, 2)))
+
+    for _ in range(rng.randint(1, max_schedule_lines)):
+        start_hour = rng.randint(7, 18)
+        days = ' '.join(rng.choice(DAY_COMBINATIONS))
+        lines.append(f"{days} {start_hour:02d}:00 - {start_hour + 1:02d}:30")
+
+    lines.append(rng.choice(LOCATIONS))
+    lines.append(rng.choice(FORMATS))
+    lines.append('Inglés' if rng.random() < english_ratio else 'Español')
+    lines.append(f"Sub-período {rng.choice(SUB_PERIODS)} CRN {10000 + index}")
+    lines.append('')
+    lines.append("10.02.2025 - 06.06.2025")
+    lines.append('')
+    return lines
+
+def generate_block_corpus(block_count: int, seed: int = 0) -> List[List[str]]:
+    """
+    Genera un corpus de bloques de materia sintéticos.
+    
+    Args:
+        block_count: Número de bloques a generar
+        seed: Semilla para obtener siempre el mismo corpus
+    
+    Returns:
+        Lista de bloques de materia
+    """
+    rng = random.Random(seed)
+    return [generate_subject_block(rng, i) for i in range(block_count)]
+
+def generate_parsing(subject_count: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Genera un resultado de `parse_pdf` a partir de bloques sintéticos.
+    
+    Args:
+        subject_count: Número de materias
+        seed: Semilla del corpus
+        
+    Returns:
+        Diccionario con la misma estructura que `parse_pdf`
+    """
+    schedule_data = []
+    for idx, block_lines in enumerate(generate_block_corpus(subject_count, seed)):
+        schedule_data.extend(horarios.process_subject_block(block_lines, idx))
+    
+    return {'schedule_data': schedule_data, 'process_date': '05012025', 'campus': 'MTY', 'career': 'ITC'}
+
+def generate_comprobante_lines(subject_count: int, seed: int = 0, max_schedule_lines: int = 3,
+                               semana_tec_ratio: float = 0.1, english_ratio: float = 0.3) -> List[str]:
+    """
+    Genera las líneas de texto de un comprobante de horario completo.
+    
+    Args:
+        subject_count: Número de materias
+        seed: Semilla para obtener siempre el mismo comprobante
+        max_schedule_lines: Máximo de líneas de horario por materia
+        semana_tec_ratio: Proporción de materias de Semana Tec
+        english_ratio: Proporción de materias impartidas en inglés
+        
+    Returns:
+        Líneas del comprobante (encabezado y bloques de materia)
+    """
+    rng = random.Random(seed)
+    lines = list(HEADER_LINES)
+    for i in range(subject_count):
+        lines.extend(generate_subject_block(rng, i, max_schedule_lines, semana_tec_ratio, english_ratio))
+    return lines
+
+def write_comprobante_pdf(lines: List[str], lines_per_page: int = 50) -> bytes:
+    """
+    Escribe las líneas de un comprobante en un PDF con PyMuPDF.
+    
+    Las líneas vacías se omiten, igual que en el comprobante real, y los bloques
+    de materia pueden quedar divididos entre dos páginas.
+    
+    Args:
+        lines: Líneas del comprobante
+        lines_per_page: Líneas de texto por página (determina el número de páginas)
+        
+    Returns:
+        Contenido del PDF
+    """
+    with fitz.open() as pdf_document:
+        page = None
+        y = 0
+        for i, line in enumerate(line for line in lines if line):
+            if i % lines_per_page == 0:
+                page = pdf_document.new_page()
+                y = 50
+            page.insert_text((50, y), line, fontname='helv', fontsize=10)
+            y += 14
+        return pdf_document.tobytes()
+
+def generate_pdf_files(output_dir: str, count: int, subject_count: int, seed: int = 0,
+                       lines_per_page: int = 50) -> List[str]:
+    """
+    Genera varios comprobantes PDF sintéticos en un directorio.
+    
+    El número de materias de cada PDF varía entre la mitad y el doble de
+    `subject_count`, con proporciones distintas de Semana Tec e inglés.
+    
+    Args:
+        output_dir: Directorio de salida
+        count: Número de PDF a generar
+        subject_count: Número de materias de referencia
+        seed: Semilla de la generación
+        lines_per_page: Líneas de texto por página
+        
+    Returns:
+        Rutas de los PDF generados
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    
+    for i in range(count):
+        lines = generate_comprobante_lines(
+            rng.randint(max(1, subject_count // 2), subject_count * 2), seed + i,
+            max_schedule_lines=rng.randint(1, 4),
+            semana_tec_ratio=rng.choice([0.0, 0.1, 0.25]),
+            english_ratio=rng.random(),
+        )
+        path = os.path.join(output_dir, f"comprobante_{i + 1:04d}.pdf")
+        with open(path, 'wb') as f:
+            f.write(write_comprobante_pdf(lines, lines_per_page))
+        paths.append(path)
+    
+    return paths
+
+# ====================== #
+# FUNCIONES DE BENCHMARK #
+# ====================== #
+
+def bench_extract_subject_info(corpus: List[List[str]], repeat: int) -> Dict[str, Any]:
+    """
+    Mide el tiempo de `extract_subject_info` por bloque.
+    
+    Args:
+        corpus: Bloques de materia a procesar
+        repeat: Número de repeticiones (se reporta la más rápida)
+    
+    Returns:
+        Diccionario con los resultados de la medición
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for block_lines in corpus:
+            horarios.extract_subject_info(block_lines)
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        'stage': 'extract_subject_info',
+        'items': len(corpus),
+        'total_s': best,
+        'us_per_item': best / len(corpus) * 1e6,
+    }
+
+def check_regression_blocks() -> List[str]:
+    """
+    Compara lo que extrae `extract_subject_info` de `REGRESSION_BLOCKS` con lo esperado.
+    
+    Returns:
+        Diferencias encontradas (vacía si todo coincide)
+    """
+    failures = []
+    for name, block_lines, expected in REGRESSION_BLOCKS:
+        records = horarios.extract_subject_info(block_lines)
+        if not records:
+            failures.append(f"{name}: no se extrajo ningún horario")
+            continue
+        for field, value in expected.items():
+            actual = getattr(records[0], field)
+            if actual != value:
+                failures.append(f"{name}: {field} = {actual!r}, se esperaba {value!r}")
+    return failures
+
+def write_with_icalendar(parsing: Dict[str, Any], current_date: datetime, semester_start_date: datetime,
+                         path: str) -> None:
+    """Construye el calendario con icalendar y lo guarda (igual que `create_ics_file`)."""
+    tz = horarios.pytz.timezone(horarios.TIMEZONE)
+    master_cal = horarios.create_master_calendar(tz, semester_start_date)
+    for event_data in horarios.iter_calendar_events(parsing, current_date, semester_start_date, tz):
+        master_cal.add_component(horarios.create_event(event_data))
+    with open(path, 'wb') as f:
+        f.write(master_cal.to_ical())
+
+def write_with_stream(parsing: Dict[str, Any], current_date: datetime, semester_start_date: datetime,
+                      path: str) -> None:
+    """Escribe el calendario directamente al archivo con IcsStreamWriter."""
+    with open(path, 'wb') as f:
+        horarios.write_ics_stream(parsing, current_date, semester_start_date, f)
+
+def measure(stage: str, items: int, func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Mide el tiempo (mejor de `repeat`) y la memoria máxima de una función.
+    
+    Args:
+        stage: Nombre de la etapa
+        items: Número de elementos procesados por llamada
+        func: Función a medir
+        repeat: Número de repeticiones
+        
+    Returns:
+        Diccionario con los resultados de la medición
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'stage': stage,
+        'items': items,
+        'total_s': best,
+        'us_per_item': best / items * 1e6,
+        'peak_mb': peak / (1024 * 1024),
+    }
+
+def bench_ics_writers(parsing: Dict[str, Any], repeat: int) -> List[Dict[str, Any]]:
+    """
+    Compara la escritura del calendario con icalendar y con IcsStreamWriter.
+    
+    Args:
+        parsing: Resultado de `parse_pdf`
+        repeat: Número de repeticiones
+        
+    Returns:
+        Resultados de ambas mediciones
+    """
+    current_date = datetime(2025, 1, 1)
+    semester_start_date = datetime(2025, 2, 10)
+    items = len(parsing['schedule_data'])
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        icalendar_path = os.path.join(tmp_dir, 'icalendar.ics')
+        stream_path = os.path.join(tmp_dir, 'stream.ics')
+        
+        results = [
+            measure('icalendar', items, lambda: write_with_icalendar(
+                copy.deepcopy(parsing), current_date, semester_start_date, icalendar_path), repeat),
+            measure('IcsStreamWriter', items, lambda: write_with_stream(
+                copy.deepcopy(parsing), current_date, semester_start_date, stream_path), repeat),
+        ]
+        
+        with open(icalendar_path, 'rb') as f1, open(stream_path, 'rb') as f2:
+            identical = f1.read() == f2.read()
+        print(f"Salida idéntica: {'Sí' if identical else 'No'} ({os.path.getsize(stream_path)} bytes)")
+    
+    return results
+
+def bench_compact_output(parsing: Dict[str, Any], repeat: int) -> List[Dict[str, Any]]:
+    """
+    Compara el calendario normal (un evento por período) con el compacto.
+    
+    El tiempo de importación se mide leyendo el .ics con `Calendar.from_ical`,
+    que es lo más parecido a lo que hace un cliente de calendario al importarlo.
+    
+    Args:
+        parsing: Resultado de `parse_pdf`
+        repeat: Número de repeticiones
+        
+    Returns:
+        Resultados de ambos formatos
+    """
+    current_date = datetime(2025, 1, 1)
+    semester_start_date = datetime(2025, 2, 10)
+    
+    results = []
+    for stage, compact in (('normal', False), ('compact', True)):
+        ics_bytes = horarios.render_ics_bytes(parsing, current_date, semester_start_date, compact)
+        calendar = horarios.Calendar.from_ical(ics_bytes)
+        events = calendar.walk('VEVENT')
+        exdates = sum(len(event_data['exdate']) for event_data in horarios.iter_calendar_events(
+            parsing, current_date, semester_start_date, horarios.pytz.timezone(horarios.TIMEZONE), compact))
+        
+        result = measure(f"import_{stage}", len(events),
+                         lambda: horarios.Calendar.from_ical(ics_bytes), repeat)
+        result.update({'bytes': len(ics_bytes), 'events': len(events), 'exdates': exdates})
+        results.append(result)
+    
+    return results
+
+def bench_pipeline(subject_count: int, repeat: int, seed: int = 0, lines_per_page: int = 50,
+                   semana_tec_ratio: float = 0.1, english_ratio: float = 0.3) -> List[Dict[str, Any]]:
+    """
+    Mide cada etapa del proceso completo sobre un comprobante PDF sintético.
+    
+    La memoria reportada es la de los objetos de Python (tracemalloc); las
+    asignaciones internas de PyMuPDF no se incluyen.
+    
+    Args:
+        subject_count: Número de materias del comprobante
+        repeat: Número de repeticiones
+        seed: Semilla del comprobante
+        lines_per_page: Líneas de texto por página del PDF
+        semana_tec_ratio: Proporción de materias de Semana Tec
+        english_ratio: Proporción de materias impartidas en inglés
+        
+    Returns:
+        Resultados de cada etapa
+    """
+    current_date = datetime(2025, 1, 1)
+    semester_start_date = datetime(2025, 2, 10)
+    lines = generate_comprobante_lines(subject_count, seed, semana_tec_ratio=semana_tec_ratio,
+                                       english_ratio=english_ratio)
+    pdf_bytes = write_comprobante_pdf(lines, lines_per_page)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, 'comprobante.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(pdf_bytes)
+        
+        with fitz.open(stream=pdf_bytes, filetype='pdf') as pdf_document:
+            page_count = pdf_document.page_count
+            pdf_lines = list(horarios.iter_pdf_lines(pdf_document))
+        blocks = list(horarios.iter_subject_blocks(pdf_lines, horarios.ScheduleHeader()))
+        parsing = horarios.parse_pdf(pdf_path)
+        records = parsing['schedule_data']
+        ranges = [(record.start_date, record.end_date) for record in records]
+        
+        def read_text() -> None:
+            with fitz.open(stream=pdf_bytes, filetype='pdf') as pdf_document:
+                for _ in horarios.iter_pdf_lines(pdf_document):
+                    pass
+        
+        def extract_blocks() -> None:
+            for block_lines in blocks:
+                horarios.extract_subject_info(block_lines)
+        
+        def exclusions() -> None:
+            for start_date, end_date in ranges:
+                horarios.calculate_exclusions(start_date, end_date)
+        
+        def end_to_end() -> None:
+            horarios.create_ics_file(horarios.parse_pdf(pdf_path), current_date, semester_start_date,
+                                     tmp_dir, streaming=True)
+        
+        print(f"Comprobante: {subject_count} materias, {len(blocks)} bloques, "
+              f"{len(records)} horarios, {page_count} páginas, {len(pdf_bytes)} bytes")
+        
+        return [
+            measure('pdf_text', page_count, read_text, repeat),
+            measure('parse_pdf', len(blocks), lambda: horarios.parse_pdf(pdf_path), repeat),
+            measure('parse_pdf_layout', len(blocks), lambda: horarios.parse_pdf(pdf_path, backend='layout'),
+                    repeat),
+            measure('extract_subject_info', len(blocks), extract_blocks, repeat),
+            measure('calculate_exclusions', len(ranges), exclusions, repeat),
+            measure('create_ics_file', len(records), lambda: horarios.create_ics_file(
+                parsing, current_date, semester_start_date, tmp_dir), repeat),
+            measure('create_ics_file_stream', len(records), lambda: horarios.create_ics_file(
+                parsing, current_date, semester_start_date, tmp_dir, streaming=True), repeat),
+            measure('end_to_end', len(records), end_to_end, repeat),
+        ]
+
+def print_result(result: Dict[str, Any]) -> None:
+    """Imprime el resultado de una medición."""
+    line = (f"{result['stage']:<24} {result['items']:>8} elementos  "
+            f"{result['total_s']:8.3f} s  {result['us_per_item']:8.2f} µs/elemento")
+    if 'peak_mb' in result:
+        line += f"  {result['peak_mb']:8.1f} MB pico"
+    if 'bytes' in result:
+        line += f"  {result['bytes']:>9} bytes  {result['exdates']:>6} EXDATE"
+    print(line)
+
+def main() -> None:
+    """Función principal del benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmarks de horarios.py")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    blocks_parser = subparsers.add_parser('blocks', help="Extracción de información por bloque de materia")
+    blocks_parser.add_argument('--blocks', type=int, default=20000, help="Número de bloques sintéticos")
+    blocks_parser.add_argument('--repeat', type=int, default=5, help="Repeticiones de la medición")
+    blocks_parser.add_argument('--seed', type=int, default=0, help="Semilla del corpus")
+
+    ics_parser = subparsers.add_parser('ics', help="Escritura del calendario: icalendar contra IcsStreamWriter")
+    ics_parser.add_argument('--subjects', type=int, default=500, help="Número de materias sintéticas")
+    ics_parser.add_argument('--repeat', type=int, default=3, help="Repeticiones de la medición")
+    ics_parser.add_argument('--seed', type=int, default=0, help="Semilla del corpus")
+
+    suite_parser = subparsers.add_parser('suite', help="Latencia y memoria por etapa sobre PDFs sintéticos")
+    suite_parser.add_argument('--subjects', type=int, nargs='+', default=[10, 40, 160],
+                              help="Número de materias de cada comprobante a medir")
+    suite_parser.add_argument('--repeat', type=int, default=3, help="Repeticiones de la medición")
+    suite_parser.add_argument('--seed', type=int, default=0, help="Semilla de los comprobantes")
+    suite_parser.add_argument('--lines-per-page', type=int, default=50, help="Líneas de texto por página")
+    suite_parser.add_argument('--semana-tec', type=float, default=0.1, help="Proporción de materias de Semana Tec")
+    suite_parser.add_argument('--english', type=float, default=0.3, help="Proporción de materias en inglés")
+    suite_parser.add_argument('--json', help="Guarda los resultados en este archivo JSON")
+
+    compact_parser = subparsers.add_parser('compact', help="Tamaño e importación del .ics normal contra el compacto")
+    compact_parser.add_argument('--subjects', type=int, nargs='+', default=[10, 40, 160],
+                                help="Número de materias sintéticas de cada calendario")
+    compact_parser.add_argument('--repeat', type=int, default=3, help="Repeticiones de la medición")
+    compact_parser.add_argument('--seed', type=int, default=0, help="Semilla del corpus")
+
+    pdf_parser = subparsers.add_parser('pdf', help="Genera comprobantes PDF sintéticos")
+    pdf_parser.add_argument('--count', type=int, default=10, help="Número de PDF a generar")
+    pdf_parser.add_argument('--subjects', type=int, default=8, help="Número de materias de referencia por PDF")
+    pdf_parser.add_argument('--seed', type=int, default=0, help="Semilla de la generación")
+    pdf_parser.add_argument('--lines-per-page', type=int, default=50, help="Líneas de texto por página")
+    pdf_parser.add_argument('--output-dir', default='pdfs', help="Directorio de salida")
+
+    subparsers.add_parser('regression', help="Verifica la extracción de bloques con formatos poco comunes")
+
+    args = parser.parse_args()
+
+    if args.command == 'blocks':
+        corpus = generate_block_corpus(args.blocks, args.seed)
+        print_result(bench_extract_subject_info(corpus, args.repeat))
+    elif args.command == 'ics':
+        for result in bench_ics_writers(generate_parsing(args.subjects, args.seed), args.repeat):
+            print_result(result)
+    elif args.command == 'suite':
+        results = []
+        for subject_count in args.subjects:
+            stage_results = bench_pipeline(subject_count, args.repeat, args.seed, args.lines_per_page,
+                                           args.semana_tec, args.english)
+            for result in stage_results:
+                result['subjects'] = subject_count
+                print_result(result)
+            results.extend(stage_results)
+            print()
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"Resultados guardados en: {args.json}")
+    elif args.command == 'compact':
+        for subject_count in args.subjects:
+            for result in bench_compact_output(generate_parsing(subject_count, args.seed), args.repeat):
+                print_result(result)
+            print()
+    elif args.command == 'pdf':
+        paths = generate_pdf_files(args.output_dir, args.count, args.subjects, args.seed, args.lines_per_page)
+        print(f"{len(paths)} comprobantes generados en: {args.output_dir}")
+    elif args.command == 'regression':
+        failures = check_regression_blocks()
+        for failure in failures:
+            print(f"[ERROR] {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"{len(REGRESSION_BLOCKS)} bloques correctos")
+
+if __name__ == "__main__":
+    main()
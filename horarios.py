@@ -3,14 +3,44 @@
 # Made by 11rls11
 # Fecha de última modificación: 09/07/2025
 
+import argparse
+import asyncio
+import bisect
+import contextlib
+import csv
+import functools
+import glob
+import hashlib
+import heapq
+import io
+import json
+import logging
 import os
 import re
-from datetime import date, datetime, timedelta
-from typing import Dict, List, Tuple, Any
+import select
+import shutil
+import signal
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from urllib.parse import parse_qs, urlsplit
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Any
 
-import fitz
+try:
+    import pymupdf as fitz
+except ImportError:  # PyMuPDF < 1.24.3 solo incluye el módulo fitz
+    import fitz
 import pytz
-from icalendar import Calendar, Event, vText
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional; solo lo usa la expansión de ocurrencias
+    np = None
+from icalendar import Calendar, Event, Timezone, vText
 
 # ================================= #
 # CONSTANTES Y CONFIGURACIÓN GLOBAL #
@@ -27,7 +57,55 @@ MONDAY_HOLIDAYS = {
     'natalicio': (3, 3),    # Natalicio de Benito Juarez
     'revolucion': (11, 3) # Revolución Mexicana
 }
+# Calendario académico por defecto; se reemplaza con --calendar o la variable
+# de entorno HORARIOS_CALENDAR (archivo JSON o TOML con la misma estructura)
+CALENDAR_ENV_VAR = 'HORARIOS_CALENDAR'
+DEFAULT_ACADEMIC_CALENDAR = {
+    'terms': [
+        # Semestre FJ (febrero-junio)
+        {'name': 'FJ', 'start_months': [2], 'period_weeks': [5, 6, 5], 'gap_weeks': [1, 1]},
+        # Semestre AD (agosto-diciembre); sin 'start_months' aplica a cualquier mes
+        {'name': 'AD', 'period_weeks': [5, 5, 5], 'gap_weeks': [1, 1]},
+    ],
+    'holidays': {
+        'fixed': FIXED_HOLIDAYS,
+        'mondays': MONDAY_HOLIDAYS,
+        'holy_week': True,
+        'dates': [],
+    },
+}
 SPECIAL_CLASS_KEYWORDS = ['st -', '18 -', 'semana 18', 'semana tec']
+CALENDAR_PRODID = '-//Mi Horario Completo//mx'
+CALENDAR_VERSION = '2.0'
+# Dominio de los UID de los eventos (CRN-código-período-línea@dominio)
+EVENT_UID_DOMAIN = 'mi-horario-completo.mx'
+
+# Versión del formato de los datos extraídos; cambiarla invalida la caché de análisis
+PARSER_VERSION = '3'
+DEFAULT_CACHE_MAX_MB = 256
+
+# Nombres de los .ics: 'sequential' (MiHorario_fecha_carrera_N.ics) o 'hash'
+# (sufijo con el identificador del horario, sin buscar nombres libres)
+OUTPUT_NAMINGS = ('sequential', 'hash')
+SCHEDULE_ID_LENGTH = 16  # caracteres hexadecimales del identificador en el nombre
+SHARD_WIDTH = 2          # caracteres del identificador por nivel de subdirectorio
+
+# Extracción de texto del PDF: 'text' sigue el orden del contenido del PDF,
+# 'layout' ordena las líneas por su posición en la página
+DEFAULT_PDF_BACKEND = 'text'
+LAYOUT_COLUMN_TOLERANCE = 15.0  # puntos entre inicios de línea de una misma columna
+LAYOUT_ROW_TOLERANCE = 3.0      # puntos por encima de 'Unidad de formación' que aún son de su fila
+
+# Servicio HTTP de conversión
+DEFAULT_SERVER_HOST = '127.0.0.1'
+DEFAULT_SERVER_PORT = 8080
+DEFAULT_REQUEST_TIMEOUT = 30.0
+DEFAULT_MAX_BODY_MB = 10
+
+# Vigilancia de un directorio de entrada (modo watch)
+DEFAULT_WATCH_DEBOUNCE = 2.0   # segundos sin cambios antes de convertir un PDF
+DEFAULT_WATCH_INTERVAL = 1.0   # segundos entre revisiones del directorio
+WATCH_MAX_CRASHES = 2          # veces que un PDF solo puede tumbar un proceso del pool antes de darlo por fallido
 
 DAY_MAPPING = {
     "Lun": "MO", "Mar": "TU", "Mié": "WE", 
@@ -36,6 +114,370 @@ DAY_MAPPING = {
 DAYS_MAPPING = {
     'Lun': 0, 'Mar': 1, 'Mié': 2, 'Jue': 3, 'Vie': 4, 'Sáb': 5, 'Dom': 6
 }
+FORMAT_VALUES = ('Presencial', 'Remoto nacional', 'En línea')
+
+# Expresiones regulares compiladas una sola vez para todo el programa
+DAYS_REGEX = '(' + '|'.join(DAY_MAPPING) + ')'
+DAY_LINE_PATTERN = re.compile('^' + DAYS_REGEX, re.IGNORECASE)
+DAYS_PATTERN = re.compile(DAYS_REGEX, re.IGNORECASE)
+TIME_PATTERN = re.compile(r'(\d{1,2}:\d{2})')
+DATE_RANGE_PATTERN = re.compile(r'\d{2}[./]\d{2}[./]\d{4}\s*-\s*\d{2}[./]\d{2}[./]\d{4}')
+DATE_PATTERN = re.compile(r'(\d{2}/\d{2}/\d{4})')
+SUB_PERIOD_PATTERN = re.compile(r'Sub-período[s]?\s+(.+?)(?=\s+CRN|$)')
+CRN_PATTERN = re.compile(r'CRN\s+(\d+)')
+PROCESS_DATE_PATTERN = re.compile(r'Última hora del comprobante:\s*(\d{2}\.\d{2}\.\d{4})')
+CAMPUS_CAREER_PATTERN = re.compile(r'([A-Z]{3})\s*/\s*([^/]+)\s*/\s*([^/\n]+)')
+PROFESSOR_CLEANUP_PATTERN = re.compile(r'[^\w\s,áéíóúÁÉÍÓÚñÑ]')
+
+# ==================================== #
+# ESTRUCTURAS DE DATOS DE LOS HORARIOS #
+# ==================================== #
+
+DAY_NAMES = tuple(sorted(DAYS_MAPPING, key=DAYS_MAPPING.get))
+DAY_CODES = tuple(DAY_MAPPING[day] for day in DAY_NAMES)
+# Días de la semana (0 = lunes) de cada máscara de bits posible
+WEEKDAYS_BY_MASK = tuple(
+    tuple(weekday for weekday in range(7) if mask & (1 << weekday))
+    for mask in range(1 << 7)
+)
+
+class ScheduleHeader:
+    """
+    Información de encabezado del PDF, compartida por todas sus clases.
+    
+    Se completa conforme se leen las líneas del PDF, por lo que las clases
+    creadas antes de leer el encabezado completo ven los valores finales.
+    """
+    __slots__ = ('process_date', 'campus', 'career')
+
+    def __init__(self, process_date: str = '', campus: str = '', career: str = ''):
+        self.process_date = process_date
+        self.campus = campus
+        self.career = career
+
+class ClassRecord(NamedTuple):
+    """Horario de una materia (una línea de horario del bloque de la materia)."""
+    subject_code: str
+    subject: str
+    professor: str
+    days_mask: int
+    start_time: dt_time
+    end_time: dt_time
+    start_date: date
+    end_date: date
+    location: str
+    format: str
+    sub_period: str
+    sub_period_clean: str
+    crn: str
+    in_english: bool
+    is_special_class: bool
+    schedule_line: int
+    header: ScheduleHeader
+
+    @property
+    def days(self) -> List[str]:
+        """Días de clase ('Lun', 'Mar', ...) en orden de la semana."""
+        return [DAY_NAMES[weekday] for weekday in WEEKDAYS_BY_MASK[self.days_mask]]
+
+    @property
+    def process_date(self) -> str:
+        return self.header.process_date
+
+    @property
+    def campus(self) -> str:
+        return self.header.campus
+
+    @property
+    def career(self) -> str:
+        return self.header.career
+
+def days_to_mask(days: Iterable[str]) -> int:
+    """
+    Convierte una lista de días ('Lun', 'mar', ...) en máscara de bits (bit 0 = lunes).
+    
+    Args:
+        days: Días de la semana
+        
+    Returns:
+        Máscara de bits con los días de clase
+    """
+    mask = 0
+    for day in days:
+        mask |= 1 << DAYS_MAPPING[day.capitalize()]
+    return mask
+
+def parse_date(value: str) -> date:
+    """Convierte una fecha con formato DD/MM/YYYY a objeto date."""
+    day, month, year = value.split('/')
+    return date(int(year), int(month), int(day))
+
+def parse_time(value: str) -> dt_time:
+    """Convierte una hora con formato H:MM o HH:MM a objeto time."""
+    hours, minutes = value.split(':')
+    return dt_time(int(hours), int(minutes))
+
+def format_time(value: dt_time) -> str:
+    """Da formato HH:MM a una hora."""
+    return value.strftime('%H:%M')
+
+# =================================== #
+# ERRORES DEL CONVERTIDOR DE HORARIOS #
+# =================================== #
+
+class HorarioError(Exception):
+    """Error base de todos los errores que reporta el convertidor."""
+
+class InvalidPdfError(HorarioError):
+    """El contenido no se pudo abrir como PDF."""
+
+class NoClassesFoundError(HorarioError):
+    """El PDF se leyó, pero no contiene clases reconocibles."""
+
+class CalendarConfigError(HorarioError, ValueError):
+    """El calendario académico configurado no es válido."""
+
+class ParseError(HorarioError):
+    """Un bloque de materia del PDF no se pudo interpretar."""
+
+class RenderError(HorarioError):
+    """Los datos recibidos no permiten generar el calendario de una clase."""
+
+# ======================= #
+# MÉTRICAS DE RENDIMIENTO #
+# ======================= #
+
+METRICS_PREFIX = 'horarios'
+
+class Metrics:
+    """
+    Duraciones por etapa y contadores del proceso de conversión.
+    
+    Desactivadas por defecto: mientras `enabled` sea False las funciones
+    instrumentadas solo comprueban ese atributo.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.counters = {}
+
+    def reset(self) -> None:
+        """Elimina las mediciones acumuladas."""
+        self.stages = {}
+        self.counters = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Registra la duración de una ejecución de la etapa."""
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = {'count': 1, 'total_s': seconds, 'max_s': seconds}
+        else:
+            entry['count'] += 1
+            entry['total_s'] += seconds
+            if seconds > entry['max_s']:
+                entry['max_s'] = seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Incrementa un contador si las métricas están activadas."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Acumula las mediciones exportadas por `to_dict` (p. ej. de otro proceso)."""
+        for stage, values in data.get('stages', {}).items():
+            entry = self.stages.setdefault(stage, {'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+            entry['count'] += values['count']
+            entry['total_s'] += values['total_s']
+            entry['max_s'] = max(entry['max_s'], values['max_s'])
+        for name, value in data.get('counters', {}).items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Exporta las mediciones como diccionario serializable a JSON."""
+        return {
+            'stages': {stage: dict(values) for stage, values in sorted(self.stages.items())},
+            'counters': dict(sorted(self.counters.items()))
+        }
+
+    def to_json(self) -> str:
+        """Exporta las mediciones en formato JSON."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Exporta las mediciones en el formato de texto de Prometheus."""
+        stage_metric = f"{METRICS_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {stage_metric} Tiempo dedicado a cada etapa de la conversión.",
+            f"# TYPE {stage_metric} summary",
+        ]
+        for stage, values in sorted(self.stages.items()):
+            lines.append(f'{stage_metric}_sum{{stage="{stage}"}} {values["total_s"]:.6f}')
+            lines.append(f'{stage_metric}_count{{stage="{stage}"}} {values["count"]}')
+        
+        max_metric = f"{METRICS_PREFIX}_stage_max_seconds"
+        lines.append(f"# HELP {max_metric} Duración máxima de una ejecución de cada etapa.")
+        lines.append(f"# TYPE {max_metric} gauge")
+        for stage, values in sorted(self.stages.items()):
+            lines.append(f'{max_metric}{{stage="{stage}"}} {values["max_s"]:.6f}')
+        
+        for name, value in sorted(self.counters.items()):
+            counter_metric = f"{METRICS_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {counter_metric} counter")
+            lines.append(f"{counter_metric} {value}")
+        
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path: str) -> None:
+        """Guarda las mediciones; en formato Prometheus si la extensión es .prom o .txt, si no en JSON."""
+        if path.lower().endswith(('.prom', '.txt')):
+            content = self.to_prometheus()
+        else:
+            content = self.to_json() + '\n'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+METRICS = Metrics()
+
+def timed_stage(stage: str):
+    """
+    Decorador que registra en METRICS la duración de cada llamada a la función.
+    
+    Args:
+        stage: Nombre de la etapa
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                METRICS.observe(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+# ============================== #
+# REGISTRO DE MENSAJES (LOGGING) #
+# ============================== #
+
+LOG_LEVELS = ('debug', 'info', 'warning', 'error')
+DEFAULT_LOG_LEVEL = 'warning'
+DEFAULT_LOG_BUFFER = 500
+
+logger = logging.getLogger('horarios')
+# Sin configuración (uso como biblioteca) los mensajes no se muestran
+logger.addHandler(logging.NullHandler())
+
+# PDF que se está procesando; se añade a cada mensaje del archivo de registro
+_log_source = ''
+_logging_config = None
+
+def set_log_source(source: str) -> None:
+    """Indica el PDF al que pertenecen los siguientes mensajes."""
+    global _log_source
+    _log_source = source
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formatea cada mensaje como una línea JSON con nivel, hora y PDF de origen."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'source': _log_source,
+            'pid': record.process,
+            'message': record.getMessage()
+        }, ensure_ascii=False)
+
+class BufferedJsonLinesHandler(logging.Handler):
+    """
+    Acumula los mensajes en memoria y los añade al archivo en una sola escritura.
+    
+    El búfer se vacía al llenarse, con cada mensaje de error y al terminar cada
+    conversión (`flush_logs`). Cada escritura usa O_APPEND, por lo que varios
+    procesos pueden compartir el archivo sin mezclar líneas.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_LOG_BUFFER):
+        super().__init__()
+        self.path = path
+        self.capacity = capacity
+        self.buffer = []
+        self.pid = os.getpid()
+        self.setFormatter(JsonLinesFormatter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.pid != os.getpid():
+            # Proceso hijo creado con fork: el búfer heredado ya lo escribe el padre
+            self.buffer = []
+            self.pid = os.getpid()
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.capacity or record.levelno >= logging.ERROR:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if not self.buffer:
+                return
+            data = ('\n'.join(self.buffer) + '\n').encode('utf-8')
+            self.buffer = []
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+def configure_logging(level: str = DEFAULT_LOG_LEVEL, log_file: Optional[str] = None,
+                      stream: Optional[Any] = None) -> None:
+    """
+    Configura los mensajes del programa. Si la configuración no cambió no hace nada.
+    
+    Args:
+        level: Nivel mínimo ('debug', 'info', 'warning' o 'error')
+        log_file: Archivo JSON lines donde se añaden los mensajes (opcional)
+        stream: Flujo de texto donde se muestran los mensajes (opcional)
+    """
+    global _logging_config
+    config = (level, log_file, stream)
+    if config == _logging_config:
+        return
+    
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    
+    logger.setLevel(level.upper())
+    logger.propagate = False
+    
+    if stream is not None:
+        console_handler = logging.StreamHandler(stream)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(console_handler)
+    if log_file:
+        logger.addHandler(BufferedJsonLinesHandler(log_file))
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    
+    _logging_config = config
+
+def flush_logs() -> None:
+    """Escribe los mensajes pendientes de todos los manejadores."""
+    for handler in logger.handlers:
+        handler.flush()
 
 # ================================== #
 # FUNCIONES PRINCIPALES DEL PROGRAMA #
@@ -43,12 +485,309 @@ DAYS_MAPPING = {
 
 def main() -> None:
     """Función principal del programa."""
+    args = parse_arguments()
+
+    if args.command:
+        configure_logging(args.log_level, args.log_file, sys.stderr)
+    else:
+        configure_logging('debug', stream=sys.stdout)
+
+    if args.calendar:
+        # Por variable de entorno para que también lo usen los procesos del pool
+        os.environ[CALENDAR_ENV_VAR] = args.calendar
+    try:
+        get_academic_calendar()
+    except CalendarConfigError as e:
+        print(f"Error en el calendario académico: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'batch':
+        run_batch(args.source, args.current_date, args.semester_start,
+                  args.output_dir, args.workers, args.cache_dir, args.cache_max_mb, args.stream,
+                  args.metrics, args.incremental, args.log_level, args.log_file, args.backend,
+                  args.compact, args.archive, args.naming, args.shard_depth, args.fsync_every)
+        return
+
+    if args.command == 'rooms':
+        run_rooms(args.source, args.semester_start, args.period, args.building, args.room, args.day,
+                  args.start, args.end, args.workers, args.cache_dir, args.cache_max_mb, args.backend)
+        return
+
+    if args.command == 'conflicts':
+        run_conflicts(args.source, args.semester_start, args.workers, args.cache_dir,
+                      args.cache_max_mb, args.backend)
+        return
+
+    if args.command == 'occurrences':
+        run_occurrences(args.source, args.current_date, args.semester_start, args.group, args.workers,
+                        args.cache_dir, args.cache_max_mb, args.backend)
+        return
+
+    if args.command == 'export':
+        if not run_export(args.source, args.output, args.workers, args.cache_dir,
+                          args.cache_max_mb, args.backend):
+            sys.exit(1)
+        return
+
+    if args.command == 'pipe':
+        if not run_pipe(args.current_date, args.semester_start, sys.stdin.buffer, sys.stdout.buffer,
+                        args.backend, args.compact):
+            sys.exit(1)
+        return
+
+    if args.command == 'serve':
+        run_server(args.host, args.port, args.workers, args.max_concurrency,
+                   args.timeout, args.max_body_mb * 1024 * 1024, args.metrics)
+        return
+
+    if args.command == 'watch':
+        if not os.path.isdir(args.spool):
+            print(f"El directorio '{args.spool}' no existe.", file=sys.stderr)
+            sys.exit(1)
+        run_watch(args.spool, args.current_date, args.semester_start, args.output_dir, args.workers,
+                  args.processed_dir, args.failed_dir, args.debounce, args.poll_interval, args.once,
+                  args.cache_dir, args.cache_max_mb, args.stream, args.log_level, args.log_file,
+                  args.backend, args.compact, args.naming, args.shard_depth)
+        return
+
     file_path = get_valid_file_path()
     current_date = get_valid_date("Ingresa la fecha actual (DD-MM-YYYY): ")
     semester_start_date = get_valid_date("Ingresa la fecha de inicio del semestre (DD-MM-YYYY): ")
 
     parsing = parse_pdf(file_path)
-    create_ics_file(parsing, current_date, semester_start_date)
+    create_ics_file(parsing, current_date, semester_start_date, incremental=True)
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Interpreta los argumentos de línea de comandos.
+    
+    Sin argumentos el programa funciona en modo interactivo.
+    
+    Returns:
+        Argumentos interpretados
+    """
+    parser = argparse.ArgumentParser(
+        description="Convierte el PDF de horario del Tec de Monterrey a un archivo .ics"
+    )
+    parser.add_argument('--calendar', help="Archivo JSON o TOML con el calendario académico (períodos, "
+                                           "Semana Tec y días de asueto)")
+    subparsers = parser.add_subparsers(dest='command')
+
+    batch_parser = subparsers.add_parser(
+        'batch', help="Convierte todos los PDF de un directorio o patrón glob"
+    )
+    batch_parser.add_argument('source', help="Directorio con PDFs o patrón glob (ej. 'entrada/*.pdf')")
+    batch_parser.add_argument('--current-date', required=True, type=parse_date_argument,
+                              help="Fecha actual (DD-MM-YYYY)")
+    batch_parser.add_argument('--semester-start', required=True, type=parse_date_argument,
+                              help="Fecha de inicio del semestre (DD-MM-YYYY)")
+    batch_parser.add_argument('--output-dir', default='.',
+                              help="Directorio donde se guardan los .ics (por defecto: el actual)")
+    batch_parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                              help="Número de procesos a utilizar (por defecto: núcleos disponibles)")
+    batch_parser.add_argument('--stream', action='store_true',
+                              help="Escribe cada .ics directamente al archivo sin construir el calendario en memoria")
+    batch_parser.add_argument('--cache-dir',
+                              help="Directorio de la caché de análisis; los PDF repetidos no se vuelven a leer")
+    batch_parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_CACHE_MAX_MB,
+                              help=f"Tamaño máximo de la caché en MB (por defecto: {DEFAULT_CACHE_MAX_MB})")
+    batch_parser.add_argument('--incremental', action='store_true',
+                              help="Actualiza el .ics existente de cada horario (mismos UID, SEQUENCE "
+                                   "incrementado en los eventos modificados) en lugar de crear archivos _N; "
+                                   "no se combina con --naming hash ni --shard-depth")
+    batch_parser.add_argument('--naming', choices=OUTPUT_NAMINGS, default='sequential',
+                              help="Nombres de los .ics: 'sequential' (_1, _2, ...) o 'hash' (identificador "
+                                   "del horario, sin buscar nombres libres)")
+    batch_parser.add_argument('--shard-depth', type=int, default=0,
+                              help="Reparte los .ics en este número de niveles de subdirectorios (por defecto: 0)")
+    batch_parser.add_argument('--fsync-every', type=int, default=0,
+                              help="Sincroniza con el disco los .ics escritos cada N archivos (por defecto: nunca)")
+    batch_parser.add_argument('--archive',
+                              help="Guarda todos los .ics en este archivo .zip o .tar.gz (con manifest.csv) "
+                                   "en lugar de --output-dir; no se combina con --incremental, --naming hash, "
+                                   "--shard-depth ni --fsync-every")
+    batch_parser.add_argument('--metrics', default=None,
+                              help="Guarda tiempos por etapa y contadores en este archivo "
+                                   "(JSON, o formato Prometheus si termina en .prom o .txt)")
+
+    rooms_parser = subparsers.add_parser(
+        'rooms', help="Índice de ocupación de salones a partir de muchos PDF"
+    )
+    rooms_parser.add_argument('source', help="Directorio con PDFs o patrón glob")
+    rooms_parser.add_argument('--semester-start', type=parse_date_argument,
+                              help="Fecha de inicio del semestre (DD-MM-YYYY), necesaria con --period")
+    rooms_parser.add_argument('--period', type=int,
+                              help="Limita la consulta a un período (1 hasta el número de períodos del semestre)")
+    rooms_parser.add_argument('--building', help="Busca salones libres en este edificio (ej. 'Aulas 3')")
+    rooms_parser.add_argument('--room', help="Muestra la ocupación de este salón (ej. 'Aulas 3 | 301')")
+    rooms_parser.add_argument('--day', choices=DAY_NAMES, help="Día de la semana (Lun, Mar, ...)")
+    rooms_parser.add_argument('--start', help="Hora de inicio del intervalo (HH:MM)")
+    rooms_parser.add_argument('--end', help="Hora de fin del intervalo (HH:MM)")
+    rooms_parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                              help="Número de procesos para leer los PDF (por defecto: núcleos disponibles)")
+    rooms_parser.add_argument('--cache-dir', help="Directorio de la caché de análisis")
+    rooms_parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_CACHE_MAX_MB,
+                              help=f"Tamaño máximo de la caché en MB (por defecto: {DEFAULT_CACHE_MAX_MB})")
+
+    conflicts_parser = subparsers.add_parser(
+        'conflicts', help="Reporta las clases que se traslapan en uno o varios horarios"
+    )
+    conflicts_parser.add_argument('source', help="Archivo PDF, directorio con PDFs o patrón glob")
+    conflicts_parser.add_argument('--semester-start', required=True, type=parse_date_argument,
+                                  help="Fecha de inicio del semestre (DD-MM-YYYY)")
+    conflicts_parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                                  help="Número de procesos para leer los PDF (por defecto: núcleos disponibles)")
+    conflicts_parser.add_argument('--cache-dir', help="Directorio de la caché de análisis")
+    conflicts_parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_CACHE_MAX_MB,
+                                  help=f"Tamaño máximo de la caché en MB (por defecto: {DEFAULT_CACHE_MAX_MB})")
+
+    occurrences_parser = subparsers.add_parser(
+        'occurrences', help="Cuenta las clases concretas por horario, semana o salón (requiere NumPy)"
+    )
+    occurrences_parser.add_argument('source', help="Archivo PDF, directorio con PDFs o patrón glob")
+    occurrences_parser.add_argument('--current-date', required=True, type=parse_date_argument,
+                                    help="Fecha actual (DD-MM-YYYY)")
+    occurrences_parser.add_argument('--semester-start', required=True, type=parse_date_argument,
+                                    help="Fecha de inicio del semestre (DD-MM-YYYY)")
+    occurrences_parser.add_argument('--group', choices=('student', 'week', 'room'), default='week',
+                                    help="Agrupación del conteo (por defecto: week)")
+    occurrences_parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                                    help="Número de procesos para leer los PDF (por defecto: núcleos disponibles)")
+    occurrences_parser.add_argument('--cache-dir', help="Directorio de la caché de análisis")
+    occurrences_parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_CACHE_MAX_MB,
+                                    help=f"Tamaño máximo de la caché en MB (por defecto: {DEFAULT_CACHE_MAX_MB})")
+
+    export_parser = subparsers.add_parser(
+        'export', help="Exporta las líneas de horario de varios PDF a CSV, .npz o Parquet"
+    )
+    export_parser.add_argument('source', help="Archivo PDF, directorio con PDFs o patrón glob")
+    export_parser.add_argument('output', help="Archivo de salida; el formato depende de la extensión "
+                                              "(.csv, .npz o .parquet)")
+    export_parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                               help="Número de procesos para leer los PDF (por defecto: núcleos disponibles)")
+    export_parser.add_argument('--cache-dir', help="Directorio de la caché de análisis")
+    export_parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_CACHE_MAX_MB,
+                               help=f"Tamaño máximo de la caché en MB (por defecto: {DEFAULT_CACHE_MAX_MB})")
+
+    pipe_parser = subparsers.add_parser(
+        'pipe', help="Lee el PDF desde la entrada estándar y escribe el .ics en la salida estándar"
+    )
+    pipe_parser.add_argument('--current-date', required=True, type=parse_date_argument,
+                             help="Fecha actual (DD-MM-YYYY)")
+    pipe_parser.add_argument('--semester-start', required=True, type=parse_date_argument,
+                             help="Fecha de inicio del semestre (DD-MM-YYYY)")
+
+    serve_parser = subparsers.add_parser(
+        'serve', help="Inicia un servicio HTTP que convierte PDFs enviados por POST"
+    )
+    serve_parser.add_argument('--host', default=DEFAULT_SERVER_HOST,
+                              help=f"Dirección en la que escucha el servicio (por defecto: {DEFAULT_SERVER_HOST})")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_SERVER_PORT,
+                              help=f"Puerto del servicio (por defecto: {DEFAULT_SERVER_PORT})")
+    serve_parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                              help="Procesos dedicados a leer PDFs (por defecto: núcleos disponibles)")
+    serve_parser.add_argument('--max-concurrency', type=int, default=None,
+                              help="Conversiones simultáneas antes de responder 503 (por defecto: 2 × procesos)")
+    serve_parser.add_argument('--timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                              help=f"Tiempo máximo por solicitud en segundos (por defecto: {DEFAULT_REQUEST_TIMEOUT:g})")
+    serve_parser.add_argument('--max-body-mb', type=int, default=DEFAULT_MAX_BODY_MB,
+                              help=f"Tamaño máximo del PDF en MB (por defecto: {DEFAULT_MAX_BODY_MB})")
+    serve_parser.add_argument('--metrics', action='store_true',
+                              help="Mide tiempos por etapa y contadores, publicados en GET /metrics")
+
+    watch_parser = subparsers.add_parser(
+        'watch', help="Vigila un directorio y convierte los PDF que van llegando"
+    )
+    watch_parser.add_argument('spool', help="Directorio de entrada a vigilar")
+    watch_parser.add_argument('--current-date', type=parse_date_argument,
+                              help="Fecha actual (DD-MM-YYYY; por defecto: el día de cada conversión)")
+    watch_parser.add_argument('--semester-start', required=True, type=parse_date_argument,
+                              help="Fecha de inicio del semestre (DD-MM-YYYY)")
+    watch_parser.add_argument('--output-dir', default='.',
+                              help="Directorio donde se guardan los .ics (por defecto: el actual)")
+    watch_parser.add_argument('--processed-dir',
+                              help="Destino de los PDF convertidos (por defecto: <spool>/procesados)")
+    watch_parser.add_argument('--failed-dir',
+                              help="Destino de los PDF con error (por defecto: <spool>/fallidos)")
+    watch_parser.add_argument('--debounce', type=float, default=DEFAULT_WATCH_DEBOUNCE,
+                              help="Segundos sin cambios antes de convertir un PDF que se está escribiendo "
+                                   f"(por defecto: {DEFAULT_WATCH_DEBOUNCE:g})")
+    watch_parser.add_argument('--poll-interval', type=float, default=DEFAULT_WATCH_INTERVAL,
+                              help="Segundos entre revisiones del directorio cuando no hay inotify "
+                                   f"(por defecto: {DEFAULT_WATCH_INTERVAL:g})")
+    watch_parser.add_argument('--once', action='store_true',
+                              help="Convierte los PDF que ya están en el directorio y termina")
+    watch_parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                              help="Número de procesos a utilizar (por defecto: núcleos disponibles)")
+    watch_parser.add_argument('--stream', action='store_true',
+                              help="Escribe cada .ics directamente al archivo sin construir el calendario en memoria")
+    watch_parser.add_argument('--cache-dir', help="Directorio de la caché de análisis")
+    watch_parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_CACHE_MAX_MB,
+                              help=f"Tamaño máximo de la caché en MB (por defecto: {DEFAULT_CACHE_MAX_MB})")
+    watch_parser.add_argument('--naming', choices=OUTPUT_NAMINGS, default='sequential',
+                              help="Nombres de los .ics: 'sequential' (_1, _2, ...) o 'hash' (identificador "
+                                   "del horario)")
+    watch_parser.add_argument('--shard-depth', type=int, default=0,
+                              help="Reparte los .ics en este número de niveles de subdirectorios (por defecto: 0)")
+
+    for subparser in (batch_parser, pipe_parser, watch_parser):
+        subparser.add_argument('--compact', action='store_true',
+                               help="Un solo evento por clase regular (Semana Tec excluida con EXDATE) "
+                                    "en lugar de uno por período")
+    for subparser in (batch_parser, pipe_parser, rooms_parser, conflicts_parser, occurrences_parser,
+                      export_parser, watch_parser):
+        subparser.add_argument('--backend', choices=sorted(PDF_LINE_BACKENDS), default=DEFAULT_PDF_BACKEND,
+                               help="Extracción del texto: 'text' sigue el orden interno del PDF y 'layout' "
+                                    f"ordena las líneas por su posición en la página (por defecto: {DEFAULT_PDF_BACKEND})")
+    for subparser in (batch_parser, pipe_parser, serve_parser, rooms_parser, conflicts_parser,
+                      occurrences_parser, export_parser, watch_parser):
+        add_logging_arguments(subparser)
+
+    args = parser.parse_args()
+    
+    if args.command == 'batch' and args.incremental:
+        # El nombre y los subdirectorios salen del contenido del horario, que cambia
+        # justo cuando hay algo que actualizar, así que no se encontraría el archivo anterior
+        for option, used in (('--naming hash', args.naming == 'hash'), ('--shard-depth', args.shard_depth)):
+            if used:
+                batch_parser.error(f"--incremental no se puede usar con {option}")
+    
+    if args.command == 'rooms' and args.period is not None:
+        if args.semester_start is None:
+            rooms_parser.error("--period requiere --semester-start")
+        try:
+            period_count = len(load_academic_calendar(args.calendar or os.environ.get(CALENDAR_ENV_VAR) or None)
+                               .period_table(args.semester_start.date()))
+        except CalendarConfigError:
+            period_count = None  # main() reporta el error del calendario
+        if period_count is not None and not 1 <= args.period <= period_count:
+            rooms_parser.error(f"argument --period: el semestre que inicia el "
+                               f"{args.semester_start:%d-%m-%Y} tiene {period_count} período(s)")
+    
+    return args
+
+def add_logging_arguments(parser: argparse.ArgumentParser) -> None:
+    """Añade las opciones de registro de mensajes a un subcomando."""
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default=DEFAULT_LOG_LEVEL,
+                        help=f"Nivel mínimo de los mensajes (por defecto: {DEFAULT_LOG_LEVEL}; "
+                             "'debug' muestra el detalle de cada clase)")
+    parser.add_argument('--log-file',
+                        help="Añade los mensajes a este archivo en formato JSON lines, indicando el PDF de origen")
+
+def parse_date_argument(date_str: str) -> datetime:
+    """
+    Convierte un argumento de línea de comandos en fecha con formato DD-MM-YYYY.
+    
+    Args:
+        date_str: Fecha en texto
+        
+    Returns:
+        Fecha interpretada
+    """
+    try:
+        return datetime.strptime(date_str.strip(), "%d-%m-%Y")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Fecha inválida '{date_str}'. Usa el formato DD-MM-YYYY.")
 
 def get_valid_file_path() -> str:
     """
@@ -90,833 +829,4306 @@ def get_valid_date(prompt: str) -> datetime:
 # FUNCIONES DE PROCESAMIENTO DEL PDF DEL HORARIOS #
 # =============================================== #
 
-def parse_pdf(file_path: str) -> Dict[str, Any]:
+@timed_stage('parse_pdf')
+def parse_pdf(file_path: str, cache: Optional['ParseCache'] = None,
+              backend: str = DEFAULT_PDF_BACKEND) -> Dict[str, Any]:
     """
     Analiza el PDF y extrae los datos del horario.
     
+    Las páginas se leen una a una y cada bloque de materia se procesa en cuanto
+    se completa, sin construir el texto completo del documento en memoria.
+    Los errores solo se registran y se devuelve un horario vacío; para recibir
+    excepciones usa `parse_pdf_bytes`.
+    
     Args:
         file_path: Ruta al archivo PDF
+        cache: Caché de análisis opcional; si el PDF ya fue analizado no se vuelve a abrir
+        backend: Forma de extraer el texto ('text' o 'layout', ver `PDF_LINE_BACKENDS`)
         
     Returns:
         Diccionario con la información extraída del PDF
     """
     try:
-        pdf_document = fitz.open(file_path)
-        text = ""
-        for page in pdf_document:
-            text += page.get_text("text")
-        pdf_document.close()
-        
-        lines = text.split('\n')
+        if cache is None:
+            with fitz.open(file_path) as pdf_document:
+                return parse_pdf_document(pdf_document, backend)
         
-        process_date, campus, career = extract_header_info(lines)
+        with open(file_path, 'rb') as f:
+            pdf_bytes = f.read()
         
-        subject_indexes = find_subject_indexes(lines)
+        key = cache.make_key(pdf_bytes, backend)
+        parsing = cache.get(key)
+        if parsing is not None:
+            logger.info("Horario obtenido de la caché: %s", file_path)
+            return parsing
         
-        schedule_data = []
-        for idx, start_idx in enumerate(subject_indexes):
-            # Determinar el final del bloque
-            end_idx = subject_indexes[idx + 1] if idx + 1 < len(subject_indexes) else len(lines)
-            block_lines = lines[start_idx:end_idx]
-            
-            try:
-                class_infos = extract_subject_info(block_lines)
-                
-                if not class_infos:
-                    print(f"No se pudo extraer información de la materia en el bloque {idx+1}")
-                    continue
-                
-                for subject_info in class_infos:
-                    if not is_valid_subject_info(subject_info):
-                        print("Saltando horario de materia por falta de datos")
-                        continue
-                        
-                    # Determinar si es Semana TEC
-                    class_duration = (subject_info['end_date'] - subject_info['start_date']).days + 1
-                    is_special_class = is_special_class_check(class_duration, subject_info['subject'])
-                    subject_info['is_special_class'] = is_special_class
-                    
-                    subject_info['campus'] = campus
-                    subject_info['career'] = career
-                    subject_info['process_date'] = process_date
-                    
-                    print_class_info(subject_info, is_special_class)
-                    
-                    schedule_data.append(subject_info)
-                    
-            except Exception as e:
-                print(f"Error procesando bloque de materia: {str(e)}")
+        with fitz.open(stream=pdf_bytes, filetype='pdf') as pdf_document:
+            parsing = parse_pdf_document(pdf_document, backend)
         
-        return {
-            'schedule_data': schedule_data,
-            'process_date': process_date,
-            'campus': campus,
-            'career': career
-        }
+        cache.put(key, parsing)
+        return parsing
         
     except Exception as e:
-        print(f"Error procesando PDF: {str(e)}")
+        logger.error("Error procesando PDF: %s", e)
         return {'schedule_data': [], 'process_date': '', 'campus': '', 'career': ''}
 
-def extract_header_info(lines: List[str]) -> Tuple[str, str, str]:
+def parse_pdf_document(pdf_document: fitz.Document, backend: str = DEFAULT_PDF_BACKEND,
+                       strict: bool = False) -> Dict[str, Any]:
     """
-    Extrae información de encabezado del PDF.
+    Extrae los datos del horario de un documento PDF ya abierto.
     
     Args:
-        lines: Lista de líneas del PDF
+        pdf_document: Documento PDF abierto
+        backend: Forma de extraer el texto ('text' o 'layout')
+        strict: Lanza `ParseError` en lugar de registrar y omitir los bloques con error
         
     Returns:
-        Tupla con (fecha_proceso, campus, carrera)
+        Diccionario con la información extraída del PDF
     """
-    process_date = ""
-    campus = ""
-    career = ""
+    header = ScheduleHeader()
+    lines = PDF_LINE_BACKENDS[backend](pdf_document)
     
-    for line in lines:
-        if "Última hora del comprobante:" in line:
-            comprobante_match = re.search(r'Última hora del comprobante:\s*(\d{2}\.\d{2}\.\d{4})', line)
-            if comprobante_match:
-                process_date = comprobante_match.group(1).replace('.', '')
-        
-        campus_career_match = re.search(r'([A-Z]{3})\s*/\s*([^/]+)\s*/\s*([^/\n]+)', line)
-        if campus_career_match:
-            campus = campus_career_match.group(1).strip()
-            career = campus_career_match.group(3).strip()
+    schedule_data = list(iter_schedule_records(lines, header, strict))
     
-    return process_date, campus, career
+    return {
+        'schedule_data': schedule_data,
+        'process_date': header.process_date,
+        'campus': header.campus,
+        'career': header.career
+    }
 
-def find_subject_indexes(lines: List[str]) -> List[int]:
+def iter_pdf_lines(pdf_document: fitz.Document) -> Iterator[str]:
     """
-    Encuentra los índices donde comienzan las unidades de formación.
+    Genera las líneas del PDF página por página.
+    
+    Produce exactamente las mismas líneas que concatenar el texto de todas las
+    páginas y dividirlo por saltos de línea: el fragmento final de cada página
+    (sin salto de línea) se une con el inicio de la siguiente.
     
     Args:
-        lines: Lista de líneas del PDF
+        pdf_document: Documento PDF abierto
         
-    Returns:
-        Lista de índices donde comienzan las materias
+    Yields:
+        Líneas de texto del PDF
     """
-    return [i for i, line in enumerate(lines) 
-            if line.strip().startswith('Unidad de formación:')]
-
-def is_valid_subject_info(subject_info: Dict[str, Any]) -> bool:
-    """Verifica si la información de la materia contiene los datos mínimos necesarios."""
-    return (subject_info and 
-            subject_info.get('start_date') and 
-            subject_info.get('end_date'))
+    pending = ""
+    for page in pdf_document:
+        if METRICS.enabled:
+            start = time.perf_counter()
+            text = page.get_text("text")
+            METRICS.observe('pdf_text', time.perf_counter() - start)
+            METRICS.count('pages')
+        else:
+            text = page.get_text("text")
+        *lines, pending = (pending + text).split('\n')
+        yield from lines
+    yield pending
 
-def is_special_class_check(class_duration: int, subject: str) -> bool:
+def iter_pdf_layout_lines(pdf_document: fitz.Document) -> Iterator[str]:
     """
-    Determina si una clase es especial basada en su duración y nombre.
+    Genera las líneas del PDF ordenadas por su posición en cada página.
+    
+    Usa las coordenadas de `page.get_text("dict")` en lugar del orden en que
+    aparece el texto dentro del PDF. Cada página se divide en regiones que
+    empiezan en una línea 'Unidad de formación:'; dentro de cada región las
+    líneas se agrupan en columnas por su posición horizontal y se entregan
+    columna por columna, de arriba hacia abajo. Antes del primer bloque de
+    materia solo se entregan las líneas de encabezado; el resto de esas
+    páginas y regiones se omite.
     
     Args:
-        class_duration: Duración de la clase en días
-        subject: Nombre de la materia
+        pdf_document: Documento PDF abierto
         
-    Returns:
-        True si es una clase especial, False en caso contrario
+    Yields:
+        Líneas de texto del PDF
     """
-    # Una clase es especial si dura una semana o menos, o si contiene palabras clave
-    if class_duration <= 7:
-        return True
+    block_open = False
+    
+    for page in pdf_document:
+        if METRICS.enabled:
+            start = time.perf_counter()
+            page_lines = get_layout_lines(page)
+            METRICS.observe('pdf_text', time.perf_counter() - start)
+            METRICS.count('pages')
+        else:
+            page_lines = get_layout_lines(page)
         
-    for keyword in SPECIAL_CLASS_KEYWORDS:
-        if keyword in subject.lower():
-            return True
-            
-    return False
+        block_tops = [y for _, y, text in page_lines if text.lstrip().startswith('Unidad de formación:')]
+        
+        if not block_tops:
+            if block_open:
+                # Continuación del último bloque de la página anterior
+                yield from order_region_lines(page_lines)
+            else:
+                yield from (text for _, _, text in page_lines if is_header_line(text))
+            continue
+        
+        boundaries = [y - LAYOUT_ROW_TOLERANCE for y in block_tops]
+        regions = [[] for _ in range(len(boundaries) + 1)]
+        for line in page_lines:
+            regions[bisect.bisect_right(boundaries, line[1])].append(line)
+        
+        if block_open:
+            yield from order_region_lines(regions[0])
+        else:
+            yield from (text for _, _, text in regions[0] if is_header_line(text))
+        
+        for region in regions[1:]:
+            yield from order_region_lines(region)
+        
+        block_open = True
 
-def print_class_info(subject_info: Dict[str, Any], is_special_class: bool) -> None:
+def get_layout_lines(page: fitz.Page) -> List[Tuple[float, float, str]]:
     """
-    Imprime información de depuración sobre una clase.
+    Obtiene las líneas de texto de una página con su posición.
     
     Args:
-        subject_info: Información de la materia
-        is_special_class: Indica si es una clase especial
+        page: Página del PDF
+        
+    Returns:
+        Lista de (x, y, texto) de cada línea no vacía, ordenada de arriba hacia abajo
     """
-    print(f"\n--- Clase detectada: {subject_info['subject']} ({subject_info['subject_code']}) ---")
-    print(f"Profesor(es): {subject_info.get('professor', 'No especificado')}")
-    print(f"Días: {', '.join(subject_info.get('days', []))}")
-    print(f"Horario: {subject_info.get('start_time')} - {subject_info.get('end_time')}")
-    print(f"Fechas: {subject_info['start_date'].strftime('%d/%m/%Y')} - {subject_info['end_date'].strftime('%d/%m/%Y')}")
-    print(f"Ubicación: {subject_info.get('location', 'No especificada')}")
-    print(f"Clase especial: {'Sí' if is_special_class else 'No'}")
-
-    if subject_info.get('in_english', False):
-        print(f"Idioma: Inglés")
-
-# ================================================== #
-# FUNCIONES DE EXTRACCIÓN DE INFORMACIÓN DE MATERIAS #
-# ================================================== #
+    page_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES)
+    
+    lines = []
+    for block in page_dict['blocks']:
+        if block.get('type', 0) != 0:
+            continue
+        for line in block['lines']:
+            text = ''.join(span['text'] for span in line['spans'])
+            if text.strip():
+                x0, y0 = line['bbox'][:2]
+                lines.append((x0, y0, text))
+    
+    lines.sort(key=lambda line: (line[1], line[0]))
+    return lines
 
-def extract_subject_info(block_lines: List[str]) -> List[Dict[str, Any]]:
+def order_region_lines(region: List[Tuple[float, float, str]]) -> List[str]:
     """
-    Extrae la información de una materia a partir de un bloque de líneas.
+    Ordena las líneas de una región por columnas (de izquierda a derecha) y,
+    dentro de cada columna, de arriba hacia abajo.
     
     Args:
-        block_lines: Líneas del bloque de la materia
+        region: Líneas (x, y, texto) de la región
         
     Returns:
-        Lista de diccionarios con información de los horarios de la materia
+        Texto de las líneas en orden de lectura
     """
-    class_infos = []
-    
-    base_info = create_base_info_dict()
-    
-    code_line = block_lines[0].strip()
-    base_info['subject_code'] = code_line[len('Unidad de formación:'):].strip()
-    
-    subject_line_idx = get_subject_line_idx(block_lines)
-    if subject_line_idx < len(block_lines):
-        base_info['subject'] = block_lines[subject_line_idx].strip()
-    
-    base_info['professor'] = extract_professor(block_lines, subject_line_idx)
-    
-    extract_subperiod_and_crn(block_lines, base_info)
-    
-    extract_location_and_format(block_lines, base_info)
+    columns = []
+    column_x = None
+    for line in sorted(region):
+        if column_x is None or line[0] - column_x > LAYOUT_COLUMN_TOLERANCE:
+            columns.append([])
+            column_x = line[0]
+        columns[-1].append(line)
     
-    schedule_indexes = find_schedule_indexes(block_lines)
+    return [text for column in columns for _, _, text in sorted(column, key=lambda line: line[1])]
+
+def is_header_line(line: str) -> bool:
+    """Indica si la línea contiene información de encabezado (fecha de proceso, campus o carrera)."""
+    return "Última hora del comprobante:" in line or CAMPUS_CAREER_PATTERN.search(line) is not None
+
+PDF_LINE_BACKENDS = {
+    'text': iter_pdf_lines,
+    'layout': iter_pdf_layout_lines,
+}
+
+def iter_subject_blocks(lines: Iterable[str], header: ScheduleHeader) -> Iterator[List[str]]:
+    """
+    Agrupa las líneas en bloques de materia conforme van llegando.
     
-    if not schedule_indexes:
-        return None
+    Cada bloque comienza en una línea 'Unidad de formación:' y se entrega en cuanto
+    aparece el inicio del siguiente (o se terminan las líneas). La información de
+    encabezado se actualiza en `header` con cada línea leída.
     
-    extract_dates(block_lines, schedule_indexes, base_info)
+    Args:
+        lines: Líneas del PDF
+        header: Encabezado que se va completando
+        
+    Yields:
+        Líneas de cada bloque de materia
+    """
+    block_lines = None
     
-    for schedule_idx in schedule_indexes:
-        subject_info = process_schedule(block_lines, schedule_idx, base_info)
-        if subject_info:
-            class_infos.append(subject_info)
+    for line in lines:
+        update_header_info(line, header)
+        
+        if line.strip().startswith('Unidad de formación:'):
+            if block_lines is not None:
+                yield block_lines
+            block_lines = [line]
+        elif block_lines is not None:
+            block_lines.append(line)
     
-    return class_infos
-
-def create_base_info_dict() -> Dict[str, Any]:
-    """Crea un diccionario base con la estructura para información de materias."""
-    return {
-        'days': [], 
-        'start_time': None, 
-        'end_time': None, 
-        'start_date': None, 
-        'end_date': None,
-        'location': '', 
-        'format': DEFAULT_FORMAT, 
-        'sub_period': '', 
-        'crn': '', 
-        'professor': '',
-        'in_english': False
-    }
+    if block_lines is not None:
+        yield block_lines
 
-def get_subject_line_idx(block_lines: List[str]) -> int:
+def iter_schedule_records(lines: Iterable[str], header: ScheduleHeader,
+                          strict: bool = False) -> Iterator[ClassRecord]:
     """
-    Obtiene el índice de la línea que contiene el nombre de la materia.
+    Genera los horarios de materia válidos a medida que se completa cada bloque.
     
     Args:
-        block_lines: Líneas del bloque de la materia
+        lines: Líneas del PDF
+        header: Encabezado que se va completando
+        strict: Lanza `ParseError` en lugar de registrar y omitir los bloques con error
         
-    Returns:
-        Índice de la línea con el nombre de la materia
+    Yields:
+        Información de cada horario de materia
     """
-    subject_line_idx = 1
-    while subject_line_idx < len(block_lines) and not block_lines[subject_line_idx].strip():
-        subject_line_idx += 1
-    return subject_line_idx
+    for idx, block_lines in enumerate(iter_subject_blocks(lines, header)):
+        METRICS.count('blocks_found')
+        yield from process_subject_block(block_lines, idx, header, strict)
 
-def extract_professor(block_lines: List[str], subject_line_idx: int) -> str:
+def process_subject_block(block_lines: List[str], idx: int,
+                          header: Optional[ScheduleHeader] = None, strict: bool = False) -> List[ClassRecord]:
     """
-    Extrae el nombre del profesor del bloque de líneas.
+    Extrae y valida los horarios de un bloque de materia.
     
     Args:
         block_lines: Líneas del bloque de la materia
-        subject_line_idx: Índice de la línea con el nombre de la materia
+        idx: Índice del bloque dentro del PDF
+        header: Encabezado del PDF compartido por las clases
+        strict: Lanza `ParseError` en lugar de registrar y omitir el bloque si falla
         
     Returns:
-        Nombre del profesor
+        Lista con la información de los horarios válidos del bloque
+        
+    Raises:
+        ParseError: Solo con `strict`, si el bloque no se pudo interpretar
     """
-    professor_lines = []
-    i = subject_line_idx + 1
+    schedule_data = []
     
-    while i < len(block_lines):
-        line = block_lines[i].strip()
+    try:
+        class_infos = extract_subject_info(block_lines, header)
         
-        if re.match(r'^(Lun|Mar|Mié|Jue|Vie|Sáb|Dom)', line, re.IGNORECASE):
-            break
+        if not class_infos:
+            logger.warning("No se pudo extraer información de la materia en el bloque %d", idx + 1)
+            return schedule_data
+        
+        for subject_info in class_infos:
+            if not is_valid_subject_info(subject_info):
+                logger.warning("Saltando horario de materia por falta de datos")
+                METRICS.count('schedules_skipped')
+                continue
             
-        if line:
-            professor_lines.append(line)
+            if logger.isEnabledFor(logging.DEBUG):
+                print_class_info(subject_info, subject_info.is_special_class)
             
-        i += 1
+            schedule_data.append(subject_info)
+            
+    except Exception as e:
+        if strict:
+            raise ParseError(f"Error procesando el bloque de materia {idx + 1}: {e}") from e
+        logger.error("Error procesando bloque de materia: %s", e)
     
-    return ' '.join(professor_lines).strip()
+    return schedule_data
 
-def extract_subperiod_and_crn(block_lines: List[str], base_info: Dict[str, Any]) -> None:
+def extract_header_info(lines: List[str]) -> Tuple[str, str, str]:
     """
-    Extrae información del sub-período y CRN.
+    Extrae información de encabezado del PDF.
     
     Args:
-        block_lines: Líneas del bloque de la materia
-        base_info: Diccionario donde se almacenará la información
+        lines: Lista de líneas del PDF
+        
+    Returns:
+        Tupla con (fecha_proceso, campus, carrera)
     """
-    for line in block_lines:
-        if 'Sub-período' in line or 'Sub-períodos' in line:
-            base_info['sub_period'] = line
-            
-            sub_period_match = re.search(r'Sub-período[s]?\s+(.+?)(?=\s+CRN|$)', line)
-            if sub_period_match:
-                base_info['sub_period_clean'] = sub_period_match.group(1).strip()
+    header = ScheduleHeader()
+    
+    for line in lines:
+        update_header_info(line, header)
+    
+    return header.process_date, header.campus, header.career
+
+def update_header_info(line: str, header: ScheduleHeader) -> None:
+    """
+    Actualiza la información de encabezado con una línea del PDF.
+    
+    Args:
+        line: Línea del PDF
+        header: Encabezado donde se almacenará la información
+    """
+    if "Última hora del comprobante:" in line:
+        comprobante_match = PROCESS_DATE_PATTERN.search(line)
+        if comprobante_match:
+            header.process_date = comprobante_match.group(1).replace('.', '')
+    
+    campus_career_match = CAMPUS_CAREER_PATTERN.search(line)
+    if campus_career_match:
+        header.campus = campus_career_match.group(1).strip()
+        header.career = campus_career_match.group(3).strip()
+
+def is_valid_subject_info(subject_info: Optional[ClassRecord]) -> bool:
+    """Verifica si la información de la materia contiene los datos mínimos necesarios."""
+    return bool(subject_info and 
+                subject_info.start_date and 
+                subject_info.end_date)
+
+def is_special_class_check(class_duration: int, subject: str) -> bool:
+    """
+    Determina si una clase es especial basada en su duración y nombre.
+    
+    Args:
+        class_duration: Duración de la clase en días
+        subject: Nombre de la materia
+        
+    Returns:
+        True si es una clase especial, False en caso contrario
+    """
+    # Una clase es especial si dura una semana o menos, o si contiene palabras clave
+    if class_duration <= 7:
+        return True
+        
+    for keyword in SPECIAL_CLASS_KEYWORDS:
+        if keyword in subject.lower():
+            return True
             
-            crn_match = re.search(r'CRN\s+(\d+)', line)
-            if crn_match:
-                base_info['crn'] = crn_match.group(1)
+    return False
+
+def print_class_info(subject_info: ClassRecord, is_special_class: bool) -> None:
+    """
+    Registra información de depuración sobre una clase (nivel debug).
+    
+    Args:
+        subject_info: Información de la materia
+        is_special_class: Indica si es una clase especial
+    """
+    lines = [
+        f"\n--- Clase detectada: {subject_info.subject} ({subject_info.subject_code}) ---",
+        f"Profesor(es): {subject_info.professor}",
+        f"Días: {', '.join(subject_info.days)}",
+        f"Horario: {format_time(subject_info.start_time)} - {format_time(subject_info.end_time)}",
+        f"Fechas: {subject_info.start_date.strftime('%d/%m/%Y')} - {subject_info.end_date.strftime('%d/%m/%Y')}",
+        f"Ubicación: {subject_info.location}",
+        f"Clase especial: {'Sí' if is_special_class else 'No'}",
+    ]
+
+    if subject_info.in_english:
+        lines.append("Idioma: Inglés")
+
+    logger.debug('\n'.join(lines))
+
+# ======================================= #
+# CACHÉ EN DISCO DE LOS PDF YA ANALIZADOS #
+# ======================================= #
+
+class ParseCache:
+    """
+    Caché en disco del resultado de `parse_pdf`, indexada por el SHA-256 del PDF.
+    
+    Cada entrada es un archivo JSON cuyo nombre es el hash del contenido del PDF
+    junto con PARSER_VERSION. Cuando el tamaño total supera el límite se eliminan
+    las entradas usadas hace más tiempo (LRU, según la fecha de modificación).
+    
+    El tamaño se mide en el directorio después de cada escritura, de modo que el
+    límite se respeta aunque varios procesos compartan la misma caché.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directorio donde se guardan las entradas
+            max_bytes: Tamaño máximo total de la caché en bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(pdf_bytes: bytes, backend: str = DEFAULT_PDF_BACKEND) -> str:
+        """Calcula la llave de la caché a partir del contenido del PDF y la forma de extraerlo."""
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        if backend != DEFAULT_PDF_BACKEND:
+            return f"{digest}-{backend}-v{PARSER_VERSION}"
+        return f"{digest}-v{PARSER_VERSION}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un análisis guardado.
+        
+        Args:
+            key: Llave calculada con `make_key`
             
-            break
+        Returns:
+            Resultado de `parse_pdf`, o None si no está en la caché
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                parsing = parsing_from_json(json.load(f))
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return parsing
+
+    def put(self, key: str, parsing: Dict[str, Any]) -> None:
+        """
+        Guarda un análisis y elimina las entradas más antiguas si se excede el límite.
+        
+        Args:
+            key: Llave calculada con `make_key`
+            parsing: Resultado de `parse_pdf`
+        """
+        data = json.dumps(parsing_to_json(parsing), ensure_ascii=False).encode('utf-8')
+        
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        
+        self._evict(keep=key)
+
+    def _entry_path(self, key: str) -> str:
+        """Ruta del archivo de una entrada."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _evict(self, keep: str) -> None:
+        """
+        Elimina entradas menos recientes hasta respetar el tamaño máximo.
+        
+        El total se calcula con `os.scandir` en cada llamada, así que incluye las
+        entradas que escribieron otros procesos.
+        
+        Args:
+            keep: Llave de la entrada recién escrita, que nunca se elimina
+        """
+        found = []
+        total_bytes = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # Otro proceso la eliminó
+            found.append((stat.st_mtime, entry.name[:-len('.json')], stat.st_size))
+            total_bytes += stat.st_size
+        
+        if total_bytes <= self.max_bytes:
+            return
+        
+        found.sort()
+        for _, key, size in found:
+            if total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self._entry_path(key))
+            except FileNotFoundError:
+                pass  # Otro proceso ya la eliminó
+            except OSError:
+                continue
+            total_bytes -= size
 
-def extract_location_and_format(block_lines: List[str], base_info: Dict[str, Any]) -> None:
+_parse_caches = {}
+
+def get_parse_cache(cache_dir: Optional[str], max_bytes: int) -> Optional[ParseCache]:
     """
-    Extrae información de ubicación y formato.
+    Obtiene la caché de análisis del proceso actual (una por directorio).
+    
+    Args:
+        cache_dir: Directorio de la caché, o None para no usar caché
+        max_bytes: Tamaño máximo de la caché en bytes
+        
+    Returns:
+        Caché de análisis, o None si no se usa caché
+    """
+    if not cache_dir:
+        return None
+    if cache_dir not in _parse_caches:
+        _parse_caches[cache_dir] = ParseCache(cache_dir, max_bytes)
+    return _parse_caches[cache_dir]
+
+def parsing_to_json(parsing: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte el resultado de `parse_pdf` a una estructura serializable en JSON."""
+    schedule_data = []
+    for subject_info in parsing['schedule_data']:
+        record = subject_info._asdict()
+        del record['header']
+        for field in ('start_time', 'end_time'):
+            record[field] = format_time(record[field])
+        for field in ('start_date', 'end_date'):
+            record[field] = record[field].isoformat()
+        schedule_data.append(record)
+    return dict(parsing, schedule_data=schedule_data)
+
+def parsing_from_json(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Reconstruye el resultado de `parse_pdf` a partir de `parsing_to_json`."""
+    header = ScheduleHeader(data['process_date'], data['campus'], data['career'])
+    schedule_data = []
+    for record in data['schedule_data']:
+        fields = dict(record, header=header)
+        for field in ('start_time', 'end_time'):
+            fields[field] = parse_time(fields[field])
+        for field in ('start_date', 'end_date'):
+            fields[field] = datetime.strptime(fields[field], '%Y-%m-%d').date()
+        schedule_data.append(ClassRecord(**fields))
+    return dict(data, schedule_data=schedule_data)
+
+# ================================================== #
+# FUNCIONES DE EXTRACCIÓN DE INFORMACIÓN DE MATERIAS #
+# ================================================== #
+
+@timed_stage('extract_subject_info')
+def extract_subject_info(block_lines: List[str],
+                         header: Optional[ScheduleHeader] = None) -> Optional[List[ClassRecord]]:
+    """
+    Extrae la información de una materia a partir de un bloque de líneas.
     
     Args:
         block_lines: Líneas del bloque de la materia
-        base_info: Diccionario donde se almacenará la información
+        header: Encabezado del PDF compartido por las clases
+        
+    Returns:
+        Lista con la información de los horarios de la materia
     """
-    for line in block_lines:
-        if '|' in line:
-            if not ('Sub-período' in line or 'Sub-períodos' in line or 'CRN' in line):
-                base_info['location'] = line.strip()
-                
-                if 'NAL' in line or 'Campus Nacional' in line:
-                    base_info['format'] = 'Remoto nacional'
-                    
-                break
+    class_infos = []
     
-    for line in block_lines:
-        if line.strip() in ['Presencial', 'Remoto nacional', 'En línea']:
-            base_info['format'] = line.strip()
-            break
+    base_info = create_base_info_dict()
+    base_info['header'] = header if header is not None else ScheduleHeader()
     
-    base_info['in_english'] = False
-    for line in block_lines:
-        if line.strip() == 'Inglés':
-            base_info['in_english'] = True
-            break
+    code_line = block_lines[0].strip()
+    base_info['subject_code'] = code_line[len('Unidad de formación:'):].strip()
+    
+    subject_line_idx = get_subject_line_idx(block_lines)
+    if subject_line_idx < len(block_lines):
+        base_info['subject'] = block_lines[subject_line_idx].strip()
+    
+    tokens = classify_block_lines(block_lines, subject_line_idx)
+    
+    base_info['professor'] = extract_professor(tokens)
+    
+    extract_subperiod_and_crn(tokens, base_info)
+    
+    extract_location_and_format(tokens, base_info)
+    
+    schedule_indexes = tokens['schedule_indexes']
+    
+    if not schedule_indexes:
+        return None
+    
+    extract_dates(tokens, base_info)
+    
+    for schedule_line, schedule_idx in enumerate(schedule_indexes):
+        subject_info = process_schedule(block_lines, schedule_idx, base_info, schedule_line)
+        if subject_info:
+            class_infos.append(subject_info)
+    
+    return class_infos
+
+def create_base_info_dict() -> Dict[str, Any]:
+    """Crea un diccionario base con la estructura para información de materias."""
+    return {
+        'subject_code': '',
+        'subject': '',
+        'start_date': None, 
+        'end_date': None,
+        'location': '', 
+        'format': DEFAULT_FORMAT, 
+        'sub_period': '', 
+        'sub_period_clean': '',
+        'crn': '', 
+        'professor': '',
+        'in_english': False
+    }
+
+def get_subject_line_idx(block_lines: List[str]) -> int:
+    """
+    Obtiene el índice de la línea que contiene el nombre de la materia.
+    
+    Args:
+        block_lines: Líneas del bloque de la materia
+        
+    Returns:
+        Índice de la línea con el nombre de la materia
+    """
+    subject_line_idx = 1
+    while subject_line_idx < len(block_lines) and not block_lines[subject_line_idx].strip():
+        subject_line_idx += 1
+    return subject_line_idx
 
-def find_schedule_indexes(block_lines: List[str]) -> List[int]:
+def classify_block_lines(block_lines: List[str], subject_line_idx: int) -> Dict[str, Any]:
     """
-    Encuentra los índices de las líneas que contienen información de horarios.
+    Recorre una sola vez las líneas del bloque y etiqueta cada una según su contenido.
+    
+    Se conserva la primera coincidencia de sub-período/CRN, ubicación y formato,
+    las líneas del profesor (entre el nombre de la materia y la primera línea que
+    inicia con un día), todas las líneas de horario y el primer rango de fechas
+    posterior a la última línea de horario.
     
     Args:
         block_lines: Líneas del bloque de la materia
+        subject_line_idx: Índice de la línea con el nombre de la materia
         
     Returns:
-        Lista de índices de líneas con información de horarios
+        Diccionario con las líneas etiquetadas del bloque
     """
-    indexes = []
+    tokens = {
+        'professor_lines': [],
+        'schedule_indexes': [],
+        'date_range_line': None,
+        'sub_period_line': None,
+        'location_line': None,
+        'format_line': None,
+        'in_english': False
+    }
+    schedule_indexes = tokens['schedule_indexes']
+    reading_professor = True
     
-    for i, line in enumerate(block_lines):
-        if (re.match(r'^(Lun|Mar|Mié|Jue|Vie|Sáb|Dom)', line.strip(), re.IGNORECASE) and 
-            re.search(r'\d{1,2}:\d{2}', line.strip())):
-            indexes.append(i)
-            
-    return indexes
+    for i, raw_line in enumerate(block_lines):
+        line = raw_line.strip()
+        is_day_line = DAY_LINE_PATTERN.match(line) is not None
+        
+        if i > subject_line_idx and reading_professor:
+            if is_day_line:
+                reading_professor = False
+            elif line:
+                tokens['professor_lines'].append(line)
+        
+        if is_day_line and TIME_PATTERN.search(line):
+            schedule_indexes.append(i)
+            # Sólo cuenta el rango de fechas posterior a la última línea de horario
+            tokens['date_range_line'] = None
+        elif tokens['date_range_line'] is None and schedule_indexes and DATE_RANGE_PATTERN.search(line):
+            tokens['date_range_line'] = line
+        
+        has_sub_period = 'Sub-período' in raw_line
+        
+        if has_sub_period and tokens['sub_period_line'] is None:
+            tokens['sub_period_line'] = raw_line
+        
+        if (tokens['location_line'] is None and '|' in raw_line and
+                not (has_sub_period or 'CRN' in raw_line)):
+            tokens['location_line'] = raw_line
+        
+        if tokens['format_line'] is None and line in FORMAT_VALUES:
+            tokens['format_line'] = line
+        
+        if line == 'Inglés':
+            tokens['in_english'] = True
+    
+    return tokens
 
+def extract_professor(tokens: Dict[str, Any]) -> str:
+    """
+    Extrae el nombre del profesor de las líneas etiquetadas del bloque.
+    
+    Args:
+        tokens: Líneas etiquetadas del bloque de la materia
+        
+    Returns:
+        Nombre del profesor
+    """
+    return ' '.join(tokens['professor_lines']).strip()
 
-def extract_dates(block_lines: List[str], schedule_indexes: List[int], base_info: Dict[str, Any]) -> None:
+def extract_subperiod_and_crn(tokens: Dict[str, Any], base_info: Dict[str, Any]) -> None:
     """
-    Extrae las fechas de inicio y fin del período.
+    Extrae información del sub-período y CRN.
     
     Args:
-        block_lines: Líneas del bloque de la materia
-        schedule_indexes: Índices de las líneas con información de horarios
+        tokens: Líneas etiquetadas del bloque de la materia
+        base_info: Diccionario donde se almacenará la información
+    """
+    line = tokens['sub_period_line']
+    if line is None:
+        return
+    
+    base_info['sub_period'] = line
+    
+    sub_period_match = SUB_PERIOD_PATTERN.search(line)
+    if sub_period_match:
+        base_info['sub_period_clean'] = sub_period_match.group(1).strip()
+    
+    crn_match = CRN_PATTERN.search(line)
+    if crn_match:
+        base_info['crn'] = crn_match.group(1)
+
+def extract_location_and_format(tokens: Dict[str, Any], base_info: Dict[str, Any]) -> None:
+    """
+    Extrae información de ubicación y formato.
+    
+    Args:
+        tokens: Líneas etiquetadas del bloque de la materia
         base_info: Diccionario donde se almacenará la información
     """
-    # Buscar fechas después de la última línea de horario
-    for i in range(schedule_indexes[-1] + 1, len(block_lines)):
-        line = block_lines[i].strip()
+    line = tokens['location_line']
+    if line is not None:
+        base_info['location'] = line.strip()
         
-        # Buscar fechas en formato DD.MM.YYYY o DD/MM/YYYY
-        if re.search(r'\d{2}[./]\d{2}[./]\d{4}\s*-\s*\d{2}[./]\d{2}[./]\d{4}', line):
-            line = line.replace('.', '/')
-            dates = re.findall(r'(\d{2}/\d{2}/\d{4})', line)
-            
-            if len(dates) >= 2:
-                base_info['start_date'] = datetime.strptime(dates[0], '%d/%m/%Y')
-                base_info['end_date'] = datetime.strptime(dates[1], '%d/%m/%Y')
-                
-            break
+        if 'NAL' in line or 'Campus Nacional' in line:
+            base_info['format'] = 'Remoto nacional'
+    
+    if tokens['format_line'] is not None:
+        base_info['format'] = tokens['format_line']
+    
+    base_info['in_english'] = tokens['in_english']
+
+def extract_dates(tokens: Dict[str, Any], base_info: Dict[str, Any]) -> None:
+    """
+    Extrae las fechas de inicio y fin del período.
+    
+    Args:
+        tokens: Líneas etiquetadas del bloque de la materia
+        base_info: Diccionario donde se almacenará la información
+    """
+    # Fechas en formato DD.MM.YYYY o DD/MM/YYYY después de la última línea de horario
+    line = tokens['date_range_line']
+    if line is None:
+        return
+    
+    dates = DATE_PATTERN.findall(line.replace('.', '/'))
+    
+    if len(dates) >= 2:
+        base_info['start_date'] = parse_date(dates[0])
+        base_info['end_date'] = parse_date(dates[1])
 
-def process_schedule(block_lines: List[str], schedule_idx: int, base_info: Dict[str, Any]) -> Dict[str, Any]:
+def process_schedule(block_lines: List[str], schedule_idx: int, base_info: Dict[str, Any],
+                     schedule_line: int = 0) -> Optional[ClassRecord]:
     """
-    Procesa una línea de horario y crea un objeto de información de clase.
+    Procesa una línea de horario y crea el registro de la clase.
     
     Args:
         block_lines: Líneas del bloque de la materia
         schedule_idx: Índice de la línea con información de horario
         base_info: Información base de la materia
+        schedule_line: Número de la línea de horario dentro del bloque (0 = primera)
         
     Returns:
-        Diccionario con información del horario
+        Registro de la clase, o None si el horario está incompleto
     """
-    subject_info = base_info.copy()
-    
     line = block_lines[schedule_idx].strip()
     
-    days_pattern = r'(Lun|Mar|Mié|Jue|Vie|Sáb|Dom)'
-    subject_info['days'] = re.findall(days_pattern, line, re.IGNORECASE)
+    days_mask = days_to_mask(DAYS_PATTERN.findall(line))
     
-    times = re.findall(r'(\d{1,2}:\d{2})', line)
-    if len(times) >= 2:
-        subject_info['start_time'] = times[0]
-        subject_info['end_time'] = times[1]
+    times = TIME_PATTERN.findall(line)
+    if len(times) < 2 or not has_complete_schedule_info(days_mask, base_info):
+        return None
     
-    if has_complete_schedule_info(subject_info):
-        return subject_info
-        
-    return None
+    # Determinar si es Semana TEC
+    class_duration = (base_info['end_date'] - base_info['start_date']).days + 1
+    
+    return ClassRecord(
+        base_info['subject_code'],
+        base_info['subject'],
+        base_info['professor'],
+        days_mask,
+        parse_time(times[0]),
+        parse_time(times[1]),
+        base_info['start_date'],
+        base_info['end_date'],
+        base_info['location'],
+        base_info['format'],
+        base_info['sub_period'],
+        base_info['sub_period_clean'],
+        base_info['crn'],
+        base_info['in_english'],
+        is_special_class_check(class_duration, base_info['subject']),
+        schedule_line,
+        base_info['header']
+    )
 
-def has_complete_schedule_info(subject_info: Dict[str, Any]) -> bool:
+def has_complete_schedule_info(days_mask: int, base_info: Dict[str, Any]) -> bool:
     """Verifica si la información del horario está completa."""
-    return (subject_info['days'] and 
-            subject_info['start_time'] and 
-            subject_info['end_time'] and 
-            subject_info['start_date'] and 
-            subject_info['end_date'])
+    return bool(days_mask and 
+                base_info['start_date'] and 
+                base_info['end_date'])
 
-# ======================================= #
-# FUNCIONES DE CREACIÓN DE CALENDARIO ICS #
-# ======================================= #
+# ================================= #
+# CALENDARIO ACADÉMICO CONFIGURABLE #
+# ================================= #
 
-def create_ics_file(parsing: Dict[str, Any], current_date: datetime, semester_start_date: datetime) -> None:
+class PeriodTable:
     """
-    Crea un archivo ICS para el horario completo.
+    Períodos de un semestre como tabla ordenada de intervalos.
     
-    Args:
-        parsing: Resultado del análisis del PDF
-        current_date: Fecha actual
-        semester_start_date: Fecha de inicio del semestre
+    Recortar una clase a sus períodos es una búsqueda binaria sobre las fechas
+    de fin en lugar de recorrer todos los períodos.
     """
-    try:
-        schedule_data = parsing['schedule_data']
-        process_date = parsing['process_date']
-        campus = parsing['campus']
-        career = parsing['career']
+    __slots__ = ('starts', 'ends')
 
-        tz = pytz.timezone(TIMEZONE)
+    def __init__(self, periods: List[Tuple[date, date]]):
+        self.starts = [start for start, _ in periods]
+        self.ends = [end for _, end in periods]
 
-        master_cal = create_master_calendar(tz)
+    def __len__(self) -> int:
+        return len(self.starts)
 
-        periods = calculate_academic_periods(semester_start_date)
+    def clip(self, start_date: date, end_date: date) -> Iterator[Tuple[int, date, date]]:
+        """
+        Recorta un rango de fechas a los períodos que toca.
+        
+        Args:
+            start_date: Inicio del rango
+            end_date: Fin del rango
+            
+        Yields:
+            Tuplas (número de período desde 1, inicio recortado, fin recortado)
+        """
+        if start_date > end_date:
+            return
+        idx = bisect.bisect_left(self.ends, start_date)
+        while idx < len(self.starts) and self.starts[idx] <= end_date:
+            yield idx + 1, max(start_date, self.starts[idx]), min(end_date, self.ends[idx])
+            idx += 1
 
-        for student in schedule_data:
-            student.update({
-                'process_date': process_date,
-                'campus': campus,
-                'career': career
-            })
+    def as_dicts(self) -> List[Dict[str, date]]:
+        """Períodos en el formato de `calculate_academic_periods`."""
+        return [{'start': start, 'end': end} for start, end in zip(self.starts, self.ends)]
 
-            if student["end_date"].date() < current_date.date():
-                print(f"Materia omitida: {student['subject']} (finalizada)")
-                continue
+class AcademicCalendar:
+    """
+    Calendario académico: duración de los períodos de cada tipo de semestre,
+    semanas entre períodos (Semana Tec) y días de asueto.
+    
+    Las tablas de períodos y los días de asueto de cada año se calculan una sola
+    vez y se guardan, así que todo un lote de horarios los reutiliza.
+    """
 
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Args:
+            config: Configuración con la estructura de `DEFAULT_ACADEMIC_CALENDAR`
+        """
+        if not isinstance(config, dict):
+            raise CalendarConfigError("El calendario académico debe ser un objeto con 'terms' y 'holidays'")
+        terms = config_list(config.get('terms', []), 'terms')
+        if not terms:
+            raise CalendarConfigError("El calendario académico no define ningún semestre ('terms')")
+        
+        self.terms = []
+        for index, term in enumerate(terms):
+            if not isinstance(term, dict):
+                raise CalendarConfigError("Cada semestre de 'terms' debe ser un objeto")
+            name = f"terms[{index}]"
+            period_weeks = [config_int(weeks, f"{name}.period_weeks", 1)
+                            for weeks in config_list(term.get('period_weeks', []), f"{name}.period_weeks")]
+            gap_weeks = term.get('gap_weeks', 1)
+            if not isinstance(gap_weeks, (list, tuple)):
+                gap_weeks = [gap_weeks] * max(len(period_weeks) - 1, 0)
+            gap_weeks = [config_int(weeks, f"{name}.gap_weeks", 0) for weeks in gap_weeks]
+            
+            if not period_weeks:
+                raise CalendarConfigError(f"Semestre '{term.get('name', index + 1)}': 'period_weeks' debe tener "
+                                 f"al menos un período de una semana o más")
+            if len(gap_weeks) != len(period_weeks) - 1:
+                raise CalendarConfigError(f"Semestre '{term.get('name', index + 1)}': 'gap_weeks' debe tener "
+                                 f"una semana (0 o más) entre cada par de períodos")
+            
+            self.terms.append({
+                'name': term.get('name', ''),
+                'start_months': set(config_int(month, f"{name}.start_months", 1, 12)
+                                    for month in config_list(term.get('start_months', []),
+                                                             f"{name}.start_months")),
+                'period_weeks': period_weeks,
+                'gap_weeks': gap_weeks,
+            })
+        
+        holidays = config.get('holidays', {})
+        if not isinstance(holidays, dict):
+            raise CalendarConfigError("'holidays' debe ser un objeto")
+        self.fixed_holidays = []
+        for pair in config_list(holidays.get('fixed', []), 'holidays.fixed'):
+            month, day = config_pair(pair, 'holidays.fixed', 12, 31)
             try:
-                if student.get('is_special_class'):
-                    process_special_class(student, master_cal, tz, current_date)
-                else:
-                    process_regular_class(student, periods, master_cal, tz, current_date)
-            except Exception as e:
-                print(f"Error procesando {student['subject']}: {str(e)}")
+                date(2000, month, day)  # Año bisiesto: acepta el 29 de febrero
+            except ValueError:
+                raise CalendarConfigError(f"'holidays.fixed': el día {day}/{month} no existe")
+            self.fixed_holidays.append((month, day))
+        mondays = holidays.get('mondays', {})
+        if not isinstance(mondays, dict):
+            raise CalendarConfigError("'holidays.mondays' debe ser un objeto {nombre: [mes, número de lunes]}")
+        self.monday_holidays = [config_pair(pair, f"holidays.mondays.{name}", 12, 4)
+                                for name, pair in mondays.items()]
+        self.holy_week = holidays.get('holy_week', True)
+        if not isinstance(self.holy_week, bool):
+            raise CalendarConfigError("'holidays.holy_week' debe ser true o false")
+        self.extra_holidays = sorted(iter_config_dates(config_list(holidays.get('dates', []), 'holidays.dates')))
+        
+        self._tables = {}
+        self._year_holidays = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> 'AcademicCalendar':
+        """
+        Carga el calendario de un archivo JSON o TOML (.toml, requiere Python 3.11+).
+        
+        Args:
+            path: Ruta del archivo de configuración
+            
+        Returns:
+            Calendario académico
+            
+        Raises:
+            CalendarConfigError: Si el archivo no se puede leer o su contenido no es válido
+        """
+        is_toml = path.lower().endswith('.toml')
+        if is_toml:
+            try:
+                import tomllib
+            except ImportError:
+                raise CalendarConfigError("Leer archivos TOML requiere Python 3.11 o más reciente; usa JSON")
+        
+        try:
+            if is_toml:
+                with open(path, 'rb') as f:
+                    config = tomllib.load(f)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+        except (OSError, ValueError) as e:
+            # ValueError incluye los errores de sintaxis de JSON y TOML y de codificación
+            raise CalendarConfigError(f"No se pudo leer '{path}': {e}") from e
+        
+        return cls(config)
+
+    def select_term(self, semester_start: date) -> Dict[str, Any]:
+        """Tipo de semestre según el mes de inicio (el primero que coincida)."""
+        for term in self.terms:
+            if not term['start_months'] or semester_start.month in term['start_months']:
+                return term
+        return self.terms[-1]
+
+    def period_table(self, semester_start: date) -> PeriodTable:
+        """
+        Tabla de períodos del semestre que inicia en la fecha dada.
+        
+        Args:
+            semester_start: Fecha de inicio del semestre
+            
+        Returns:
+            Tabla de períodos (compartida, no debe modificarse)
+        """
+        table = self._tables.get(semester_start)
+        if table is None:
+            term = self.select_term(semester_start)
+            periods = []
+            period_start = semester_start
+            for idx, weeks in enumerate(term['period_weeks']):
+                period_end = period_start + timedelta(weeks=weeks) - timedelta(days=1)
+                periods.append((period_start, period_end))
+                if idx < len(term['gap_weeks']):
+                    period_start = period_end + timedelta(days=1, weeks=term['gap_weeks'][idx])
+            table = self._tables[semester_start] = PeriodTable(periods)
+        return table
+
+    def year_holidays(self, year: int) -> Tuple[date, ...]:
+        """
+        Días de exclusión de un año: feriados fijos, lunes de asueto, Semana Santa
+        y fechas adicionales de la configuración.
+        
+        Args:
+            year: Año a calcular
+            
+        Returns:
+            Tupla ordenada y sin duplicados con los días de exclusión del año
+        """
+        holidays = self._year_holidays.get(year)
+        if holidays is None:
+            days = {date(year, month, day) for month, day in self.fixed_holidays}
+            
+            for month, week_number in self.monday_holidays:
+                days.add(get_monday_holiday_date(year, month, week_number))
+            
+            if self.holy_week:
+                holy_week_start, holy_week_end = get_holy_week_dates(year)
+                for offset in range((holy_week_end - holy_week_start).days + 1):
+                    days.add(holy_week_start + timedelta(days=offset))
+            
+            days.update(day for day in self.extra_holidays if day.year == year)
+            holidays = self._year_holidays[year] = tuple(sorted(days))
+        return holidays
+
+def iter_config_dates(values: Iterable[Any]) -> Iterator[date]:
+    """
+    Interpreta las fechas adicionales de asueto de la configuración.
+    
+    Cada valor es una fecha ('YYYY-MM-DD' o fecha de TOML) o un rango
+    {'start': ..., 'end': ...} con ambos extremos incluidos.
+    """
+    def to_date(value: Any) -> date:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        try:
+            return datetime.strptime(str(value), '%Y-%m-%d').date()
+        except ValueError:
+            raise CalendarConfigError(f"Fecha de asueto inválida: '{value}' (usa YYYY-MM-DD)")
+    
+    for value in values:
+        if isinstance(value, dict):
+            if 'start' not in value or 'end' not in value:
+                raise CalendarConfigError(f"Rango de asueto sin 'start' o 'end': {value}")
+            start, end = to_date(value['start']), to_date(value['end'])
+            if end < start:
+                raise CalendarConfigError(f"Rango de asueto con 'end' antes de 'start': {value}")
+            for offset in range((end - start).days + 1):
+                yield start + timedelta(days=offset)
+        else:
+            yield to_date(value)
+
+def config_list(value: Any, name: str) -> list:
+    """Verifica que un valor de la configuración del calendario sea una lista."""
+    if not isinstance(value, (list, tuple)):
+        raise CalendarConfigError(f"'{name}' debe ser una lista, no {type(value).__name__}")
+    return list(value)
+
+def config_int(value: Any, name: str, minimum: int, maximum: Optional[int] = None) -> int:
+    """Verifica que un valor de la configuración del calendario sea un entero dentro del rango."""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise CalendarConfigError(f"'{name}' debe contener números enteros, no {value!r}")
+    if value < minimum:
+        raise CalendarConfigError(f"'{name}': {value} debe ser {minimum} o más")
+    if maximum is not None and value > maximum:
+        raise CalendarConfigError(f"'{name}': {value} debe ser {maximum} o menos")
+    return value
+
+def config_pair(value: Any, name: str, max_month: int, max_number: int) -> Tuple[int, int]:
+    """Verifica un par [mes, número] de los días de asueto de la configuración."""
+    pair = config_list(value, name)
+    if len(pair) != 2:
+        raise CalendarConfigError(f"'{name}' debe tener pares [mes, número], no {value!r}")
+    return config_int(pair[0], name, 1, max_month), config_int(pair[1], name, 1, max_number)
+
+@functools.lru_cache(maxsize=None)
+def load_academic_calendar(path: Optional[str]) -> AcademicCalendar:
+    """Carga (una sola vez por proceso) el calendario de un archivo, o el predeterminado."""
+    if path:
+        return AcademicCalendar.from_file(path)
+    return AcademicCalendar(DEFAULT_ACADEMIC_CALENDAR)
+
+def get_academic_calendar() -> AcademicCalendar:
+    """
+    Calendario académico en uso: el archivo indicado en la variable de entorno
+    HORARIOS_CALENDAR (que también heredan los procesos del pool) o el predeterminado.
+    """
+    return load_academic_calendar(os.environ.get(CALENDAR_ENV_VAR) or None)
+
+def get_period_table(semester_start_date: datetime) -> PeriodTable:
+    """Tabla de períodos del semestre según el calendario académico en uso."""
+    return get_academic_calendar().period_table(semester_start_date.date())
+
+# ======================================= #
+# FUNCIONES DE CREACIÓN DE CALENDARIO ICS #
+# ======================================= #
+
+@timed_stage('create_ics_file')
+def create_ics_file(parsing: Dict[str, Any], current_date: datetime, semester_start_date: datetime,
+                    output_dir: Optional[str] = None, streaming: bool = False,
+                    incremental: bool = False, compact: bool = False,
+                    layout: Optional['OutputLayout'] = None) -> Optional[str]:
+    """
+    Crea un archivo ICS para el horario completo.
+    
+    Args:
+        parsing: Resultado del análisis del PDF
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        output_dir: Directorio de salida (por defecto, el del script)
+        streaming: Si es True, los eventos se escriben directamente al archivo
+                   con IcsStreamWriter en lugar de construir el calendario completo
+        incremental: Si es True y el archivo del horario ya existe, se actualiza en
+                     su lugar: los eventos modificados incrementan su SEQUENCE y los
+                     demás se conservan igual; si es False se crea un archivo nuevo
+        compact: Un solo evento por clase regular en lugar de uno por período
+        layout: Nombres y subdirectorios de los archivos (por defecto, nombres
+                secuenciales directamente en `output_dir`)
+        
+    Returns:
+        Ruta del archivo generado, o None si ocurrió un error crítico
+    """
+    try:
+        if layout is None:
+            layout = OutputLayout(output_dir)
+
+        tz = pytz.timezone(TIMEZONE)
+
+        sync = None
+        if incremental:
+            sync = CalendarSync.from_file(layout.path_for(parsing, unique=False))
+
+        if streaming:
+            filename = layout.path_for(parsing, unique=not incremental)
+            write_file_atomic(filename, lambda f: write_ics_stream(
+                parsing, current_date, semester_start_date, f, sync, compact),
+                reserved=layout.reserves(not incremental))
+            logger.info("Horario completo guardado en: %s", filename)
+        else:
+            master_cal = create_master_calendar(tz, semester_start_date)
+
+            for event_data in iter_calendar_events(parsing, current_date, semester_start_date, tz, compact):
+                if sync is not None:
+                    sync.apply(event_data)
+                master_cal.add_component(create_event(event_data))
+                logger.debug("%s añadida al calendario", event_data['label'])
+
+            filename = save_master_ics(master_cal, parsing['process_date'], parsing['campus'],
+                                       parsing['career'], filename=layout.path_for(parsing, unique=not incremental),
+                                       reserved=layout.reserves(not incremental))
+
+        if sync is not None and sync.previous:
+            logger.info(sync.summary())
+
+        logger.info("Proceso completado correctamente.")
+        return filename
+
+    except Exception as e:
+        logger.error("Error crítico: %s", e)
+        return None
+
+def iter_calendar_events(parsing: Dict[str, Any], current_date: datetime, semester_start_date: datetime,
+                         tz: pytz.timezone, compact: bool = False,
+                         strict: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Genera los datos de cada evento del calendario a partir del análisis del PDF.
+    
+    Args:
+        parsing: Resultado del análisis del PDF
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        tz: Zona horaria
+        compact: Si es True, cada clase regular es un solo evento para todos sus
+                 períodos (ver `process_compact_class`)
+        strict: Lanza `RenderError` en lugar de registrar y omitir las clases con error
+        
+    Yields:
+        Datos de cada evento (ver `create_event_data`)
+        
+    Raises:
+        RenderError: Solo con `strict`, si una clase no se pudo convertir en eventos
+    """
+    schedule_data = parsing['schedule_data']
+
+    periods = get_period_table(semester_start_date)
+
+    for student in schedule_data:
+        if student.end_date < current_date.date():
+            logger.info("Materia omitida: %s (finalizada)", student.subject)
+            METRICS.count('classes_ended')
+            continue
+
+        try:
+            if strict:
+                check_class_record(student)
+            if student.is_special_class:
+                METRICS.count('classes_special')
+                events = (process_special_class(student, tz, current_date),)
+            else:
+                METRICS.count('classes_regular')
+                if compact:
+                    events = process_compact_class(student, periods, tz, current_date)
+                else:
+                    events = process_regular_class(student, periods, tz, current_date)
+            
+            for event_data in events:
+                if METRICS.enabled:
+                    METRICS.count('events')
+                    METRICS.count('exdates', len(event_data['exdate']))
+                yield event_data
+        except Exception as e:
+            if strict:
+                if isinstance(e, HorarioError):
+                    raise
+                raise RenderError(f"Error procesando {student.subject}: {e}") from e
+            logger.error("Error procesando %s: %s", student.subject, e)
+
+def check_class_record(student: ClassRecord) -> None:
+    """
+    Verifica que un horario tenga los datos que necesitan sus eventos.
+    
+    Raises:
+        RenderError: Si falta algún dato o no es válido
+    """
+    if not 0 < student.days_mask < len(WEEKDAYS_BY_MASK):
+        raise RenderError(f"{student.subject}: días de clase inválidos (máscara {student.days_mask})")
+    if not (isinstance(student.start_time, dt_time) and isinstance(student.end_time, dt_time)):
+        raise RenderError(f"{student.subject}: horas de clase inválidas")
+    if not (isinstance(student.start_date, date) and isinstance(student.end_date, date)):
+        raise RenderError(f"{student.subject}: fechas de la materia inválidas")
+    if student.start_date > student.end_date:
+        raise RenderError(f"{student.subject}: la fecha de inicio es posterior a la de fin")
+
+def create_master_calendar(tz: pytz.timezone, semester_start_date: datetime) -> Calendar:
+    """Crea un calendario maestro vacío con la definición de su zona horaria."""
+    master_cal = Calendar()
+    master_cal.add('prodid', CALENDAR_PRODID)
+    master_cal.add('version', CALENDAR_VERSION)
+    master_cal.add('X-WR-TIMEZONE', tz.zone)
+    master_cal.add_component(get_vtimezone(tz, semester_start_date.year))
+    return master_cal
+
+@functools.lru_cache(maxsize=None)
+def get_vtimezone(tz: pytz.timezone, year: int) -> Timezone:
+    """
+    Genera el componente VTIMEZONE de la zona horaria (uno por calendario).
+    
+    Cubre del año anterior al siguiente del semestre, así que solo incluye los
+    cambios de horario que pueden afectar a sus clases.
+    
+    Args:
+        tz: Zona horaria
+        year: Año de inicio del semestre
+        
+    Returns:
+        Componente VTIMEZONE (compartido, no debe modificarse)
+    """
+    return Timezone.from_tzinfo(tz, first_date=date(year - 1, 1, 1), last_date=date(year + 2, 1, 1))
+
+@functools.lru_cache(maxsize=65536)
+def localize_datetime(tz: pytz.timezone, day: date, clock: dt_time) -> datetime:
+    """
+    Combina una fecha y una hora en la zona horaria indicada.
+    
+    `tz.localize` es costoso y se usa para cada DTSTART, DTEND, EXDATE y UNTIL,
+    pero un semestre solo tiene unas cuantas horas de clase distintas en unos
+    cuantos días, así que el resultado se guarda en caché.
+    
+    Args:
+        tz: Zona horaria
+        day: Fecha
+        clock: Hora local
+        
+    Returns:
+        Fecha y hora con zona horaria
+    """
+    return tz.localize(datetime.combine(day, clock))
+
+def create_event_data(summary: str, location: str, start: datetime, end: datetime,
+                      description: str, label: str, uid: str) -> Dict[str, Any]:
+    """
+    Crea los datos de un evento, independientes de la forma en que se serialice.
+    
+    Args:
+        summary: Título del evento
+        location: Ubicación
+        start: Inicio de la primera clase (con zona horaria)
+        end: Fin de la primera clase (con zona horaria)
+        description: Descripción del evento
+        label: Nombre del evento para mensajes de consola
+        uid: Identificador estable del evento (ver `make_event_uid`)
+        
+    Returns:
+        Diccionario con los datos del evento
+    """
+    return {
+        'summary': summary,
+        'location': location,
+        'dtstart': start,
+        'dtend': end,
+        'description': description,
+        'exdate': [],
+        'rrule': None,
+        'label': label,
+        'uid': uid,
+        'sequence': 0
+    }
+
+def make_event_uid(student: ClassRecord, period_idx: int) -> str:
+    """
+    Genera el UID de un evento a partir de datos que no cambian entre ejecuciones.
+    
+    Args:
+        student: Información de la materia
+        period_idx: Número del período (0 para clases especiales y eventos compactos)
+        
+    Returns:
+        UID del evento
+    """
+    return (f"{student.crn or 'sin-crn'}-{student.subject_code or 'sin-codigo'}"
+            f"-p{period_idx}-l{student.schedule_line}@{EVENT_UID_DOMAIN}")
+
+def create_event(event_data: Dict[str, Any]) -> Event:
+    """
+    Crea un evento de icalendar a partir de sus datos.
+    
+    Args:
+        event_data: Datos del evento
+        
+    Returns:
+        Evento listo para añadirse al calendario
+    """
+    event = Event()
+    event.add('summary', event_data['summary'])
+    event.add('location', vText(event_data['location']))
+    event.add('dtstart', event_data['dtstart'])
+    event.add('dtend', event_data['dtend'])
+    event.add('uid', event_data['uid'])
+    event.add('sequence', event_data['sequence'])
+    event.add('description', vText(event_data['description']))
+
+    if event_data['exdate']:
+        event.add('exdate', event_data['exdate'])
+
+    if event_data['rrule']:
+        event.add('rrule', event_data['rrule'])
+
+    return event
+
+def calculate_academic_periods(semester_start_date: datetime) -> List[Dict[str, date]]:
+    """
+    Calcula los períodos académicos basados en la fecha de inicio del semestre
+    (según el calendario académico en uso, ver `AcademicCalendar`).
+    
+    Args:
+        semester_start_date: Fecha de inicio del semestre
+        
+    Returns:
+        Lista de diccionarios con fechas de inicio y fin de cada período
+    """
+    return get_period_table(semester_start_date).as_dicts()
+
+def process_special_class(student: ClassRecord, tz: pytz.timezone, current_date: datetime) -> Dict[str, Any]:
+    """
+    Procesa una clase especial y genera su evento.
+    
+    Args:
+        student: Información de la materia
+        tz: Zona horaria
+        current_date: Fecha actual
+        
+    Returns:
+        Datos del evento de la clase
+    """
+    class_start = find_first_class_day(student.start_date, student.days_mask)
+
+    if class_start < current_date.date():
+        class_start = find_next_class_day(current_date.date(), student.days_mask)
+
+    event_data = create_event_data(
+        f"{student.subject} ({student.subject_code}) ",
+        student.location,
+        localize_datetime(tz, class_start, student.start_time),
+        localize_datetime(tz, class_start, student.end_time),
+        create_event_description(student),
+        f"Materia {student.subject}",
+        make_event_uid(student, 0)
+    )
+
+    exclusions = calculate_exclusions(class_start, student.end_date)
+    add_exclusions_to_event(event_data, exclusions, tz, student.subject)
+
+    if (student.end_date - class_start).days > 0:
+        add_recurrence_rule(event_data, student.days_mask, student.end_date, tz)
+
+    return event_data
+
+def process_regular_class(student: ClassRecord, periods: PeriodTable,
+                          tz: pytz.timezone, current_date: datetime) -> Iterator[Dict[str, Any]]:
+    """
+    Procesa una clase regular por períodos y genera un evento por período.
+    
+    Args:
+        student: Información de la materia
+        periods: Tabla de períodos académicos (ver `get_period_table`)
+        tz: Zona horaria
+        current_date: Fecha actual
+        
+    Yields:
+        Datos del evento de cada período
+    """
+    for idx, class_start, class_end in periods.clip(student.start_date, student.end_date):
+        if class_end < current_date.date():
+            logger.info("Período %d de %s omitido (finalizado)", idx, student.subject)
+            continue
+
+        if class_start <= class_end:
+            current_start = find_first_class_day(class_start, student.days_mask)
+
+            if current_start < current_date.date():
+                current_start = find_next_class_day(current_date.date(), student.days_mask)
+
+            event_data = create_event_data(
+                f"{student.subject} ({student.subject_code})",
+                student.location,
+                localize_datetime(tz, current_start, student.start_time),
+                localize_datetime(tz, current_start, student.end_time),
+                create_event_description(student),
+                f"Materia {student.subject} (Período {idx})",
+                make_event_uid(student, idx)
+            )
+
+            exclusions = calculate_exclusions(current_start, class_end)
+            add_exclusions_to_event(event_data, exclusions, tz, f"{student.subject} P{idx}")
+
+            if (class_end - current_start).days > 0:
+                add_recurrence_rule(event_data, student.days_mask, class_end, tz)
+
+            yield event_data
+
+def process_compact_class(student: ClassRecord, periods: PeriodTable,
+                          tz: pytz.timezone, current_date: datetime) -> Iterator[Dict[str, Any]]:
+    """
+    Procesa una clase regular como un solo evento para todos sus períodos.
+    
+    Las semanas entre períodos (Semana Tec) se excluyen con EXDATE en lugar de
+    crear un evento por período, y solo se excluyen los días en que hay clase.
+    
+    Args:
+        student: Información de la materia
+        periods: Tabla de períodos académicos (ver `get_period_table`)
+        tz: Zona horaria
+        current_date: Fecha actual
+        
+    Yields:
+        Datos del evento de la clase (ninguno si ya no tiene clases pendientes)
+    """
+    today = current_date.date()
+    class_days = set(WEEKDAYS_BY_MASK[student.days_mask])
+    
+    ranges = []
+    for _, class_start, class_end in periods.clip(student.start_date, student.end_date):
+        first_day = find_next_class_day(max(class_start, today), student.days_mask)
+        if first_day <= class_end:
+            ranges.append((first_day, class_end))
+    
+    if not ranges:
+        logger.info("Materia omitida: %s (sin clases pendientes)", student.subject)
+        return
+    
+    first_day = ranges[0][0]
+    last_day = ranges[-1][1]
+    
+    exclusions = set(day for day in calculate_exclusions(first_day, last_day) if day.weekday() in class_days)
+    for (_, gap_start), (gap_end, _) in zip(ranges, ranges[1:]):
+        for offset in range(1, (gap_end - gap_start).days):
+            day = gap_start + timedelta(days=offset)
+            if day.weekday() in class_days:
+                exclusions.add(day)
+    
+    event_data = create_event_data(
+        f"{student.subject} ({student.subject_code})",
+        student.location,
+        localize_datetime(tz, first_day, student.start_time),
+        localize_datetime(tz, first_day, student.end_time),
+        create_event_description(student),
+        f"Materia {student.subject}",
+        make_event_uid(student, 0)
+    )
+    
+    add_exclusions_to_event(event_data, sorted(exclusions), tz, student.subject)
+    
+    if (last_day - first_day).days > 0:
+        add_recurrence_rule(event_data, student.days_mask, last_day, tz)
+    
+    yield event_data
+
+def find_first_class_day(start_date: date, days_mask: int) -> date:
+    """
+    Encuentra el primer día de clase basado en la fecha de inicio y los días de la semana.
+    
+    Args:
+        start_date: Fecha de inicio
+        days_mask: Máscara de bits de los días de clase
+        
+    Returns:
+        Fecha del primer día de clase
+    """
+    first_day = WEEKDAYS_BY_MASK[days_mask][0]
+    
+    return start_date + timedelta(days=(first_day - start_date.weekday()) % 7)
+
+def find_next_class_day(current_date: date, days_mask: int) -> date:
+    """
+    Encuentra el próximo día de clase a partir de una fecha.
+    
+    Args:
+        current_date: Fecha actual
+        days_mask: Máscara de bits de los días de clase
+        
+    Returns:
+        Fecha del próximo día de clase
+    """
+    current_weekday = current_date.weekday()
+    class_days = WEEKDAYS_BY_MASK[days_mask]
+    
+    next_class_day = None
+    for day in class_days:
+        if day >= current_weekday:
+            next_class_day = day
+            break
+    
+    if next_class_day is not None:
+        days_until_next = (next_class_day - current_weekday) % 7
+    else:
+        days_until_next = 7 - current_weekday + class_days[0]
+    
+    return current_date + timedelta(days=days_until_next)
+
+def create_event_description(student: ClassRecord) -> str:
+    """
+    Crea la descripción para un evento del calendario.
+    
+    Args:
+        student: Información de la materia
+        
+    Returns:
+        Descripción formateada para el evento
+    """
+    clean_professor = PROFESSOR_CLEANUP_PATTERN.sub('', student.professor)
+
+    description = (
+        f"Profesor(es): {clean_professor}\n"
+        f"Sub-período(s): {student.sub_period_clean}\n"
+        f"CRN: {student.crn}\n"
+        f"Formato: {student.format}\n"
+        f"Ubicación: {student.location}\n"
+        f"Días: {', '.join(student.days)}\n"
+        f"Horario: {format_time(student.start_time)} - {format_time(student.end_time)}\n"
+    )
+
+    if student.in_english:
+        description += f"Idioma: Inglés\n"
+
+    description += f"Período: {student.start_date.strftime('%d/%m/%Y')} - {student.end_date.strftime('%d/%m/%Y')}"
+
+    return description
+
+def calculate_easter_date(year: int) -> date:
+    """
+    Calcula la fecha de Pascua para un año dado usando el algoritmo de Butcher.
+    
+    Args:
+        year: Año para calcular la Pascua
+        
+    Returns:
+        Fecha de Pascua
+    """
+    a = year % 19
+    b = year // 100
+    c = year % 100
+    d = (19 * a + b - b // 4 - ((b - (b + 8) // 25 + 1) // 3) + 15) % 30
+    e = (32 + 2 * (b % 4) + 2 * (c // 4) - d - (c % 4)) % 7
+    f = d + e - 7 * ((a + 11 * d + 22 * e) // 451) + 114
+    month = f // 31
+    day = f % 31 + 1
+    return date(year, month, day)
+
+def get_holy_week_dates(year: int) -> Tuple[date, date]:
+    """
+    Calcula las fechas de inicio y fin de la Semana Santa para un año dado.
+    
+    Args:
+        year: Año para calcular la Semana Santa
+        
+    Returns:
+        Tupla con (fecha_inicio, fecha_fin) de la Semana Santa
+    """
+    easter_date = calculate_easter_date(year)
+    # Semana Santa va del Domingo de Ramos (7 días antes) al Domingo de Pascua
+    holy_week_start = easter_date - timedelta(days=7)
+    holy_week_end = easter_date
+    return holy_week_start, holy_week_end
+
+def get_monday_holiday_date(year: int, month: int, week_number: int) -> date:
+    """
+    Calcula la fecha de un lunes de asueto.
+    
+    Args:
+        year: Año
+        month: Mes
+        week_number: Número de semana (1 = primer lunes, 3 = tercer lunes)
+        
+    Returns:
+        Fecha del día festivo móvil
+    """
+    # Encontrar el primer día del mes
+    first_day = date(year, month, 1)
+    
+    days_until_monday = (7 - first_day.weekday()) % 7
+    first_monday = first_day + timedelta(days=days_until_monday)
+    
+    # Calcular el lunes específico
+    target_monday = first_monday + timedelta(weeks=week_number - 1)
+    
+    return target_monday
+
+def get_year_holidays(year: int) -> Tuple[date, ...]:
+    """
+    Obtiene (calculados una sola vez por año) los días de exclusión de un año
+    según el calendario académico en uso.
+    
+    Args:
+        year: Año a calcular
+        
+    Returns:
+        Tupla ordenada y sin duplicados con los días de exclusión del año
+    """
+    return get_academic_calendar().year_holidays(year)
+
+@timed_stage('calculate_exclusions')
+def calculate_exclusions(start_date: date, end_date: date) -> List[date]:
+    """
+    Calcula los días de exclusión (feriados y semana santa) para un período,
+    aplicando automáticamente para todos los años en el rango.
+    
+    Cada año se consulta en su tabla precalculada con búsqueda binaria.
+    
+    Args:
+        start_date: Fecha de inicio
+        end_date: Fecha de fin
+        
+    Returns:
+        Lista de fechas a excluir
+    """
+    exclusions = []
+    
+    for year in range(start_date.year, end_date.year + 1):
+        holidays = get_year_holidays(year)
+        first = bisect.bisect_left(holidays, start_date)
+        last = bisect.bisect_right(holidays, end_date)
+        exclusions.extend(holidays[first:last])
+    
+    return exclusions
+
+def add_exclusions_to_event(event_data: Dict[str, Any], exclusions: List[date], tz: pytz.timezone,
+                            subject_name: str) -> None:
+    """
+    Añade exclusiones a un evento.
+    
+    Args:
+        event_data: Datos del evento al que se añadirán las exclusiones
+        exclusions: Lista de fechas a excluir
+        tz: Zona horaria
+        subject_name: Nombre de la materia para mensajes de depuración
+    """
+    if not exclusions:
+        return
+        
+    start_time = event_data['dtstart'].time()
+    event_data['exdate'] = [localize_datetime(tz, d, start_time) for d in exclusions]
+    logger.debug("Exclusiones: %s - %d días", subject_name, len(exclusions))
+
+
+def add_recurrence_rule(event_data: Dict[str, Any], days_mask: int, end_date: date, tz: pytz.timezone) -> None:
+    """
+    Añade una regla de recurrencia a un evento.
+    
+    Args:
+        event_data: Datos del evento al que se añadirá la regla
+        days_mask: Máscara de bits de los días de clase
+        end_date: Fecha de fin
+        tz: Zona horaria
+    """
+    event_data['rrule'] = {
+        'freq': 'weekly',
+        'byday': [DAY_CODES[weekday] for weekday in WEEKDAYS_BY_MASK[days_mask]],
+        'until': localize_datetime(tz, end_date + timedelta(days=1), dt_time.min)
+    }
+
+@timed_stage('save_master_ics')
+def save_master_ics(cal: Calendar, process_date: str, campus: str, career: str,
+                    output_dir: Optional[str] = None, unique: bool = True,
+                    filename: Optional[str] = None, reserved: bool = False) -> str:
+    """
+    Guarda el calendario maestro con todas las materias en un único archivo ICS.
+    
+    Args:
+        cal: Calendario a guardar
+        process_date: Fecha del proceso
+        campus: Campus
+        career: Carrera
+        output_dir: Directorio de salida (por defecto, el del script)
+        unique: Si es False se sobrescribe el archivo existente del horario
+        filename: Ruta ya elegida del archivo (ignora `output_dir` y `unique`)
+        reserved: `filename` es un nombre ya reservado con `get_output_filename`
+        
+    Returns:
+        Ruta del archivo generado
+    """
+    if filename is None:
+        filename = get_output_filename(process_date, campus, career, output_dir, unique)
+        reserved = unique
+    
+    write_file_atomic(filename, lambda f: f.write(cal.to_ical()), reserved)
+    
+    logger.info("Horario completo guardado en: %s", filename)
+    return filename
+
+def get_output_filename(process_date: str, campus: str, career: str, output_dir: Optional[str] = None,
+                        unique: bool = True) -> str:
+    """
+    Obtiene la ruta del archivo ICS del horario.
+    
+    Args:
+        process_date: Fecha del proceso
+        campus: Campus
+        career: Carrera
+        output_dir: Directorio de salida (por defecto, el del script)
+        unique: Si es True y el archivo ya existe se añade un sufijo numérico
+                para no sobrescribirlo
+        
+    Returns:
+        Ruta del archivo a generar (con `unique` ya está creado, vacío, para que
+        otro proceso no elija el mismo nombre)
+    """
+    current_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
+    base_filename = get_base_filename(process_date, campus, career)
+    filename = os.path.join(current_dir, f"{base_filename}.ics")
+    if not unique:
+        return filename
+    
+    # ¿El archivo ya existe? Añadir sufijo si es necesario
+    counter = 1
+    while True:
+        try:
+            os.close(os.open(filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+            return filename
+        except FileExistsError:
+            filename = os.path.join(current_dir, f"{base_filename}_{counter}.ics")
+            counter += 1
+
+def get_base_filename(process_date: str, campus: str, career: str) -> str:
+    """Nombre base (sin sufijo ni extensión) del archivo ICS de un horario."""
+    if not process_date:
+        process_date = datetime.now().strftime("%d%m%Y")
+    if not campus:
+        campus = "Campus"
+    if not career:
+        career = "Horario"
+    
+    return f"MiHorario_{process_date}_{career}"
+
+# ========================== #
+# CAPA DE SALIDA DE ARCHIVOS #
+# ========================== #
+
+def schedule_id(parsing: Dict[str, Any]) -> str:
+    """
+    Identificador estable de un horario: SHA-256 de sus datos extraídos.
+    
+    No depende de las fechas de conversión, así que el mismo comprobante
+    convertido otro día conserva su nombre de archivo.
+    """
+    content = json.dumps(parsing_to_json(parsing), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class OutputLayout:
+    """
+    Decide la ruta del .ics de cada horario en el directorio de salida.
+    
+    Con nombres 'hash' el archivo lleva el identificador del horario, así que
+    no hay que buscar un nombre libre y dos procesos nunca compiten por él;
+    con `shard_depth` los archivos se reparten en subdirectorios según los
+    primeros caracteres del identificador (aa/bb/...). El identificador cambia
+    con el contenido del horario, así que ninguna de las dos opciones sirve para
+    actualizar un archivo existente (`incremental`).
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, naming: str = 'sequential', shard_depth: int = 0):
+        """
+        Args:
+            output_dir: Directorio de salida (por defecto, el del script)
+            naming: 'sequential' o 'hash' (ver `OUTPUT_NAMINGS`)
+            shard_depth: Niveles de subdirectorios (0 = todo en `output_dir`)
+        """
+        if naming not in OUTPUT_NAMINGS:
+            raise ValueError(f"Nombres de archivo no soportados: '{naming}'")
+        self.output_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
+        self.naming = naming
+        self.shard_depth = shard_depth
+
+    def path_for(self, parsing: Dict[str, Any], unique: bool = True) -> str:
+        """
+        Ruta del .ics de un horario.
+        
+        Args:
+            parsing: Resultado del análisis del PDF
+            unique: Con nombres secuenciales, si es True se elige (y reserva) un
+                    nombre libre; si es False se devuelve el nombre base
+            
+        Returns:
+            Ruta del archivo
+        """
+        directory = self.output_dir
+        key = schedule_id(parsing) if self.naming == 'hash' or self.shard_depth else ''
+        
+        if self.shard_depth:
+            shards = [key[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH] for level in range(self.shard_depth)]
+            directory = os.path.join(directory, *shards)
+            os.makedirs(directory, exist_ok=True)
+        
+        if self.naming == 'hash':
+            base_filename = get_base_filename(parsing['process_date'], parsing['campus'], parsing['career'])
+            return os.path.join(directory, f"{base_filename}_{key[:SCHEDULE_ID_LENGTH]}.ics")
+        
+        return get_output_filename(parsing['process_date'], parsing['campus'], parsing['career'],
+                                   directory, unique)
+
+    def reserves(self, unique: bool) -> bool:
+        """True si `path_for(..., unique)` reserva el nombre con un archivo vacío."""
+        return unique and self.naming == 'sequential'
+
+@functools.lru_cache(maxsize=None)
+def get_file_mode() -> int:
+    """Permisos de los archivos nuevos según la umask del proceso."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def write_file_atomic(path: str, write: Callable[[BinaryIO], Any], reserved: bool = False) -> Any:
+    """
+    Escribe un archivo de forma atómica: primero a un temporal en el mismo
+    directorio y luego se renombra con `os.replace`, así que nunca queda un
+    archivo a medio escribir con el nombre final.
+    
+    Args:
+        path: Ruta final del archivo
+        write: Función que escribe el contenido en el flujo binario que recibe
+        reserved: `path` es un nombre reservado (archivo vacío de `get_output_filename`);
+                  si la escritura falla también se elimina
+        
+    Returns:
+        Lo que devuelva `write`
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            result = write(f)
+        os.chmod(temp_path, get_file_mode())
+        os.replace(temp_path, path)
+        return result
+    except BaseException:
+        for leftover in ((temp_path, path) if reserved else (temp_path,)):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+        raise
+
+class FsyncBatcher:
+    """
+    Sincroniza con el disco (fsync) los archivos escritos en grupos de `every`,
+    junto con sus directorios, en lugar de después de cada archivo.
+    """
+
+    def __init__(self, every: int = 0):
+        """
+        Args:
+            every: Archivos por grupo (0 = no sincronizar)
+        """
+        self.every = every
+        self.pending = []
+
+    def add(self, path: str) -> None:
+        """Registra un archivo escrito y sincroniza el grupo si ya está completo."""
+        if self.every <= 0:
+            return
+        self.pending.append(path)
+        if len(self.pending) >= self.every:
+            self.flush()
+
+    @timed_stage('fsync')
+    def flush(self) -> None:
+        """Sincroniza los archivos pendientes y sus directorios."""
+        directories = set()
+        for path in self.pending:
+            fsync_path(path)
+            directories.add(os.path.dirname(os.path.abspath(path)))
+        for directory in directories:
+            fsync_path(directory)
+        self.pending = []
+
+def fsync_path(path: str) -> None:
+    """Sincroniza un archivo o directorio con el disco."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # En Windows los directorios no se pueden abrir
+        return
+    try:
+        os.fsync(fd)
+    except OSError as e:
+        logger.error("No se pudo sincronizar %s: %s", path, e)
+    finally:
+        os.close(fd)
+
+# ======================================== #
+# ACTUALIZACIÓN INCREMENTAL DEL CALENDARIO #
+# ======================================== #
+
+class CalendarSync:
+    """
+    Compara los eventos generados con los de un calendario anterior (por UID).
+    
+    Los eventos sin cambios conservan su SEQUENCE, los modificados la
+    incrementan y los nuevos empiezan en 0, de modo que los clientes de
+    calendario solo actualizan los eventos que cambiaron. Un evento cuyo
+    inicio solo avanzó porque ya pasaron algunas clases no cuenta como
+    modificado (ver `event_fingerprint`).
+    """
+
+    def __init__(self, previous: Dict[str, Tuple[int, Tuple[str, ...]]]):
+        """
+        Args:
+            previous: UID -> (SEQUENCE, propiedades) de cada evento anterior
+        """
+        self.previous = previous
+        self.seen = set()
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> 'CalendarSync':
+        """Carga los eventos de un archivo ICS existente (vacío si no existe)."""
+        if not os.path.exists(path):
+            return cls({})
+        with open(path, 'rb') as f:
+            return cls(read_calendar_events(f.read()))
+
+    def apply(self, event_data: Dict[str, Any]) -> None:
+        """Asigna el SEQUENCE del evento según el calendario anterior."""
+        uid = event_data['uid']
+        self.seen.add(uid)
+        entry = self.previous.get(uid)
+        
+        if entry is None:
+            self.added += 1
+            return
+        
+        sequence, properties = entry
+        lines = format_event_lines(event_data)
+        start, previous_start = event_start_day(lines), event_start_day(properties)
+        since = max(start, previous_start)
+        if (start >= previous_start
+                and event_fingerprint(lines, since) == event_fingerprint(properties, since)):
+            self.unchanged += 1
+            event_data['sequence'] = sequence
+        else:
+            self.changed += 1
+            event_data['sequence'] = sequence + 1
+
+    @property
+    def removed(self) -> int:
+        """Eventos del calendario anterior que ya no se generaron."""
+        return sum(1 for uid in self.previous if uid not in self.seen)
+
+    def summary(self) -> str:
+        """Resumen de los cambios respecto al calendario anterior."""
+        return (f"Calendario actualizado: {self.added} eventos nuevos, {self.changed} modificados, "
+                f"{self.unchanged} sin cambios, {self.removed} eliminados")
+
+def event_fingerprint(lines: Iterable[str], since: str) -> Tuple[str, ...]:
+    """
+    Propiedades del evento que se comparan entre ejecuciones.
+    
+    El inicio de un evento depende de la fecha actual (se omiten las clases que
+    ya pasaron), así que de DTSTART y DTEND solo se compara la hora y de EXDATE
+    solo las fechas a partir de `since`. SEQUENCE no se compara.
+    
+    Args:
+        lines: Propiedades del evento sin plegar (ver `format_event_lines`)
+        since: Primer día que se compara, como AAAAMMDD
+        
+    Returns:
+        Propiedades normalizadas
+    """
+    fingerprint = []
+    for line in lines:
+        name, _, value = line.partition(':')
+        prop = name.split(';', 1)[0]
+        if prop == 'SEQUENCE':
+            continue
+        if prop in ('DTSTART', 'DTEND'):
+            line = f"{name}:{value[8:]}"
+        elif prop == 'EXDATE':
+            value = ','.join(day for day in value.split(',') if day[:8] >= since)
+            if not value:
+                continue
+            line = f"{name}:{value}"
+        fingerprint.append(line)
+    return tuple(fingerprint)
+
+def event_start_day(lines: Iterable[str]) -> str:
+    """Día de DTSTART (AAAAMMDD) en las propiedades de un evento, o '' si no tiene."""
+    for line in lines:
+        if line.startswith(('DTSTART:', 'DTSTART;')):
+            return line.partition(':')[2][:8]
+    return ''
+
+def read_calendar_events(ics_bytes: bytes) -> Dict[str, Tuple[int, Tuple[str, ...]]]:
+    """
+    Lee los eventos de un archivo ICS generado por este programa.
+    
+    Args:
+        ics_bytes: Contenido del archivo ICS
+        
+    Returns:
+        Diccionario UID -> (SEQUENCE, propiedades sin plegar excepto SEQUENCE);
+        los eventos sin UID se ignoran
+    """
+    text = ics_bytes.decode('utf-8', errors='replace')
+    text = text.replace('\r\n ', '').replace('\r\n\t', '')
+    
+    events = {}
+    properties = None
+    uid = None
+    sequence = 0
+    
+    for line in text.split('\r\n'):
+        if line == 'BEGIN:VEVENT':
+            properties, uid, sequence = [], None, 0
+        elif line == 'END:VEVENT':
+            if properties is not None and uid is not None:
+                events[uid] = (sequence, tuple(properties))
+            properties = None
+        elif properties is not None:
+            if line.startswith('SEQUENCE:'):
+                try:
+                    sequence = int(line[len('SEQUENCE:'):])
+                except ValueError:
+                    sequence = 0
+                continue
+            if line.startswith('UID:'):
+                uid = line[len('UID:'):]
+            properties.append(line)
+    
+    return events
+
+# ======================================== #
+# ESCRITURA DIRECTA DE ICS (SIN ICALENDAR) #
+# ======================================== #
+
+ICS_LINE_LIMIT = 75
+RRULE_PART_ORDER = ('freq', 'until', 'byday')
+
+class IcsStreamWriter:
+    """
+    Escribe un calendario ICS línea por línea directamente a un flujo binario
+    (archivo, socket, etc.) sin construir el árbol de objetos de icalendar.
+    
+    La salida es idéntica byte por byte a `Calendar.to_ical()`: mismo orden de
+    propiedades, mismo escapado de texto y mismo plegado de líneas a 75 octetos.
+    """
+
+    def __init__(self, stream: BinaryIO, tz: pytz.timezone, semester_start_date: datetime):
+        """
+        Args:
+            stream: Flujo binario de salida
+            tz: Zona horaria del calendario
+            semester_start_date: Fecha de inicio del semestre (para el VTIMEZONE)
+        """
+        self.stream = stream
+        self.tz = tz
+        self.semester_start_date = semester_start_date
+        self.event_count = 0
+
+    def __enter__(self) -> 'IcsStreamWriter':
+        self.write_header()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.write_footer()
+
+    def write_header(self) -> None:
+        """Escribe el inicio del calendario, sus propiedades y su zona horaria."""
+        self._write_lines([
+            'BEGIN:VCALENDAR',
+            f"VERSION:{escape_ics_text(CALENDAR_VERSION)}",
+            f"PRODID:{escape_ics_text(CALENDAR_PRODID)}",
+            f"X-WR-TIMEZONE:{escape_ics_text(self.tz.zone)}",
+        ])
+        self.stream.write(get_vtimezone(self.tz, self.semester_start_date.year).to_ical())
+
+    def write_event(self, event_data: Dict[str, Any]) -> None:
+        """
+        Escribe un evento completo.
+        
+        Args:
+            event_data: Datos del evento (ver `create_event_data`)
+        """
+        self._write_lines(['BEGIN:VEVENT'] + format_event_lines(event_data) + ['END:VEVENT'])
+        self.event_count += 1
+
+    def write_footer(self) -> None:
+        """Escribe el cierre del calendario."""
+        self._write_lines(['END:VCALENDAR'])
+
+    def _write_lines(self, lines: List[str]) -> None:
+        """Pliega, codifica y escribe líneas de contenido."""
+        self.stream.write(''.join(fold_ics_line(line) + '\r\n' for line in lines).encode('utf-8'))
+
+def format_event_lines(event_data: Dict[str, Any]) -> List[str]:
+    """
+    Genera las propiedades de un evento como líneas de contenido sin plegar.
+    
+    Args:
+        event_data: Datos del evento (ver `create_event_data`)
+        
+    Returns:
+        Líneas de las propiedades del evento (sin BEGIN/END)
+    """
+    # Mismo orden que icalendar: propiedades canónicas y después orden alfabético
+    lines = [
+        f"SUMMARY:{escape_ics_text(event_data['summary'])}",
+        format_ics_datetimes('DTSTART', [event_data['dtstart']]),
+        format_ics_datetimes('DTEND', [event_data['dtend']]),
+        f"UID:{escape_ics_text(event_data['uid'])}",
+        f"SEQUENCE:{event_data['sequence']}",
+    ]
+    if event_data['rrule']:
+        lines.append(f"RRULE:{format_ics_rrule(event_data['rrule'])}")
+    if event_data['exdate']:
+        lines.append(format_ics_datetimes('EXDATE', event_data['exdate']))
+    lines.append(f"DESCRIPTION:{escape_ics_text(event_data['description'])}")
+    lines.append(f"LOCATION:{escape_ics_text(event_data['location'])}")
+    return lines
+
+@timed_stage('write_ics_stream')
+def write_ics_stream(parsing: Dict[str, Any], current_date: datetime, semester_start_date: datetime,
+                     stream: BinaryIO, sync: Optional['CalendarSync'] = None, compact: bool = False,
+                     strict: bool = False) -> int:
+    """
+    Escribe el calendario completo a un flujo binario conforme se procesa cada clase.
+    
+    Args:
+        parsing: Resultado del análisis del PDF
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        stream: Flujo binario de salida
+        sync: Comparación con el calendario anterior para asignar SEQUENCE (opcional)
+        compact: Un solo evento por clase regular en lugar de uno por período
+        strict: Lanza `RenderError` si una clase no se puede convertir (ver `iter_calendar_events`)
+        
+    Returns:
+        Número de eventos escritos
+    """
+    tz = pytz.timezone(TIMEZONE)
+
+    with IcsStreamWriter(stream, tz, semester_start_date) as writer:
+        for event_data in iter_calendar_events(parsing, current_date, semester_start_date, tz, compact, strict):
+            if sync is not None:
+                sync.apply(event_data)
+            writer.write_event(event_data)
+            logger.debug("%s añadida al calendario", event_data['label'])
+
+    return writer.event_count
+
+def render_ics_bytes(parsing: Dict[str, Any], current_date: datetime, semester_start_date: datetime,
+                     compact: bool = False, strict: bool = False) -> bytes:
+    """
+    Genera el contenido del archivo ICS en memoria, sin escribir en disco.
+    
+    Args:
+        parsing: Resultado del análisis del PDF
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        compact: Un solo evento por clase regular en lugar de uno por período
+        strict: Lanza `RenderError` si una clase no se puede convertir
+        
+    Returns:
+        Contenido del calendario
+    """
+    buffer = io.BytesIO()
+    write_ics_stream(parsing, current_date, semester_start_date, buffer, compact=compact, strict=strict)
+    return buffer.getvalue()
+
+def escape_ics_text(text: str) -> str:
+    """Escapa un valor de texto según RFC 5545 (igual que vText de icalendar)."""
+    return (
+        text.replace('\\N', '\n')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+def fold_ics_line(line: str) -> str:
+    """
+    Pliega una línea de contenido para que ninguna exceda 75 octetos.
+    
+    Sigue la misma regla que icalendar: se corta antes de que la línea llegue al
+    límite, sin partir caracteres UTF-8 ni separar una barra invertida de lo que
+    escapa.
+    """
+    if len(line.encode('utf-8')) < ICS_LINE_LIMIT:
+        return line
+
+    folded_lines = []
+    current_chars = []
+    byte_count = 0
+    for char in line:
+        char_byte_len = len(char.encode('utf-8'))
+        if current_chars and byte_count + char_byte_len >= ICS_LINE_LIMIT:
+            if len(current_chars) > 1 and current_chars[-1] in '\\^':
+                escaped_prefix = current_chars.pop()
+                folded_lines.append(''.join(current_chars))
+                current_chars = [escaped_prefix]
+                byte_count = len(escaped_prefix.encode('utf-8'))
+            else:
+                folded_lines.append(''.join(current_chars))
+                current_chars = []
+                byte_count = 0
+        current_chars.append(char)
+        byte_count += char_byte_len
+
+    if current_chars:
+        folded_lines.append(''.join(current_chars))
+
+    return '\r\n '.join(folded_lines)
+
+def format_ics_datetime(value: datetime) -> str:
+    """Da formato DATE-TIME de iCalendar a una fecha y hora."""
+    suffix = 'Z' if getattr(value.tzinfo, 'zone', None) == 'UTC' else ''
+    return value.strftime('%Y%m%dT%H%M%S') + suffix
+
+def format_ics_datetimes(name: str, values: List[datetime]) -> str:
+    """
+    Crea una línea de contenido con una o varias fechas y horas de la misma zona horaria.
+    
+    Args:
+        name: Nombre de la propiedad (DTSTART, DTEND, EXDATE, ...)
+        values: Fechas y horas con zona horaria
+        
+    Returns:
+        Línea de contenido sin plegar
+    """
+    tzid = getattr(values[0].tzinfo, 'zone', None)
+    params = f";TZID={tzid}" if tzid and tzid != 'UTC' else ''
+    return f"{name}{params}:" + ','.join(format_ics_datetime(value) for value in values)
+
+def format_ics_rrule(rrule: Dict[str, Any]) -> str:
+    """Da formato al valor de una regla de recurrencia."""
+    parts = []
+    for key in RRULE_PART_ORDER:
+        if key not in rrule:
+            continue
+        value = rrule[key]
+        if key == 'until':
+            value = format_ics_datetime(value)
+        elif isinstance(value, (list, tuple)):
+            value = ','.join(value)
+        else:
+            value = str(value).upper()
+        parts.append(f"{key.upper()}={value}")
+    return ';'.join(parts)
+
+# =========================================== #
+# API DE BIBLIOTECA (SIN EFECTOS SECUNDARIOS) #
+# =========================================== #
+
+class ParsedSchedule(NamedTuple):
+    """Horario analizado; sus campos son los del resultado de `parse_pdf`."""
+    schedule_data: List[ClassRecord]
+    process_date: str
+    campus: str
+    career: str
+
+def parse_pdf_bytes(data: bytes, backend: str = DEFAULT_PDF_BACKEND, strict: bool = True) -> ParsedSchedule:
+    """
+    Analiza el contenido de un PDF de horario en memoria.
+    
+    No pide datos, no imprime ni escribe archivos; los mensajes van a `logger`,
+    que sin configurar no muestra nada.
+    
+    Args:
+        data: Contenido del PDF
+        backend: Forma de extraer el texto ('text' o 'layout')
+        strict: Si es False, los bloques con error se registran y se omiten
+        
+    Returns:
+        Horario analizado
+        
+    Raises:
+        InvalidPdfError: Si el contenido no se puede abrir como PDF
+        ParseError: Si un bloque de materia no se pudo interpretar (solo con `strict`)
+        NoClassesFoundError: Si el PDF no contiene clases reconocibles
+    """
+    try:
+        pdf_document = fitz.open(stream=data, filetype='pdf')
+    except Exception as e:
+        raise InvalidPdfError(f"No se pudo abrir el PDF: {e}") from e
+    
+    with pdf_document:
+        parsing = parse_pdf_document(pdf_document, backend, strict)
+    
+    if not parsing['schedule_data']:
+        raise NoClassesFoundError("No se detectaron clases en el PDF")
+    
+    return ParsedSchedule(**parsing)
+
+def render_calendar(parsed: ParsedSchedule, current_date: date, semester_start: date,
+                    compact: bool = False, strict: bool = True) -> bytes:
+    """
+    Genera el calendario ICS de un horario analizado.
+    
+    Con `strict` (por defecto) una clase que no se puede convertir no se omite,
+    como en los modos de línea de comandos: se reporta con una excepción.
+    
+    Args:
+        parsed: Horario de `parse_pdf_bytes`
+        current_date: Fecha actual (se omiten las clases anteriores)
+        semester_start: Fecha de inicio del semestre
+        compact: Un solo evento por clase regular en lugar de uno por período
+        strict: Si es False, las clases con error se registran y se omiten
+        
+    Returns:
+        Contenido del archivo .ics
+        
+    Raises:
+        RenderError: Si los argumentos o (con `strict`) alguna clase del horario no son válidos
+        CalendarConfigError: Si el calendario académico configurado no es válido
+    """
+    if not isinstance(parsed, ParsedSchedule):
+        raise RenderError(f"Se esperaba un ParsedSchedule, se recibió {type(parsed).__name__}")
+    for name, value in (('current_date', current_date), ('semester_start', semester_start)):
+        if not isinstance(value, date):
+            raise RenderError(f"'{name}' debe ser date o datetime, se recibió {type(value).__name__}")
+    
+    return render_ics_bytes(parsed._asdict(), as_datetime(current_date), as_datetime(semester_start),
+                            compact, strict)
+
+def as_datetime(value: date) -> datetime:
+    """Acepta `date` o `datetime` (las funciones internas usan `datetime`)."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, dt_time.min)
+
+# ========================================== #
+# CONVERSIÓN POR LOTES (VARIOS PDF A LA VEZ) #
+# ========================================== #
+
+def collect_pdf_paths(source: str) -> List[str]:
+    """
+    Obtiene la lista de PDFs a convertir a partir de un directorio o patrón glob.
+    
+    Args:
+        source: Directorio con PDFs o patrón glob
+        
+    Returns:
+        Lista ordenada de rutas a archivos PDF
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith('.pdf') and os.path.isfile(os.path.join(source, name))
+        )
+    return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+def convert_pdf_file(file_path: str, current_date: datetime, semester_start_date: datetime,
+                     output_dir: str, cache_dir: Optional[str] = None,
+                     cache_max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024,
+                     streaming: bool = False, collect_metrics: bool = False,
+                     incremental: bool = False, log_level: Optional[str] = None,
+                     log_file: Optional[str] = None, backend: str = DEFAULT_PDF_BACKEND,
+                     compact: bool = False, in_memory: bool = False, naming: str = 'sequential',
+                     shard_depth: int = 0) -> Dict[str, Any]:
+    """
+    Convierte un PDF a .ics. Se ejecuta dentro de un proceso del pool de conversión.
+    
+    Args:
+        file_path: Ruta al archivo PDF
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        output_dir: Directorio de salida
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_bytes: Tamaño máximo de la caché en bytes
+        streaming: Escribe el .ics con IcsStreamWriter
+        collect_metrics: Incluye en el resultado las métricas de esta conversión
+        incremental: Actualiza el .ics existente del horario en lugar de crear uno nuevo
+        log_level: Nivel de los mensajes del proceso (None conserva la configuración actual)
+        log_file: Archivo JSON lines de los mensajes
+        backend: Forma de extraer el texto del PDF ('text' o 'layout')
+        compact: Un solo evento por clase regular en lugar de uno por período
+        in_memory: No escribe el .ics; lo devuelve en 'data' junto con el nombre
+                   sugerido ('entry') y el número de eventos ('events')
+        naming: Nombres de los archivos ('sequential' o 'hash', ver `OutputLayout`)
+        shard_depth: Niveles de subdirectorios del directorio de salida
+        
+    Returns:
+        Diccionario con el resultado de la conversión
+    """
+    if log_level is not None:
+        configure_logging(log_level, log_file, sys.stderr)
+
+    if collect_metrics:
+        METRICS.reset()
+        METRICS.enabled = True
+        try:
+            result = convert_pdf_file(file_path, current_date, semester_start_date, output_dir,
+                                      cache_dir, cache_max_bytes, streaming, incremental=incremental,
+                                      backend=backend, compact=compact, in_memory=in_memory,
+                                      naming=naming, shard_depth=shard_depth)
+        finally:
+            METRICS.enabled = False
+        result['metrics'] = METRICS.to_dict()
+        METRICS.reset()
+        return result
+
+    result = {'file': file_path, 'ok': False, 'output': None, 'error': '', 'cache_hit': False}
+
+    set_log_source(file_path)
+    try:
+        cache = get_parse_cache(cache_dir, cache_max_bytes)
+        hits_before = cache.hits if cache else 0
+
+        parsing = parse_pdf(file_path, cache, backend)
+        result['cache_hit'] = bool(cache) and cache.hits > hits_before
+        if not parsing['schedule_data']:
+            result['error'] = "No se detectaron clases en el PDF"
+            return result
+
+        if in_memory:
+            buffer = io.BytesIO()
+            result['events'] = write_ics_stream(parsing, current_date, semester_start_date, buffer,
+                                                compact=compact)
+            result['data'] = buffer.getvalue()
+            # Nombre sugerido de la entrada; ArchiveSink añade el sufijo si ya existe
+            base_filename = get_base_filename(parsing['process_date'], parsing['campus'], parsing['career'])
+            result['entry'] = f"{base_filename}.ics"
+            result['ok'] = True
+            return result
+
+        layout = OutputLayout(output_dir, naming, shard_depth)
+        output = create_ics_file(parsing, current_date, semester_start_date, output_dir, streaming,
+                                 incremental, compact, layout)
+        if output is None:
+            result['error'] = "No se pudo generar el archivo .ics"
+            return result
+
+        result['ok'] = True
+        result['output'] = output
+        return result
+    finally:
+        flush_logs()
+        set_log_source('')
+
+def run_batch(source: str, current_date: datetime, semester_start_date: datetime,
+              output_dir: str, workers: Optional[int] = None, cache_dir: Optional[str] = None,
+              cache_max_mb: int = DEFAULT_CACHE_MAX_MB, streaming: bool = False,
+              metrics_path: Optional[str] = None, incremental: bool = False,
+              log_level: Optional[str] = None, log_file: Optional[str] = None,
+              backend: str = DEFAULT_PDF_BACKEND, compact: bool = False,
+              archive_path: Optional[str] = None, naming: str = 'sequential', shard_depth: int = 0,
+              fsync_every: int = 0) -> List[Dict[str, Any]]:
+    """
+    Convierte todos los PDFs de un directorio o patrón glob usando un pool de procesos.
+    
+    Args:
+        source: Directorio con PDFs o patrón glob
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        output_dir: Directorio de salida
+        workers: Número de procesos (por defecto, núcleos disponibles)
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_mb: Tamaño máximo de la caché en MB
+        streaming: Escribe cada .ics con IcsStreamWriter
+        metrics_path: Archivo donde guardar las métricas de todo el lote (JSON, o
+                      Prometheus si termina en .prom/.txt); sin él no se miden
+        incremental: Actualiza los .ics existentes en lugar de crear archivos nuevos
+        log_level: Nivel de los mensajes de cada proceso
+        log_file: Archivo JSON lines de los mensajes
+        backend: Forma de extraer el texto de los PDF ('text' o 'layout')
+        compact: Un solo evento por clase regular en lugar de uno por período
+        archive_path: Archivo .zip o .tar.gz donde se guardan todos los .ics (en
+                      lugar de `output_dir`), con un manifiesto de su contenido; no
+                      admite `incremental`, `naming` 'hash', `shard_depth` ni `fsync_every`
+        naming: Nombres de los archivos ('sequential' o 'hash', ver `OutputLayout`)
+        shard_depth: Niveles de subdirectorios del directorio de salida
+        fsync_every: Sincroniza con el disco los .ics escritos en grupos de este
+                     tamaño (0 = no sincronizar)
+        
+    Returns:
+        Lista con el resultado de cada conversión
+    """
+    pdf_paths = collect_pdf_paths(source)
+    if not pdf_paths:
+        print(f"No se encontraron archivos PDF en '{source}'")
+        return []
+
+    sink = None
+    if archive_path:
+        # Estas opciones se refieren a archivos en el disco; no aplican a las entradas del archivo
+        unsupported = [option for option, used in (('--incremental', incremental),
+                                                   ('--naming hash', naming != 'sequential'),
+                                                   ('--shard-depth', shard_depth),
+                                                   ('--fsync-every', fsync_every)) if used]
+        if unsupported:
+            print(f"Error: {', '.join(unsupported)} no se {'pueden' if len(unsupported) > 1 else 'puede'} "
+                  "usar con --archive")
+            return []
+        try:
+            sink = ArchiveSink(archive_path)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return []
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, workers or os.cpu_count() or 1)
+    fsync_batcher = FsyncBatcher(fsync_every)
+
+    if metrics_path:
+        METRICS.enabled = True
+
+    results = []
+    start = time.perf_counter()
+
+    # El archivo se cierra (con su manifiesto) aunque el lote se interrumpa
+    with sink if sink is not None else contextlib.nullcontext(), \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(convert_pdf_file, path, current_date, semester_start_date, output_dir,
+                            cache_dir, cache_max_mb * 1024 * 1024, streaming, metrics_path is not None,
+                            incremental, log_level, log_file, backend, compact, sink is not None,
+                            naming, shard_depth): path
+            for path in pdf_paths
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'file': futures[future], 'ok': False, 'output': None, 'error': str(e)}
+
+            if sink is not None and result['ok']:
+                entry = sink.add(result.pop('data'), result['entry'], result['file'], result['events'])
+                result['output'] = f"{archive_path}:{entry}"
+            elif result['ok']:
+                fsync_batcher.add(result['output'])
+
+            if 'metrics' in result:
+                METRICS.merge(result.pop('metrics'))
+
+            if result['ok']:
+                print(f"[OK] {result['file']} -> {result['output']}")
+            else:
+                print(f"[ERROR] {result['file']}: {result['error']}")
+            results.append(result)
+
+    if fsync_batcher.pending:
+        fsync_batcher.flush()
+
+    elapsed = time.perf_counter() - start
+    succeeded = sum(1 for result in results if result['ok'])
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+
+    print(f"\nConvertidos {succeeded}/{len(results)} archivos en {elapsed:.2f} s "
+          f"({rate:.1f} archivos/s, {workers} procesos)")
+
+    if cache_dir:
+        hits = sum(1 for result in results if result.get('cache_hit'))
+        print(f"Caché de análisis: {hits} aciertos, {len(results) - hits} fallos")
+
+    if metrics_path:
+        METRICS.observe('batch', elapsed)
+        METRICS.count('files', len(results))
+        METRICS.count('files_failed', len(results) - succeeded)
+        METRICS.save(metrics_path)
+        print(f"Métricas guardadas en: {metrics_path}")
+
+    return results
+
+def load_parsing(file_path: str, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024,
+                 backend: str = DEFAULT_PDF_BACKEND) -> Dict[str, Any]:
+    """
+    Analiza un PDF (usando la caché si se indica). Se ejecuta dentro de un proceso del pool.
+    
+    Args:
+        file_path: Ruta al archivo PDF
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_bytes: Tamaño máximo de la caché en bytes
+        backend: Forma de extraer el texto del PDF ('text' o 'layout')
+        
+    Returns:
+        Resultado de `parse_pdf`
+    """
+    set_log_source(file_path)
+    try:
+        return parse_pdf(file_path, get_parse_cache(cache_dir, cache_max_bytes), backend)
+    finally:
+        flush_logs()
+        set_log_source('')
+
+def iter_parsed_pdfs(pdf_paths: List[str], workers: Optional[int] = None, cache_dir: Optional[str] = None,
+                     cache_max_mb: int = DEFAULT_CACHE_MAX_MB,
+                     backend: str = DEFAULT_PDF_BACKEND) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Analiza varios PDFs en paralelo sin generar calendarios.
+    
+    Args:
+        pdf_paths: Rutas a los archivos PDF
+        workers: Número de procesos (por defecto, núcleos disponibles)
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_mb: Tamaño máximo de la caché en MB
+        backend: Forma de extraer el texto de los PDF ('text' o 'layout')
+        
+    Yields:
+        Tuplas (ruta, resultado de `parse_pdf`) en el mismo orden que `pdf_paths`
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    parse = functools.partial(load_parsing, cache_dir=cache_dir,
+                              cache_max_bytes=cache_max_mb * 1024 * 1024, backend=backend)
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(pdf_paths, executor.map(parse, pdf_paths, chunksize=8))
+
+# ============================================== #
+# SALIDA EN UN ARCHIVO COMPRIMIDO (ZIP O TAR.GZ) #
+# ============================================== #
+
+ARCHIVE_MANIFEST_NAME = 'manifest.csv'
+
+class ArchiveSink:
+    """
+    Guarda cada calendario del lote directamente como entrada de un archivo ZIP o
+    tar.gz conforme termina, sin crear un archivo .ics por horario en el disco.
+    
+    Al cerrarse añade `manifest.csv` con el PDF de origen, el nombre de la entrada
+    y el número de eventos de cada calendario.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Ruta del archivo (.zip, .tar.gz o .tgz)
+        """
+        lower_path = path.lower()
+        if lower_path.endswith('.zip'):
+            self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        elif lower_path.endswith(('.tar.gz', '.tgz')):
+            self.archive = tarfile.open(path, 'w:gz')
+        else:
+            raise ValueError(f"Formato de archivo no soportado: '{path}' (usa .zip, .tar.gz o .tgz)")
+        
+        self.path = path
+        self.names = set()
+        self.manifest = []
+
+    def __enter__(self) -> 'ArchiveSink':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add(self, data: bytes, name: str, source: str, events: int) -> str:
+        """
+        Añade un calendario al archivo.
+        
+        Args:
+            data: Contenido del .ics
+            name: Nombre sugerido de la entrada; si ya existe se añade un sufijo
+                  numérico, igual que con los archivos en disco
+            source: PDF de origen
+            events: Número de eventos del calendario
+            
+        Returns:
+            Nombre final de la entrada
+        """
+        base_name, extension = os.path.splitext(name)
+        counter = 1
+        while name in self.names:
+            name = f"{base_name}_{counter}{extension}"
+            counter += 1
+        self.names.add(name)
+        
+        self._write(name, data)
+        self.manifest.append((source, name, events))
+        logger.info("Horario completo guardado en: %s:%s", self.path, name)
+        return name
+
+    def close(self) -> None:
+        """Escribe el manifiesto y cierra el archivo."""
+        if self.archive is None:
+            return
+        
+        manifest = io.StringIO()
+        writer = csv.writer(manifest)
+        writer.writerow(('source', 'entry', 'events'))
+        writer.writerows(self.manifest)
+        self._write(ARCHIVE_MANIFEST_NAME, manifest.getvalue().encode('utf-8'))
+        
+        self.archive.close()
+        self.archive = None
+
+    def _write(self, name: str, data: bytes) -> None:
+        if isinstance(self.archive, zipfile.ZipFile):
+            self.archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self.archive.addfile(info, io.BytesIO(data))
+
+# ============================= #
+# MODO TUBERÍA (STDIN Y STDOUT) #
+# ============================= #
+
+def run_pipe(current_date: datetime, semester_start_date: datetime,
+             input_stream: BinaryIO, output_stream: BinaryIO, backend: str = DEFAULT_PDF_BACKEND,
+             compact: bool = False) -> bool:
+    """
+    Convierte un PDF leído de `input_stream` y escribe el calendario en `output_stream`.
+    
+    No crea archivos temporales: el PDF se abre en memoria. Los mensajes se
+    registran con `logger` (en la línea de comandos, en la salida de errores)
+    para no mezclarse con el .ics.
+    
+    Args:
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        input_stream: Flujo binario con el contenido del PDF
+        output_stream: Flujo binario donde se escribe el .ics
+        backend: Forma de extraer el texto del PDF ('text' o 'layout')
+        compact: Un solo evento por clase regular en lugar de uno por período
+        
+    Returns:
+        True si se generó el calendario
+    """
+    pdf_bytes = input_stream.read()
+    if not pdf_bytes:
+        print("Error: no se recibió ningún PDF en la entrada estándar", file=sys.stderr)
+        return False
+    
+    try:
+        ics_bytes, _, _, _ = convert_pdf_bytes(pdf_bytes, current_date, semester_start_date,
+                                               source='<stdin>', backend=backend, compact=compact)
+    except Exception as e:
+        logger.error("Error procesando PDF: %s", e)
+        return False
+    
+    if not ics_bytes:
+        print("Error: no se detectaron clases en el PDF", file=sys.stderr)
+        return False
+    
+    output_stream.write(ics_bytes)
+    output_stream.flush()
+    return True
+
+# =========================== #
+# SERVICIO HTTP DE CONVERSIÓN #
+# =========================== #
+
+HTTP_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    411: 'Length Required', 413: 'Payload Too Large', 422: 'Unprocessable Entity',
+    500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'
+}
+
+def convert_pdf_bytes(pdf_bytes: bytes, current_date: datetime, semester_start_date: datetime,
+                      collect_metrics: bool = False, source: str = '<memoria>',
+                      backend: str = DEFAULT_PDF_BACKEND,
+                      compact: bool = False) -> Tuple[bytes, str, str, Optional[Dict[str, Any]]]:
+    """
+    Convierte el contenido de un PDF a ICS sin tocar el sistema de archivos.
+    Se ejecuta dentro de un proceso del pool del servicio.
+    
+    Args:
+        pdf_bytes: Contenido del PDF
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        collect_metrics: Incluye en el resultado las métricas de esta conversión
+        source: Origen del PDF que se indica en los mensajes registrados
+        backend: Forma de extraer el texto del PDF ('text' o 'layout')
+        compact: Un solo evento por clase regular en lugar de uno por período
+        
+    Returns:
+        Tupla con (contenido_ics, fecha_proceso, carrera, métricas); el contenido
+        está vacío si no se detectaron clases y las métricas son None si no se pidieron
+    """
+    if collect_metrics:
+        METRICS.reset()
+        METRICS.enabled = True
+        try:
+            ics_bytes, process_date, career, _ = convert_pdf_bytes(pdf_bytes, current_date, semester_start_date,
+                                                                   source=source, backend=backend,
+                                                                   compact=compact)
+        finally:
+            METRICS.enabled = False
+        metrics = METRICS.to_dict()
+        METRICS.reset()
+        return ics_bytes, process_date, career, metrics
+
+    set_log_source(source)
+    try:
+        try:
+            parsed = parse_pdf_bytes(pdf_bytes, backend, strict=False)
+        except NoClassesFoundError:
+            return b'', '', '', None
+        
+        ics_bytes = render_calendar(parsed, current_date, semester_start_date, compact, strict=False)
+        return ics_bytes, parsed.process_date, parsed.career, None
+    finally:
+        flush_logs()
+        set_log_source('')
+
+class HttpError(Exception):
+    """Error que se responde al cliente con un código HTTP."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class ConversionServer:
+    """
+    Servicio HTTP asíncrono para convertir PDFs de horario a ICS.
+    
+    - POST /convert?current_date=DD-MM-YYYY&semester_start=DD-MM-YYYY con el PDF
+      como cuerpo; responde el archivo ICS.
+    - GET /health; responde el estado del servicio en JSON.
+    - GET /metrics; responde las métricas en formato Prometheus (si se activaron).
+    
+    La lectura del PDF se hace en un pool de procesos. Cuando hay
+    `max_concurrency` conversiones en curso las nuevas solicitudes reciben 503;
+    una conversión cuenta hasta que el pool la termina, aunque su solicitud ya
+    haya recibido 504. Si un proceso del pool muere, el pool se vuelve a crear.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 max_body_bytes: int = DEFAULT_MAX_BODY_MB * 1024 * 1024, metrics: bool = False):
+        """
+        Args:
+            workers: Procesos del pool de conversión (por defecto, núcleos disponibles)
+            max_concurrency: Conversiones simultáneas permitidas (por defecto, 2 × procesos)
+            timeout: Tiempo máximo por solicitud en segundos
+            max_body_bytes: Tamaño máximo del PDF recibido
+            metrics: Mide tiempos por etapa y contadores de cada conversión
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_concurrency = max(1, max_concurrency or 2 * self.workers)
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.metrics = metrics
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=reset_worker_signals)
+        self.pool_restarts = 0
+        self.pool_error = None
+        self.active = 0
+        self.received = 0
+        self.completed = 0
+        self.failed = 0
+        self.started_at = time.time()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atiende una conexión (una solicitud por conexión)."""
+        try:
+            try:
+                status, headers, body = await asyncio.wait_for(self.handle_request(reader), self.timeout)
+            except asyncio.TimeoutError:
+                status, headers, body = self.error_response(HttpError(504, "Tiempo de espera agotado"))
+            except HttpError as e:
+                status, headers, body = self.error_response(e)
+            except Exception as e:
+                status, headers, body = self.error_response(HttpError(500, f"Error interno: {str(e)}"))
+            
+            writer.write(self.build_response(status, headers, body))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Lee una solicitud HTTP y la atiende.
+        
+        Returns:
+            Tupla con (código, encabezados, cuerpo) de la respuesta
+        """
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            raise HttpError(400, "Solicitud HTTP inválida")
+        
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = request_line.split(' ', 2)
+        except ValueError:
+            raise HttpError(400, "Solicitud HTTP inválida")
+        
+        headers = {}
+        for header_line in header_lines:
+            if ':' in header_line:
+                name, value = header_line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        
+        url = urlsplit(target)
+        
+        if url.path == '/health':
+            if method != 'GET':
+                raise HttpError(405, "Usa GET para /health")
+            health = self.health()
+            status = 200 if health['status'] == 'ok' else 503
+            return status, {'Content-Type': 'application/json'}, json.dumps(health).encode('utf-8')
+        
+        if url.path == '/metrics':
+            if method != 'GET':
+                raise HttpError(405, "Usa GET para /metrics")
+            if not self.metrics:
+                raise HttpError(404, "Las métricas no están activadas (usa --metrics)")
+            return 200, {'Content-Type': 'text/plain; version=0.0.4'}, METRICS.to_prometheus().encode('utf-8')
+        
+        if url.path != '/convert':
+            raise HttpError(404, f"Ruta desconocida: {url.path}")
+        if method != 'POST':
+            raise HttpError(405, "Usa POST para /convert")
+        
+        query = parse_qs(url.query)
+        current_date = self.get_date_param(query, 'current_date')
+        semester_start_date = self.get_date_param(query, 'semester_start')
+        
+        pdf_bytes = await self.read_body(reader, headers)
+        
+        ics_bytes, process_date, career, _ = await self.convert(pdf_bytes, current_date, semester_start_date)
+        
+        filename = f"MiHorario_{process_date or 'Horario'}_{career or 'Horario'}.ics"
+        return 200, {
+            'Content-Type': 'text/calendar; charset=utf-8',
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        }, ics_bytes
+
+    async def read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        """Lee el cuerpo de la solicitud respetando el tamaño máximo."""
+        if 'content-length' not in headers:
+            raise HttpError(411, "Falta el encabezado Content-Length")
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            raise HttpError(400, "Content-Length inválido")
+        if length <= 0:
+            raise HttpError(400, "El cuerpo de la solicitud debe contener el PDF")
+        if length > self.max_body_bytes:
+            raise HttpError(413, f"El PDF excede el tamaño máximo de {self.max_body_bytes} bytes")
+        
+        try:
+            return await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise HttpError(400, "El cuerpo de la solicitud está incompleto")
+
+    async def convert(self, pdf_bytes: bytes, current_date: datetime,
+                      semester_start_date: datetime) -> Tuple[bytes, str, str, Optional[Dict[str, Any]]]:
+        """Convierte el PDF en el pool de procesos respetando el límite de concurrencia."""
+        if self.pool_error is not None:
+            raise HttpError(503, "El pool de conversión no está disponible")
+        if self.active >= self.max_concurrency:
+            raise HttpError(503, "El servicio está ocupado, intenta de nuevo más tarde")
+        
+        self.received += 1
+        source = f"http-{self.received}"
+        loop = asyncio.get_event_loop()
+        executor = self.executor
+        try:
+            future = executor.submit(convert_pdf_bytes, pdf_bytes, current_date, semester_start_date,
+                                     self.metrics, source)
+        except BrokenProcessPool as e:
+            self.restart_pool(executor, e)
+            raise HttpError(503, "El pool de conversión se reinició, intenta de nuevo")
+        
+        # El lugar se libera cuando el pool termina la conversión, no cuando se
+        # cancela la espera de la solicitud (por ejemplo, al agotarse el tiempo)
+        self.active += 1
+        future.add_done_callback(lambda _: self.call_in_loop(loop, self.release_slot))
+        try:
+            result = await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            self.failed += 1
+            METRICS.count('requests_failed')
+            self.restart_pool(executor, e)
+            raise HttpError(500, "Error interno al convertir el PDF")
+        except InvalidPdfError as e:
+            logger.warning("Solicitud %s: %s", source, e)
+            self.failed += 1
+            METRICS.count('requests_failed')
+            raise HttpError(422, str(e))
+        except Exception as e:
+            logger.error("Solicitud %s: error inesperado: %s", source, e)
+            self.failed += 1
+            METRICS.count('requests_failed')
+            raise HttpError(500, "Error interno al convertir el PDF")
+        
+        if result[3]:
+            METRICS.merge(result[3])
+        
+        if not result[0]:
+            self.failed += 1
+            METRICS.count('requests_failed')
+            raise HttpError(422, "No se detectaron clases en el PDF")
+        
+        self.completed += 1
+        METRICS.count('requests')
+        return result
+
+    def release_slot(self) -> None:
+        """Libera el lugar de una conversión que el pool ya terminó."""
+        self.active -= 1
+
+    @staticmethod
+    def call_in_loop(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]) -> None:
+        """Ejecuta `callback` en el ciclo de eventos desde el hilo del pool."""
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass  # El ciclo ya se cerró al detener el servicio
+
+    def restart_pool(self, broken: ProcessPoolExecutor, error: Exception) -> None:
+        """
+        Reemplaza el pool de procesos después de que uno de sus procesos murió.
+        
+        Args:
+            broken: Pool que falló (si ya se reemplazó, no se hace nada)
+            error: Error que reportó el pool
+        """
+        if broken is not self.executor:
+            return
+        
+        logger.error("El pool de conversión falló (%s); se vuelve a crear", error)
+        broken.shutdown(wait=False)
+        try:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=reset_worker_signals)
+        except Exception as e:
+            logger.error("No se pudo volver a crear el pool de conversión: %s", e)
+            self.pool_error = str(e)
+            return
+        self.pool_restarts += 1
+        METRICS.count('pool_restarts')
+
+    def health(self) -> Dict[str, Any]:
+        """Estado actual del servicio."""
+        return {
+            'status': 'ok' if self.pool_error is None else 'unavailable',
+            'workers': self.workers,
+            'pool_restarts': self.pool_restarts,
+            'active': self.active,
+            'max_concurrency': self.max_concurrency,
+            'completed': self.completed,
+            'failed': self.failed,
+            'uptime_s': round(time.time() - self.started_at, 1)
+        }
+
+    @staticmethod
+    def get_date_param(query: Dict[str, List[str]], name: str) -> datetime:
+        """Obtiene un parámetro de fecha DD-MM-YYYY de la URL."""
+        values = query.get(name)
+        if not values:
+            raise HttpError(400, f"Falta el parámetro '{name}' (DD-MM-YYYY)")
+        try:
+            return datetime.strptime(values[0].strip(), "%d-%m-%Y")
+        except ValueError:
+            raise HttpError(400, f"Fecha inválida en '{name}'. Usa el formato DD-MM-YYYY.")
+
+    @staticmethod
+    def error_response(error: HttpError) -> Tuple[int, Dict[str, str], bytes]:
+        """Respuesta JSON para un error."""
+        body = json.dumps({'error': error.message}, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json; charset=utf-8'}
+        if error.status == 503:
+            headers['Retry-After'] = '1'
+        return error.status, headers, body
+
+    @staticmethod
+    def build_response(status: int, headers: Dict[str, str], body: bytes) -> bytes:
+        """Construye los bytes de una respuesta HTTP/1.1."""
+        lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: close")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+    def shutdown(self) -> None:
+        """Detiene el pool de procesos."""
+        self.executor.shutdown(wait=True)
+
+def run_server(host: str, port: int, workers: Optional[int] = None, max_concurrency: Optional[int] = None,
+               timeout: float = DEFAULT_REQUEST_TIMEOUT,
+               max_body_bytes: int = DEFAULT_MAX_BODY_MB * 1024 * 1024, metrics: bool = False) -> None:
+    """
+    Inicia el servicio HTTP de conversión hasta que se interrumpa con Ctrl+C o SIGTERM.
+    
+    Args:
+        host: Dirección en la que escucha el servicio
+        port: Puerto del servicio
+        workers: Procesos del pool de conversión
+        max_concurrency: Conversiones simultáneas permitidas
+        timeout: Tiempo máximo por solicitud en segundos
+        max_body_bytes: Tamaño máximo del PDF recibido
+        metrics: Mide tiempos por etapa y contadores, publicados en GET /metrics
+    """
+    METRICS.enabled = metrics
+    conversion_server = ConversionServer(workers, max_concurrency, timeout, max_body_bytes, metrics)
+    
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = loop.run_until_complete(
+        asyncio.start_server(conversion_server.handle_connection, host, port)
+    )
+    print(f"Servicio de conversión escuchando en http://{host}:{port} "
+          f"({conversion_server.workers} procesos, {conversion_server.max_concurrency} conversiones simultáneas)")
+    
+    def stop() -> None:
+        print("Deteniendo el servicio...")
+        loop.stop()
+    
+    # SIGTERM (systemd, docker stop) sigue el mismo camino que Ctrl+C
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stop)
+    except NotImplementedError:
+        pass  # Windows no admite manejadores de señales en el ciclo de eventos
+    
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        print("Deteniendo el servicio...")
+    finally:
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        conversion_server.shutdown()
+        loop.close()
+
+# ============================== #
+# ÍNDICE DE OCUPACIÓN DE SALONES #
+# ============================== #
+
+class RoomMeeting(NamedTuple):
+    """Una sesión semanal de una sección en un salón."""
+    start_minute: int
+    end_minute: int
+    start_date: date
+    end_date: date
+    crn: str
+    subject_code: str
+    subject: str
+
+def time_to_minutes(value: dt_time) -> int:
+    """Minutos transcurridos desde la medianoche."""
+    return value.hour * 60 + value.minute
+
+def minutes_to_text(minutes: int) -> str:
+    """Da formato HH:MM a un número de minutos desde la medianoche."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def split_location(location: str) -> Tuple[str, str]:
+    """
+    Separa una ubicación 'Edificio | Salón' en sus partes.
+    
+    Returns:
+        Tupla (edificio, salón); el salón está vacío si no hay separador
+    """
+    building, _, room = location.partition('|')
+    return building.strip(), room.strip()
+
+class RoomOccupancyIndex:
+    """
+    Índice de ocupación de salones construido a partir de muchos horarios.
+    
+    Las sesiones se guardan por (salón, día de la semana) en listas ordenadas por
+    hora de inicio; las consultas usan bisect, por lo que solo revisan las sesiones
+    que pueden traslaparse con el intervalo pedido. Las secciones repetidas (el
+    mismo CRN en el horario de varios alumnos) se guardan una sola vez.
+    """
+
+    def __init__(self):
+        self.meetings = {}
+        self.buildings = {}
+        self.sections = set()
+        self.records = 0
+        self._starts = {}
+        self._max_duration = {}
+        self._dirty = False
+
+    def add_parsing(self, parsing: Dict[str, Any]) -> None:
+        """Añade todas las clases de un resultado de `parse_pdf`."""
+        for record in parsing['schedule_data']:
+            self.add_record(record)
+
+    def add_record(self, record: ClassRecord) -> None:
+        """Añade las sesiones semanales de una clase (si no se añadieron antes)."""
+        self.records += 1
+        location = ' '.join(record.location.split())
+        if not location:
+            return
+        
+        section = (record.crn, record.subject_code, location, record.days_mask,
+                   record.start_time, record.end_time, record.start_date, record.end_date)
+        if section in self.sections:
+            return
+        self.sections.add(section)
+        
+        meeting = RoomMeeting(time_to_minutes(record.start_time), time_to_minutes(record.end_time),
+                              record.start_date, record.end_date, record.crn,
+                              record.subject_code, record.subject)
+        for weekday in WEEKDAYS_BY_MASK[record.days_mask]:
+            self.meetings.setdefault((location, weekday), []).append(meeting)
+        
+        building, _ = split_location(location)
+        self.buildings.setdefault(building.lower(), set()).add(location)
+        self._dirty = True
+
+    def build(self) -> None:
+        """Ordena las sesiones; se llama automáticamente antes de cada consulta."""
+        if not self._dirty:
+            return
+        for key, meetings in self.meetings.items():
+            meetings.sort()
+            self._starts[key] = [meeting.start_minute for meeting in meetings]
+            self._max_duration[key] = max(meeting.end_minute - meeting.start_minute for meeting in meetings)
+        self._dirty = False
+
+    @property
+    def rooms(self) -> List[str]:
+        """Salones con al menos una sesión."""
+        return sorted({location for location, _ in self.meetings})
+
+    def busy(self, room: str, weekday: int, start_minute: int, end_minute: int,
+             date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[RoomMeeting]:
+        """
+        Sesiones de un salón que se traslapan con un intervalo.
+        
+        Args:
+            room: Ubicación completa del salón ('Edificio | Salón')
+            weekday: Día de la semana (0 = lunes)
+            start_minute: Inicio del intervalo en minutos desde la medianoche
+            end_minute: Fin del intervalo en minutos desde la medianoche
+            date_from: Primera fecha considerada (opcional)
+            date_to: Última fecha considerada (opcional)
+            
+        Returns:
+            Sesiones que ocupan el salón en ese intervalo
+        """
+        self.build()
+        key = (' '.join(room.split()), weekday)
+        meetings = self.meetings.get(key)
+        if not meetings:
+            return []
+        
+        starts = self._starts[key]
+        first = bisect.bisect_left(starts, start_minute - self._max_duration[key])
+        last = bisect.bisect_left(starts, end_minute)
+        
+        return [
+            meeting for meeting in meetings[first:last]
+            if meeting.end_minute > start_minute
+            and (date_to is None or meeting.start_date <= date_to)
+            and (date_from is None or meeting.end_date >= date_from)
+        ]
+
+    def is_free(self, room: str, weekday: int, start_minute: int, end_minute: int,
+                date_from: Optional[date] = None, date_to: Optional[date] = None) -> bool:
+        """Indica si un salón está libre en un intervalo (ver `busy`)."""
+        return not self.busy(room, weekday, start_minute, end_minute, date_from, date_to)
+
+    def free_rooms(self, building: str, weekday: int, start_minute: int, end_minute: int,
+                   date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[str]:
+        """
+        Salones de un edificio libres en un intervalo.
+        
+        Solo se conocen los salones que aparecen en algún horario ingresado.
+        
+        Args:
+            building: Nombre del edificio (parte antes de '|', sin distinguir mayúsculas)
+            weekday: Día de la semana (0 = lunes)
+            start_minute: Inicio del intervalo en minutos desde la medianoche
+            end_minute: Fin del intervalo en minutos desde la medianoche
+            date_from: Primera fecha considerada (opcional)
+            date_to: Última fecha considerada (opcional)
+            
+        Returns:
+            Ubicaciones de los salones libres, ordenadas
+        """
+        rooms = self.buildings.get(' '.join(building.split()).lower(), ())
+        return sorted(room for room in rooms
+                      if self.is_free(room, weekday, start_minute, end_minute, date_from, date_to))
+
+    def room_schedule(self, room: str, weekday: int, date_from: Optional[date] = None,
+                      date_to: Optional[date] = None) -> List[RoomMeeting]:
+        """Sesiones de un salón en un día de la semana, ordenadas por hora de inicio."""
+        return self.busy(room, weekday, 0, 24 * 60, date_from, date_to)
+
+    def occupied_minutes(self, room: str, weekday: int, date_from: Optional[date] = None,
+                         date_to: Optional[date] = None) -> int:
+        """Minutos del día en que el salón está ocupado (uniendo sesiones traslapadas)."""
+        total = 0
+        current_start = current_end = None
+        for meeting in self.room_schedule(room, weekday, date_from, date_to):
+            if current_end is None or meeting.start_minute > current_end:
+                if current_end is not None:
+                    total += current_end - current_start
+                current_start, current_end = meeting.start_minute, meeting.end_minute
+            else:
+                current_end = max(current_end, meeting.end_minute)
+        if current_end is not None:
+            total += current_end - current_start
+        return total
+
+def build_room_index(pdf_paths: List[str], workers: Optional[int] = None, cache_dir: Optional[str] = None,
+                     cache_max_mb: int = DEFAULT_CACHE_MAX_MB,
+                     backend: str = DEFAULT_PDF_BACKEND) -> RoomOccupancyIndex:
+    """
+    Construye el índice de ocupación a partir de varios PDFs analizados en paralelo.
+    
+    Args:
+        pdf_paths: Rutas a los archivos PDF
+        workers: Número de procesos (por defecto, núcleos disponibles)
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_mb: Tamaño máximo de la caché en MB
+        backend: Forma de extraer el texto de los PDF ('text' o 'layout')
+        
+    Returns:
+        Índice con las sesiones de todos los horarios
+    """
+    index = RoomOccupancyIndex()
+    for _, parsing in iter_parsed_pdfs(pdf_paths, workers, cache_dir, cache_max_mb, backend):
+        index.add_parsing(parsing)
+    index.build()
+    return index
+
+def run_rooms(source: str, semester_start_date: Optional[datetime] = None, period: Optional[int] = None,
+              building: Optional[str] = None, room: Optional[str] = None, day: Optional[str] = None,
+              start_text: Optional[str] = None, end_text: Optional[str] = None,
+              workers: Optional[int] = None, cache_dir: Optional[str] = None,
+              cache_max_mb: int = DEFAULT_CACHE_MAX_MB, backend: str = DEFAULT_PDF_BACKEND) -> None:
+    """
+    Construye el índice de ocupación y responde la consulta indicada.
+    
+    Con `room` muestra la ocupación de ese salón; con `building`, `day`,
+    `start_text` y `end_text` lista los salones libres del edificio.
+    
+    Args:
+        source: Directorio con PDFs o patrón glob
+        semester_start_date: Fecha de inicio del semestre (necesaria con `period`)
+        period: Período (desde 1) al que se limita la consulta
+        building: Edificio donde se buscan salones libres
+        room: Salón cuya ocupación se muestra
+        day: Día de la semana ('Lun', 'Mar', ...)
+        start_text: Hora de inicio del intervalo (HH:MM)
+        end_text: Hora de fin del intervalo (HH:MM)
+        workers: Número de procesos (por defecto, núcleos disponibles)
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_mb: Tamaño máximo de la caché en MB
+        backend: Forma de extraer el texto de los PDF ('text' o 'layout')
+    """
+    pdf_paths = collect_pdf_paths(source)
+    if not pdf_paths:
+        print(f"No se encontraron archivos PDF en '{source}'")
+        return
+    
+    start = time.perf_counter()
+    index = build_room_index(pdf_paths, workers, cache_dir, cache_max_mb, backend)
+    print(f"Índice construido en {time.perf_counter() - start:.2f} s: {len(pdf_paths)} PDF, "
+          f"{index.records} clases, {len(index.sections)} secciones únicas, {len(index.rooms)} salones")
+    
+    date_from = date_to = None
+    if period:
+        if semester_start_date is None:
+            print("Indica --semester-start para consultar por período")
+            return
+        periods = calculate_academic_periods(semester_start_date)
+        if not 1 <= period <= len(periods):
+            print(f"El semestre tiene {len(periods)} período(s); no existe el período {period}")
+            return
+        period_dates = periods[period - 1]
+        date_from, date_to = period_dates['start'], period_dates['end']
+    
+    weekday = DAYS_MAPPING[day.capitalize()] if day else None
+    
+    if room:
+        for query_day in ([weekday] if weekday is not None else range(7)):
+            schedule = index.room_schedule(room, query_day, date_from, date_to)
+            if not schedule:
+                continue
+            print(f"\n{room} - {DAY_NAMES[query_day]} "
+                  f"({index.occupied_minutes(room, query_day, date_from, date_to) / 60:.1f} h ocupado)")
+            for meeting in schedule:
+                print(f"  {minutes_to_text(meeting.start_minute)}-{minutes_to_text(meeting.end_minute)} "
+                      f"{meeting.subject} ({meeting.subject_code}) CRN {meeting.crn} "
+                      f"[{meeting.start_date.strftime('%d/%m/%Y')} - {meeting.end_date.strftime('%d/%m/%Y')}]")
+        return
+    
+    if building:
+        if weekday is None or not start_text or not end_text:
+            print("Indica --day, --start y --end para buscar salones libres")
+            return
+        start_minute = time_to_minutes(parse_time(start_text))
+        end_minute = time_to_minutes(parse_time(end_text))
+        
+        query_start = time.perf_counter()
+        free = index.free_rooms(building, weekday, start_minute, end_minute, date_from, date_to)
+        elapsed_us = (time.perf_counter() - query_start) * 1e6
+        
+        print(f"Salones libres en '{building}' el {DAY_NAMES[weekday]} {start_text}-{end_text}: "
+              f"{len(free)} ({elapsed_us:.0f} µs)")
+        for free_room in free:
+            print(f"  {free_room}")
 
-        save_master_ics(master_cal, process_date, campus, career)
-        print("Proceso completado correctamente.")
+# ================================= #
+# DETECCIÓN DE TRASLAPES DE HORARIO #
+# ================================= #
 
-    except Exception as e:
-        print(f"Error crítico: {str(e)}")
+class ScheduleConflict(NamedTuple):
+    """Traslape entre dos clases del mismo horario."""
+    first: ClassRecord
+    second: ClassRecord
+    weekday: int
+    start_minute: int
+    end_minute: int
+    date_from: date
+    date_to: date
 
-def create_master_calendar(tz: pytz.timezone) -> Calendar:
-    """Crea un calendario maestro vacío."""
-    master_cal = Calendar()
-    master_cal.add('prodid', '-//Mi Horario Completo//mx')
-    master_cal.add('version', '2.0')
-    master_cal.add('X-WR-TIMEZONE', tz.zone)
-    return master_cal
+    def describe(self) -> str:
+        """Descripción del traslape para reportes."""
+        return (f"{DAY_NAMES[self.weekday]} {minutes_to_text(self.start_minute)}-{minutes_to_text(self.end_minute)} "
+                f"del {self.date_from.strftime('%d/%m/%Y')} al {self.date_to.strftime('%d/%m/%Y')}: "
+                f"{self.first.subject} ({self.first.subject_code}) y "
+                f"{self.second.subject} ({self.second.subject_code})")
 
-def calculate_academic_periods(semester_start_date: datetime) -> List[Dict[str, date]]:
+def iter_class_meetings(schedule_data: List[ClassRecord],
+                        periods: PeriodTable) -> Iterator[Tuple[int, int, int, date, date, int]]:
+    """
+    Genera las sesiones semanales de cada clase recortadas a sus fechas reales.
+    
+    Las clases regulares solo se imparten dentro de los períodos académicos (igual
+    que en el calendario); las clases especiales, en su propio rango de fechas.
+    
+    Args:
+        schedule_data: Clases del horario
+        periods: Tabla de períodos (ver `get_period_table`)
+        
+    Yields:
+        Tuplas (día, minuto_inicio, minuto_fin, fecha_inicio, fecha_fin, índice_de_clase)
+    """
+    for idx, record in enumerate(schedule_data):
+        start_minute = time_to_minutes(record.start_time)
+        end_minute = time_to_minutes(record.end_time)
+        
+        if record.is_special_class:
+            ranges = [(record.start_date, record.end_date)]
+        else:
+            ranges = [(date_from, date_to) for _, date_from, date_to
+                      in periods.clip(record.start_date, record.end_date)]
+        
+        for date_from, date_to in ranges:
+            if date_from > date_to:
+                continue
+            for weekday in WEEKDAYS_BY_MASK[record.days_mask]:
+                yield weekday, start_minute, end_minute, date_from, date_to, idx
+
+def find_schedule_conflicts(schedule_data: List[ClassRecord],
+                            semester_start_date: datetime) -> List[ScheduleConflict]:
     """
-    Calcula los períodos académicos basados en la fecha de inicio del semestre.
+    Encuentra todos los traslapes entre las clases de un horario.
+    
+    Las sesiones se ordenan por día y hora de inicio y se recorren con una línea
+    de barrido. Las sesiones activas están en un heap por hora de fin para cada
+    rango de fechas (un período o las fechas de una clase especial): las que ya
+    terminaron se retiran de su cima y cada sesión solo revisa los heaps de los
+    rangos que coinciden con sus fechas, donde toda sesión activa es un traslape.
+    Con R rangos distintos el costo es O(n log n + n·R + traslapes).
     
     Args:
+        schedule_data: Clases del horario (resultado de `parse_pdf`)
         semester_start_date: Fecha de inicio del semestre
         
     Returns:
-        Lista de diccionarios con fechas de inicio y fin de cada período
+        Traslapes encontrados, ordenados por día y hora
     """
-    is_spring = semester_start_date.month == 2
+    meetings = sorted(iter_class_meetings(schedule_data, get_period_table(semester_start_date)))
     
-    start_date = semester_start_date.date()
+    conflicts = []
+    active = {}  # (fecha inicial, fecha final) -> heap de (fin, inicio, fecha inicial, fecha final, índice)
+    current_weekday = None
     
-    if is_spring:
-        # Semestre FJ (febrero-junio)
-        period1_start = start_date
-        period1_end = period1_start + timedelta(weeks=5) - timedelta(days=1)
-        period2_start = period1_end + timedelta(days=8)
-        period2_end = period2_start + timedelta(weeks=6) - timedelta(days=1)
-        period3_start = period2_end + timedelta(days=8)
-        period3_end = period3_start + timedelta(weeks=5) - timedelta(days=1)
-    else:
-        # Semestre AD (agosto-diciembre)
-        period1_start = start_date
-        period1_end = period1_start + timedelta(weeks=5) - timedelta(days=1)
-        period2_start = period1_end + timedelta(days=8)
-        period2_end = period2_start + timedelta(weeks=5) - timedelta(days=1)
-        period3_start = period2_end + timedelta(days=8)
-        period3_end = period3_start + timedelta(weeks=5) - timedelta(days=1)
-
-    return [
-        {'start': period1_start, 'end': period1_end},
-        {'start': period2_start, 'end': period2_end},
-        {'start': period3_start, 'end': period3_end}
-    ]
+    for weekday, start_minute, end_minute, date_from, date_to, idx in meetings:
+        if weekday != current_weekday:
+            active = {}
+            current_weekday = weekday
+        
+        overlapping = []
+        for (other_from, other_to), heap in active.items():
+            while heap and heap[0][0] <= start_minute:
+                heapq.heappop(heap)
+            if other_from <= date_to and date_from <= other_to:
+                overlapping.extend(entry for entry in heap if entry[4] != idx)
+        if len(overlapping) > 1:
+            # En el orden en que iniciaron, como en el recorrido de `meetings`
+            overlapping.sort(key=lambda entry: (entry[1], entry[0]) + entry[2:])
+        for other_end, _, other_from, other_to, other_idx in overlapping:
+            conflicts.append(ScheduleConflict(
+                schedule_data[other_idx], schedule_data[idx], weekday,
+                start_minute, min(end_minute, other_end),
+                max(date_from, other_from), min(date_to, other_to)
+            ))
+        
+        heapq.heappush(active.setdefault((date_from, date_to), []),
+                       (end_minute, start_minute, date_from, date_to, idx))
+    
+    return conflicts
 
-def process_special_class(student: Dict[str, Any], master_cal: Calendar, tz: pytz.timezone, current_date: datetime) -> None:
+def run_conflicts(source: str, semester_start_date: datetime, workers: Optional[int] = None,
+                  cache_dir: Optional[str] = None, cache_max_mb: int = DEFAULT_CACHE_MAX_MB,
+                  backend: str = DEFAULT_PDF_BACKEND) -> Dict[str, List[ScheduleConflict]]:
     """
-    Procesa una clase especial y la añade al calendario.
+    Revisa los traslapes de uno o varios PDF e imprime un reporte.
     
     Args:
-        student: Información de la materia
-        master_cal: Calendario maestro
-        tz: Zona horaria
-        current_date: Fecha actual
+        source: Archivo PDF, directorio con PDFs o patrón glob
+        semester_start_date: Fecha de inicio del semestre
+        workers: Número de procesos (por defecto, núcleos disponibles)
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_mb: Tamaño máximo de la caché en MB
+        backend: Forma de extraer el texto de los PDF ('text' o 'layout')
+        
+    Returns:
+        Diccionario ruta -> traslapes de cada PDF con traslapes
     """
-    start_time = student["start_time"]
-    end_time = student["end_time"]
-    
-    event = Event()
-    event.add('summary', f"{student['subject']} ({student['subject_code']}) ")
-    event.add('location', vText(student["location"]))
+    pdf_paths = collect_pdf_paths(source)
+    if not pdf_paths:
+        print(f"No se encontraron archivos PDF en '{source}'")
+        return {}
     
-    start_dt = datetime.strptime(start_time, "%H:%M").time()
-    end_dt = datetime.strptime(end_time, "%H:%M").time()
+    report = {}
+    for path, parsing in iter_parsed_pdfs(pdf_paths, workers, cache_dir, cache_max_mb, backend):
+        if not parsing['schedule_data']:
+            print(f"[ERROR] {path}: No se detectaron clases en el PDF")
+            continue
+        
+        conflicts = find_schedule_conflicts(parsing['schedule_data'], semester_start_date)
+        if not conflicts:
+            print(f"[OK] {path}: sin traslapes")
+            continue
+        
+        report[path] = conflicts
+        print(f"[TRASLAPE] {path}: {len(conflicts)} traslapes")
+        for conflict in conflicts:
+            print(f"  {conflict.describe()}")
     
-    class_start = find_first_class_day(student["start_date"].date(), student["days"])
-
-    if class_start < current_date.date():
-        class_start = find_next_class_day(current_date.date(), student["days"])
-
-    event.add('dtstart', tz.localize(datetime.combine(class_start, start_dt)))
-    event.add('dtend', tz.localize(datetime.combine(class_start, end_dt)))
+    print(f"\nHorarios con traslapes: {len(report)}/{len(pdf_paths)}")
+    return report
 
-    description = create_event_description(student, start_time, end_time)
-    event.add('description', vText(description))
+# ==================================== #
+# EXPANSIÓN VECTORIZADA DE OCURRENCIAS #
+# ==================================== #
 
-    exclusions = calculate_exclusions(class_start, student["end_date"].date())
-    add_exclusions_to_event(event, exclusions, tz, student['subject'])
+# Ordinal del 01/01/1970 (jueves); los días se manejan como días desde esa fecha
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+EPOCH_WEEKDAY = 3
 
-    if (student["end_date"].date() - class_start).days > 0:
-        add_recurrence_rule(event, student["days"], student["end_date"].date(), tz)
-
-    master_cal.add_component(event)
-    print(f"Materia {student['subject']} añadida al calendario")
-
-def process_regular_class(student: Dict[str, Any], periods: List[Dict[str, date]], master_cal: Calendar, 
-                         tz: pytz.timezone, current_date: datetime) -> None:
+class OccurrenceTable:
     """
-    Procesa una clase regular por períodos y la añade al calendario.
+    Todas las clases concretas (ocurrencias) de uno o varios horarios.
     
-    Args:
-        student: Información de la materia
-        periods: Lista de períodos académicos
-        master_cal: Calendario maestro
-        tz: Zona horaria
-        current_date: Fecha actual
+    Cada ocurrencia es una fila de los arreglos `start`, `end` (datetime64[m] en
+    hora local, como la muestran los clientes de calendario) y `event` (índice del
+    evento al que pertenece); los datos de cada evento están en `event_student` y
+    `event_location`, que indexan las listas `students` y `locations`.
     """
-    for idx, period in enumerate(periods, 1):
-        class_start = max(student["start_date"].date(), period['start'])
-        class_end = min(student["end_date"].date(), period['end'])
-        
-        if class_end < current_date.date():
-            print(f"Período {idx} de {student['subject']} omitido (finalizado)")
-            continue
-
-        if class_start <= class_end:
-            start_time = student["start_time"]
-            end_time = student["end_time"]
-            
-            event = Event()
-            event.add('summary', f"{student['subject']} ({student['subject_code']})")
-            event.add('location', vText(student["location"]))
-            
-            start_dt = datetime.strptime(start_time, "%H:%M").time()
-            end_dt = datetime.strptime(end_time, "%H:%M").time()
-            
-            current_start = find_first_class_day(class_start, student["days"])
 
-            if current_start < current_date.date():
-                current_start = find_next_class_day(current_date.date(), student["days"])
+    def __init__(self, start: 'np.ndarray', end: 'np.ndarray', event: 'np.ndarray',
+                 event_student: 'np.ndarray', event_location: 'np.ndarray',
+                 students: List[str], locations: List[str]):
+        self.start = start
+        self.end = end
+        self.event = event
+        self.event_student = event_student
+        self.event_location = event_location
+        self.students = students
+        self.locations = locations
 
-            event.add('dtstart', tz.localize(datetime.combine(current_start, start_dt)))
-            event.add('dtend', tz.localize(datetime.combine(current_start, end_dt)))
+    def __len__(self) -> int:
+        return len(self.start)
 
-            description = create_event_description(student, start_time, end_time)
-            event.add('description', vText(description))
+    def counts_by_student(self) -> Dict[str, int]:
+        """Número de clases de cada horario."""
+        return self._count(self.event_student[self.event], self.students)
 
-            exclusions = calculate_exclusions(current_start, class_end)
-            add_exclusions_to_event(event, exclusions, tz, f"{student['subject']} P{idx}")
+    def counts_by_room(self) -> Dict[str, int]:
+        """Número de clases en cada ubicación."""
+        return self._count(self.event_location[self.event], self.locations)
 
-            if (class_end - current_start).days > 0:
-                add_recurrence_rule(event, student["days"], class_end, tz)
+    def counts_by_week(self) -> Dict[date, int]:
+        """Número de clases de cada semana (indexada por su lunes)."""
+        days = self.start.astype('datetime64[D]').astype(np.int64)
+        mondays = days - (days + EPOCH_WEEKDAY) % 7
+        weeks, counts = np.unique(mondays, return_counts=True)
+        return {date.fromordinal(int(week) + EPOCH_ORDINAL): int(count)
+                for week, count in zip(weeks, counts)}
 
-            master_cal.add_component(event)
-            print(f"Materia {student['subject']} (Período {idx}) añadida al calendario")
+    def _count(self, keys: 'np.ndarray', names: List[str]) -> Dict[str, int]:
+        counts = np.bincount(keys, minlength=len(names))
+        return {name: int(count) for name, count in zip(names, counts) if count}
 
-def find_first_class_day(start_date: date, days: List[str]) -> date:
+def expand_occurrences(events: Iterable[Tuple[str, Dict[str, Any]]]) -> OccurrenceTable:
     """
-    Encuentra el primer día de clase basado en la fecha de inicio y los días de la semana.
+    Expande eventos (DTSTART, RRULE semanal y EXDATE) en sus ocurrencias concretas.
+    
+    Se siguen las reglas de RFC 5545 que aplican a los eventos generados: DTSTART
+    siempre es una ocurrencia, la regla repite cada semana los días de BYDAY hasta
+    UNTIL (excluido) y cada EXDATE elimina la clase de ese día. Todas las fechas de
+    todos los eventos se generan juntas con NumPy y se filtran con máscaras.
     
     Args:
-        start_date: Fecha de inicio
-        days: Lista de días de la semana
+        events: Pares (horario de origen, datos del evento de `iter_calendar_events`)
         
     Returns:
-        Fecha del primer día de clase
+        Tabla con todas las ocurrencias
     """
-    class_days = sorted([DAYS_MAPPING[day] for day in days])
-    first_day = class_days[0]
+    if np is None:
+        raise RuntimeError("La expansión de ocurrencias requiere NumPy (pip install numpy)")
+    
+    students = {}
+    locations = {}
+    first_days, last_days, masks, start_minutes, durations = [], [], [], [], []
+    event_student, event_location = [], []
+    excluded_events, excluded_days = [], []
+    
+    for idx, (student, event_data) in enumerate(events):
+        dtstart = event_data['dtstart']
+        rrule = event_data['rrule']
+        first_day = dtstart.date().toordinal() - EPOCH_ORDINAL
+        
+        if rrule:
+            until = rrule['until'].replace(tzinfo=None) - timedelta(minutes=1)
+            last_day = max(until.date().toordinal() - EPOCH_ORDINAL, first_day)
+            mask = sum(1 << DAY_CODES.index(code) for code in rrule['byday'])
+        else:
+            last_day = first_day
+            mask = 0
+        
+        first_days.append(first_day)
+        last_days.append(last_day)
+        masks.append(mask)
+        start_minutes.append(time_to_minutes(dtstart.time()))
+        durations.append(int((event_data['dtend'] - dtstart).total_seconds()) // 60)
+        event_student.append(students.setdefault(student, len(students)))
+        event_location.append(locations.setdefault(event_data['location'], len(locations)))
+        
+        for exdate in event_data['exdate']:
+            excluded_events.append(idx)
+            excluded_days.append(exdate.date().toordinal() - EPOCH_ORDINAL)
+    
+    first_days = np.array(first_days, dtype=np.int64)
+    lengths = np.array(last_days, dtype=np.int64) - first_days + 1
+    
+    # Un día por fila para cada evento, desde DTSTART hasta el último día de la regla
+    event = np.repeat(np.arange(len(first_days)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    days = first_days[event] + offsets
     
-    current_date = start_date
-    while current_date.weekday() != first_day:
-        current_date += timedelta(days=1)
+    weekdays = (days + EPOCH_WEEKDAY) % 7
+    keep = ((np.array(masks, dtype=np.int64)[event] >> weekdays) & 1).astype(bool) | (offsets == 0)
     
-    return current_date
+    if excluded_days:
+        excluded = (np.array(excluded_events, dtype=np.int64) << 32) | np.array(excluded_days, dtype=np.int64)
+        keep &= ~np.isin((event.astype(np.int64) << 32) | days, excluded)
+    
+    event = event[keep]
+    minutes = days[keep] * 1440 + np.array(start_minutes, dtype=np.int64)[event]
+    start = minutes.astype('datetime64[m]')
+    end = (minutes + np.array(durations, dtype=np.int64)[event]).astype('datetime64[m]')
+    
+    return OccurrenceTable(start, end, event,
+                           np.array(event_student, dtype=np.int64),
+                           np.array(event_location, dtype=np.int64),
+                           list(students), list(locations))
 
-def find_next_class_day(current_date: date, days: List[str]) -> date:
+def build_occurrence_table(parsings: Iterable[Tuple[str, Dict[str, Any]]], current_date: datetime,
+                           semester_start_date: datetime) -> OccurrenceTable:
     """
-    Encuentra el próximo día de clase a partir de una fecha.
+    Genera las ocurrencias de varios horarios sin crear archivos .ics.
     
     Args:
+        parsings: Pares (nombre del horario, resultado del análisis del PDF)
         current_date: Fecha actual
-        days: Lista de días de la semana
+        semester_start_date: Fecha de inicio del semestre
         
     Returns:
-        Fecha del próximo día de clase
+        Tabla con las ocurrencias de todos los horarios
     """
-    current_weekday = current_date.weekday()
-    class_days = sorted([DAYS_MAPPING[day] for day in days])
-    
-    next_class_day = None
-    for day in class_days:
-        if day >= current_weekday:
-            next_class_day = day
-            break
+    tz = pytz.timezone(TIMEZONE)
     
-    if next_class_day is not None:
-        days_until_next = (next_class_day - current_weekday) % 7
-    else:
-        days_until_next = 7 - current_weekday + class_days[0]
+    def iter_events():
+        for student, parsing in parsings:
+            for event_data in iter_calendar_events(parsing, current_date, semester_start_date, tz):
+                yield student, event_data
     
-    return current_date + timedelta(days=days_until_next)
+    return expand_occurrences(iter_events())
 
-def create_event_description(student: Dict[str, Any], start_time: str, end_time: str) -> str:
+def run_occurrences(source: str, current_date: datetime, semester_start_date: datetime,
+                    group: str = 'week', workers: Optional[int] = None, cache_dir: Optional[str] = None,
+                    cache_max_mb: int = DEFAULT_CACHE_MAX_MB,
+                    backend: str = DEFAULT_PDF_BACKEND) -> Optional[OccurrenceTable]:
     """
-    Crea la descripción para un evento del calendario.
+    Cuenta las clases concretas de uno o varios PDF e imprime el resultado.
     
     Args:
-        student: Información de la materia
-        start_time: Hora de inicio
-        end_time: Hora de fin
+        source: Archivo PDF, directorio con PDFs o patrón glob
+        current_date: Fecha actual
+        semester_start_date: Fecha de inicio del semestre
+        group: Agrupación del conteo ('student', 'week' o 'room')
+        workers: Número de procesos (por defecto, núcleos disponibles)
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_mb: Tamaño máximo de la caché en MB
+        backend: Forma de extraer el texto de los PDF ('text' o 'layout')
         
     Returns:
-        Descripción formateada para el evento
+        Tabla de ocurrencias, o None si no hay PDFs o falta NumPy
     """
-    clean_professor = re.sub(r'[^\w\s,áéíóúÁÉÍÓÚñÑ]', '', student['professor'])
-    sub_period_clean = student.get('sub_period_clean', '')
-    crn_info = student.get('crn', '')
-    in_english = student.get('in_english', False)
-
-    description = (
-        f"Profesor(es): {clean_professor}\n"
-        f"Sub-período(s): {sub_period_clean}\n"
-        f"CRN: {crn_info}\n"
-        f"Formato: {student['format']}\n"
-        f"Ubicación: {student['location']}\n"
-        f"Días: {', '.join(student['days'])}\n"
-        f"Horario: {start_time} - {end_time}\n"
-    )
+    if np is None:
+        print("La expansión de ocurrencias requiere NumPy (pip install numpy)")
+        return None
+    
+    pdf_paths = collect_pdf_paths(source)
+    if not pdf_paths:
+        print(f"No se encontraron archivos PDF en '{source}'")
+        return None
+    
+    parsings = iter_parsed_pdfs(pdf_paths, workers, cache_dir, cache_max_mb, backend)
+    table = build_occurrence_table(parsings, current_date, semester_start_date)
+    
+    if group == 'student':
+        counts = table.counts_by_student()
+    elif group == 'room':
+        counts = table.counts_by_room()
+    else:
+        counts = {week.strftime('%d/%m/%Y'): count for week, count in table.counts_by_week().items()}
+    
+    for key, count in counts.items():
+        print(f"{key}: {count}")
+    print(f"\nClases totales: {len(table)} ({len(table.students)} horarios)")
+    return table
 
-    if in_english:
-        description += f"Idioma: Inglés\n"
+# =================================== #
+# EXPORTACIÓN TABULAR DE LOS HORARIOS #
+# =================================== #
 
-    description += f"Período: {student['start_date'].strftime('%d/%m/%Y')} - {student['end_date'].strftime('%d/%m/%Y')}"
+# Columnas de la exportación, una fila por línea de horario
+EXPORT_COLUMNS = (
+    'source', 'process_date', 'campus', 'career', 'subject_code', 'subject', 'crn',
+    'sub_period', 'days', 'start_time', 'end_time', 'start_date', 'end_date',
+    'location', 'format', 'in_english', 'is_special_class', 'schedule_line'
+)
+EXPORT_DATE_COLUMNS = ('start_date', 'end_date')
+EXPORT_TIME_COLUMNS = ('start_time', 'end_time')
+EXPORT_BOOL_COLUMNS = ('in_english', 'is_special_class')
 
-    return description
+def iter_export_rows(parsings: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[Tuple[Any, ...]]:
+    """
+    Genera las filas de la exportación (en el orden de `EXPORT_COLUMNS`).
+    
+    Args:
+        parsings: Pares (ruta del PDF, resultado del análisis del PDF)
+        
+    Yields:
+        Una fila por línea de horario, con fechas y horas como `date` y `time`
+    """
+    for source, parsing in parsings:
+        for record in parsing['schedule_data']:
+            yield (
+                source, record.process_date, record.campus, record.career, record.subject_code,
+                record.subject, record.crn, record.sub_period_clean, ','.join(record.days),
+                record.start_time, record.end_time, record.start_date, record.end_date,
+                record.location, record.format, record.in_english, record.is_special_class,
+                record.schedule_line
+            )
 
-def calculate_easter_date(year: int) -> date:
+def write_export_csv(rows: Iterable[Tuple[Any, ...]], path: str) -> int:
     """
-    Calcula la fecha de Pascua para un año dado usando el algoritmo de Butcher.
+    Escribe las filas en CSV conforme se generan (fechas ISO 8601, horas HH:MM).
     
     Args:
-        year: Año para calcular la Pascua
+        rows: Filas de `iter_export_rows`
+        path: Ruta del archivo de salida
         
     Returns:
-        Fecha de Pascua
+        Número de filas escritas
     """
-    a = year % 19
-    b = year // 100
-    c = year % 100
-    d = (19 * a + b - b // 4 - ((b - (b + 8) // 25 + 1) // 3) + 15) % 30
-    e = (32 + 2 * (b % 4) + 2 * (c // 4) - d - (c % 4)) % 7
-    f = d + e - 7 * ((a + 11 * d + 22 * e) // 451) + 114
-    month = f // 31
-    day = f % 31 + 1
-    return date(year, month, day)
+    time_indexes = [EXPORT_COLUMNS.index(name) for name in EXPORT_TIME_COLUMNS]
+    date_indexes = [EXPORT_COLUMNS.index(name) for name in EXPORT_DATE_COLUMNS]
+    
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            row = list(row)
+            for idx in time_indexes:
+                row[idx] = format_time(row[idx])
+            for idx in date_indexes:
+                row[idx] = row[idx].isoformat()
+            writer.writerow(row)
+            count += 1
+    return count
 
-def get_holy_week_dates(year: int) -> Tuple[date, date]:
+def collect_export_columns(rows: Iterable[Tuple[Any, ...]]) -> Dict[str, List[Any]]:
+    """Agrupa las filas por columna para los formatos columnares."""
+    columns = tuple([] for _ in EXPORT_COLUMNS)
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+    return dict(zip(EXPORT_COLUMNS, columns))
+
+def write_export_npz(rows: Iterable[Tuple[Any, ...]], path: str) -> int:
     """
-    Calcula las fechas de inicio y fin de la Semana Santa para un año dado.
+    Escribe las filas como arreglos de NumPy en un archivo .npz comprimido.
+    
+    Las fechas se guardan como datetime64[D], las horas como timedelta64[m] desde
+    medianoche y el texto como arreglos unicode, así que se cargan sin pickle.
     
     Args:
-        year: Año para calcular la Semana Santa
+        rows: Filas de `iter_export_rows`
+        path: Ruta del archivo de salida
         
     Returns:
-        Tupla con (fecha_inicio, fecha_fin) de la Semana Santa
+        Número de filas escritas
     """
-    easter_date = calculate_easter_date(year)
-    # Semana Santa va del Domingo de Ramos (7 días antes) al Domingo de Pascua
-    holy_week_start = easter_date - timedelta(days=7)
-    holy_week_end = easter_date
-    return holy_week_start, holy_week_end
+    if np is None:
+        raise RuntimeError("La exportación .npz requiere NumPy (pip install numpy)")
+    
+    columns = collect_export_columns(rows)
+    arrays = {}
+    for name, values in columns.items():
+        if name in EXPORT_DATE_COLUMNS:
+            arrays[name] = np.array(values, dtype='datetime64[D]')
+        elif name in EXPORT_TIME_COLUMNS:
+            arrays[name] = np.array([time_to_minutes(value) for value in values],
+                                    dtype=np.int64).astype('timedelta64[m]')
+        elif name in EXPORT_BOOL_COLUMNS:
+            arrays[name] = np.array(values, dtype=bool)
+        elif name == 'schedule_line':
+            arrays[name] = np.array(values, dtype=np.int32)
+        else:
+            arrays[name] = np.array(values, dtype=str)
+    
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    return len(columns['source'])
 
-def get_monday_holiday_date(year: int, month: int, week_number: int) -> date:
+def write_export_parquet(rows: Iterable[Tuple[Any, ...]], path: str) -> int:
     """
-    Calcula la fecha de un lunes de asueto.
+    Escribe las filas en un archivo Parquet (requiere pyarrow).
     
     Args:
-        year: Año
-        month: Mes
-        week_number: Número de semana (1 = primer lunes, 3 = tercer lunes)
+        rows: Filas de `iter_export_rows`
+        path: Ruta del archivo de salida
         
     Returns:
-        Fecha del día festivo móvil
+        Número de filas escritas
     """
-    # Encontrar el primer día del mes
-    first_day = date(year, month, 1)
-    
-    days_until_monday = (7 - first_day.weekday()) % 7
-    first_monday = first_day + timedelta(days=days_until_monday)
+    try:
+        # pyarrow tarda en importarse, así que solo se carga cuando se usa
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("La exportación Parquet requiere pyarrow (pip install pyarrow)")
     
-    # Calcular el lunes específico
-    target_monday = first_monday + timedelta(weeks=week_number - 1)
+    columns = collect_export_columns(rows)
+    pyarrow.parquet.write_table(pyarrow.table(columns), path)
+    return len(columns['source'])
+
+# Formato de exportación según la extensión del archivo de salida
+EXPORT_WRITERS = {
+    '.csv': write_export_csv,
+    '.npz': write_export_npz,
+    '.parquet': write_export_parquet,
+}
+
+def export_schedules(parsings: Iterable[Tuple[str, Dict[str, Any]]], path: str) -> int:
+    """
+    Exporta los horarios analizados a un archivo tabular.
     
-    return target_monday
+    Args:
+        parsings: Pares (ruta del PDF, resultado del análisis del PDF)
+        path: Ruta del archivo de salida (.csv, .npz o .parquet)
+        
+    Returns:
+        Número de filas escritas
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_WRITERS:
+        raise ValueError(f"Formato de exportación no soportado: '{extension}' "
+                         f"(usa {', '.join(EXPORT_WRITERS)})")
+    return EXPORT_WRITERS[extension](iter_export_rows(parsings), path)
 
-def calculate_exclusions(start_date: date, end_date: date) -> List[date]:
+def run_export(source: str, output: str, workers: Optional[int] = None, cache_dir: Optional[str] = None,
+               cache_max_mb: int = DEFAULT_CACHE_MAX_MB, backend: str = DEFAULT_PDF_BACKEND) -> bool:
     """
-    Calcula los días de exclusión (feriados y semana santa) para un período,
-    aplicando automáticamente para todos los años en el rango.
+    Analiza uno o varios PDF y exporta todas sus líneas de horario.
     
     Args:
-        start_date: Fecha de inicio
-        end_date: Fecha de fin
+        source: Archivo PDF, directorio con PDFs o patrón glob
+        output: Ruta del archivo de salida (.csv, .npz o .parquet)
+        workers: Número de procesos (por defecto, núcleos disponibles)
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_mb: Tamaño máximo de la caché en MB
+        backend: Forma de extraer el texto de los PDF ('text' o 'layout')
         
     Returns:
-        Lista de fechas a excluir
+        True si se escribió el archivo
     """
-    exclusions = []
+    pdf_paths = collect_pdf_paths(source)
+    if not pdf_paths:
+        print(f"No se encontraron archivos PDF en '{source}'")
+        return False
     
-    start_year = start_date.year
-    end_year = end_date.year
+    start = time.perf_counter()
+    parsings = iter_parsed_pdfs(pdf_paths, workers, cache_dir, cache_max_mb, backend)
+    try:
+        count = export_schedules(parsings, output)
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        return False
     
-    for year in range(start_year, end_year + 1):
-        for month, day in FIXED_HOLIDAYS:
-            holiday_date = date(year, month, day)
-            if start_date <= holiday_date <= end_date:
-                exclusions.append(holiday_date)
+    print(f"{count} líneas de horario de {len(pdf_paths)} PDF exportadas a {output} "
+          f"en {time.perf_counter() - start:.2f}s")
+    return True
+
+# =========================================== #
+# MODO VIGILANCIA DE UN DIRECTORIO DE ENTRADA #
+# =========================================== #
+
+class InotifyWatcher:
+    """
+    Espera cambios en un directorio con inotify (Linux) usando ctypes, sin
+    dependencias adicionales. Solo avisa que hubo cambios; qué archivos están
+    listos lo decide `SpoolScanner`.
+    """
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Directorio a vigilar
+        """
+        import ctypes
+        import ctypes.util
         
-        for holiday_name, (month, week_number) in MONDAY_HOLIDAYS.items():
-            holiday_date = get_monday_holiday_date(year, month, week_number)
-            if start_date <= holiday_date <= end_date:
-                exclusions.append(holiday_date)
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
         
-        holy_week_start, holy_week_end = get_holy_week_dates(year)
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), self.IN_CLOSE_WRITE | self.IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno))
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Espera hasta que haya cambios o pase `timeout` segundos.
         
-        current_day = holy_week_start
-        while current_day <= holy_week_end:
-            if start_date <= current_day <= end_date:
-                exclusions.append(current_day)
-            current_day += timedelta(days=1)
-    
-    exclusions = sorted(list(set(exclusions)))
-    
-    return exclusions
+        Returns:
+            True si hubo cambios en el directorio
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Alternativa a `InotifyWatcher` donde no hay inotify: revisa en cada intervalo."""
+
+    def wait(self, timeout: float) -> bool:
+        time.sleep(timeout)
+        return True
+
+    def close(self) -> None:
+        pass
+
+def create_spool_watcher(path: str) -> Any:
+    """Usa inotify si está disponible y, si no, revisa el directorio periódicamente."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(path)
+        except (OSError, AttributeError) as e:
+            logger.warning("inotify no disponible (%s); se revisará el directorio periódicamente", e)
+    return PollingWatcher()
 
-def add_exclusions_to_event(event: Event, exclusions: List[date], tz: pytz.timezone, subject_name: str) -> None:
+class SpoolScanner:
     """
-    Añade exclusiones a un evento.
-    
-    Args:
-        event: Evento al que se añadirán las exclusiones
-        exclusions: Lista de fechas a excluir
-        tz: Zona horaria
-        subject_name: Nombre de la materia para mensajes de depuración
+    Encuentra los PDF del directorio de entrada que ya terminaron de escribirse:
+    un archivo está listo cuando su tamaño y fecha de modificación no cambian
+    durante `debounce` segundos.
     """
-    if not exclusions:
-        return
+
+    def __init__(self, path: str, debounce: float = DEFAULT_WATCH_DEBOUNCE):
+        """
+        Args:
+            path: Directorio de entrada
+            debounce: Segundos sin cambios antes de considerar listo un PDF
+        """
+        self.path = path
+        self.debounce = debounce
+        self.candidates = {}  # ruta -> ((tamaño, mtime), momento del último cambio)
+
+    def scan(self, exclude: Iterable[str] = ()) -> List[str]:
+        """
+        Revisa el directorio y devuelve los PDF listos para convertirse.
+        
+        Args:
+            exclude: Rutas que ya se están convirtiendo
+            
+        Returns:
+            PDF listos, ordenados por nombre
+        """
+        now = time.monotonic()
+        exclude = set(exclude)
+        seen = {}
         
-    event_start = event.get('dtstart').dt
-    event.add('exdate', [
-        tz.localize(datetime.combine(d, event_start.time()))
-        for d in exclusions
-    ])
-    print(f"Exclusiones: {subject_name} - {len(exclusions)} días")
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if (entry.name.startswith('.') or not entry.name.lower().endswith('.pdf')
+                        or entry.path in exclude or not entry.is_file()):
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                previous = self.candidates.get(entry.path)
+                changed_at = previous[1] if previous and previous[0] == signature else now
+                seen[entry.path] = (signature, changed_at)
+        
+        self.candidates = seen
+        ready = [path for path, (_, changed_at) in seen.items() if now - changed_at >= self.debounce]
+        for path in ready:
+            del self.candidates[path]
+        return sorted(ready)
 
+    def next_deadline(self) -> Optional[float]:
+        """Segundos hasta que el candidato más próximo cumpla el tiempo de espera."""
+        if not self.candidates:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(changed_at + self.debounce - now for _, changed_at in self.candidates.values()))
 
-def add_recurrence_rule(event: Event, days: List[str], end_date: date, tz: pytz.timezone) -> None:
+def move_aside(path: str, directory: str) -> str:
     """
-    Añade una regla de recurrencia a un evento.
+    Mueve un archivo a otro directorio sin sobrescribir (añade _1, _2, ... al nombre).
     
-    Args:
-        event: Evento al que se añadirá la regla
-        days: Lista de días de la semana
-        end_date: Fecha de fin
-        tz: Zona horaria
+    Returns:
+        Nueva ruta del archivo
     """
-    event.add('rrule', {
-        'freq': 'weekly',
-        'byday': [DAY_MAPPING[day.capitalize()] for day in days],
-        'until': tz.localize(datetime.combine(
-            end_date + timedelta(days=1),
-            datetime.min.time()
-        ))
-    })
+    os.makedirs(directory, exist_ok=True)
+    base_name, extension = os.path.splitext(os.path.basename(path))
+    target = os.path.join(directory, base_name + extension)
+    counter = 1
+    while os.path.exists(target):
+        target = os.path.join(directory, f"{base_name}_{counter}{extension}")
+        counter += 1
+    shutil.move(path, target)
+    return target
 
-def save_master_ics(cal: Calendar, process_date: str, campus: str, career: str) -> None:
+def run_watch(spool_dir: str, current_date: Optional[datetime], semester_start_date: datetime,
+              output_dir: str, workers: Optional[int] = None, processed_dir: Optional[str] = None,
+              failed_dir: Optional[str] = None, debounce: float = DEFAULT_WATCH_DEBOUNCE,
+              interval: float = DEFAULT_WATCH_INTERVAL, once: bool = False,
+              cache_dir: Optional[str] = None, cache_max_mb: int = DEFAULT_CACHE_MAX_MB,
+              streaming: bool = False, log_level: Optional[str] = None, log_file: Optional[str] = None,
+              backend: str = DEFAULT_PDF_BACKEND, compact: bool = False, naming: str = 'sequential',
+              shard_depth: int = 0) -> int:
     """
-    Guarda el calendario maestro con todas las materias en un único archivo ICS.
+    Convierte los PDF que llegan a un directorio hasta que se detenga (Ctrl+C o SIGTERM).
+    
+    El pool de procesos se crea una sola vez y se reutiliza para todos los PDF,
+    así que el intérprete y PyMuPDF solo se cargan al iniciar. Cada PDF se mueve
+    a `processed_dir` o a `failed_dir` al terminar su conversión.
     
     Args:
-        cal: Calendario a guardar
-        process_date: Fecha del proceso
-        campus: Campus
-        career: Carrera
+        spool_dir: Directorio de entrada
+        current_date: Fecha actual (None = el día de cada conversión)
+        semester_start_date: Fecha de inicio del semestre
+        output_dir: Directorio de salida de los .ics
+        workers: Número de procesos (por defecto, núcleos disponibles)
+        processed_dir: Destino de los PDF convertidos (por defecto, spool_dir/procesados)
+        failed_dir: Destino de los PDF con error (por defecto, spool_dir/fallidos)
+        debounce: Segundos sin cambios antes de convertir un PDF
+        interval: Segundos máximos entre revisiones del directorio
+        once: Convierte lo que ya está en el directorio y termina
+        cache_dir: Directorio de la caché de análisis (opcional)
+        cache_max_mb: Tamaño máximo de la caché en MB
+        streaming: Escribe cada .ics con IcsStreamWriter
+        log_level: Nivel de los mensajes de cada proceso
+        log_file: Archivo JSON lines de los mensajes
+        backend: Forma de extraer el texto de los PDF ('text' o 'layout')
+        compact: Un solo evento por clase regular en lugar de uno por período
+        naming: Nombres de los archivos ('sequential' o 'hash', ver `OutputLayout`)
+        shard_depth: Niveles de subdirectorios del directorio de salida
+        
+    Returns:
+        Número de PDF convertidos correctamente
     """
-    current_dir = os.path.dirname(os.path.abspath(__file__))
+    processed_dir = processed_dir or os.path.join(spool_dir, 'procesados')
+    failed_dir = failed_dir or os.path.join(spool_dir, 'fallidos')
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, workers or os.cpu_count() or 1)
     
-    if not process_date:
-        process_date = datetime.now().strftime("%d%m%Y")
-    if not campus:
-        campus = "Campus"
-    if not career:
-        career = "Horario"
+    # Los procesos del pool se crean al enviar los primeros PDF; el inicializador
+    # evita que hereden el manejador de SIGTERM que se instala a continuación
+    executor = create_watch_pool(workers)
     
-    base_filename = f"MiHorario_{process_date}_{career}"
-    filename = os.path.join(current_dir, f"{base_filename}.ics")
+    stopping = []
+    def request_stop(signum, frame):
+        stopping.append(signum)
+    previous_handler = signal.signal(signal.SIGTERM, request_stop)
     
-    # ¿El archivo ya existe? Añadir sufijo si es necesario
-    counter = 1
-    while os.path.exists(filename):
-        filename = os.path.join(current_dir, f"{base_filename}_{counter}.ics")
-        counter += 1
+    watcher = PollingWatcher() if once else create_spool_watcher(spool_dir)
+    scanner = SpoolScanner(spool_dir, 0.0 if once else debounce)
+    in_flight = {}  # Future -> ruta del PDF
+    unmovable = set()  # PDF que no se pudieron mover; no se vuelven a convertir
+    retry = []  # PDF en curso cuando murió un proceso del pool; se reintentan de uno en uno
+    isolated = None  # PDF que se está reintentando solo
+    crashes = {}  # ruta del PDF -> veces que tumbó el pool mientras se convertía solo
+    succeeded = 0
+    
+    def submit(path: str) -> Future:
+        conversion_date = current_date or datetime.combine(date.today(), dt_time.min)
+        return executor.submit(convert_pdf_file, path, conversion_date, semester_start_date,
+                               output_dir, cache_dir, cache_max_mb * 1024 * 1024, streaming,
+                               False, False, log_level, log_file, backend, compact, False,
+                               naming, shard_depth)
+    
+    print(f"Vigilando {spool_dir} ({workers} procesos, {type(watcher).__name__})", flush=True)
+    
+    try:
+        changed = True
+        while not stopping:
+            pool_broken = False
+            
+            if retry or isolated is not None:
+                # Mientras se busca el PDF que tumbó el pool no se envían otros, para
+                # que un nuevo fallo solo pueda atribuirse al que se reintenta
+                if not in_flight and retry:
+                    isolated = retry.pop(0)
+                    in_flight[submit(isolated)] = isolated
+                changed = True
+            elif changed or scanner.candidates:
+                if unmovable:
+                    unmovable = {path for path in unmovable if os.path.exists(path)}
+                for path in scanner.scan(exclude=unmovable.union(in_flight.values())):
+                    try:
+                        in_flight[submit(path)] = path
+                    except BrokenProcessPool:
+                        executor = restart_watch_pool(executor, workers)
+                        in_flight[submit(path)] = path
+            
+            for future in [future for future in in_flight if future.done()]:
+                path = in_flight.pop(future)
+                was_isolated = path == isolated
+                if was_isolated:
+                    isolated = None
+                if is_pool_crash(future):
+                    # Con varios PDF en curso no se sabe cuál tumbó el proceso: todos
+                    # se reintentan solos, y solo cuenta el fallo de un PDF aislado
+                    pool_broken = True
+                    if was_isolated:
+                        crashes[path] = crashes.get(path, 0) + 1
+                    if crashes.get(path, 0) < WATCH_MAX_CRASHES:
+                        logger.warning("Un proceso del pool terminó durante %s; se volverá a convertir", path)
+                        retry.append(path)
+                        continue
+                crashes.pop(path, None)
+                succeeded += finish_watched_file(future, path, processed_dir, failed_dir, unmovable)
+            
+            if pool_broken:
+                executor = restart_watch_pool(executor, workers)
+                continue
+            
+            if once and not in_flight and not retry:
+                break
+            
+            timeout = interval
+            deadline = scanner.next_deadline()
+            if deadline is not None:
+                timeout = min(timeout, deadline)
+            changed = watcher.wait(timeout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if not once:
+            print("Deteniendo la vigilancia; terminando las conversiones en curso...", flush=True)
+        for future in as_completed(list(in_flight)):
+            path = in_flight.pop(future)
+            if is_pool_crash(future):
+                print(f"[PENDIENTE] {path}: el proceso terminó; se convertirá al reiniciar", flush=True)
+                continue
+            succeeded += finish_watched_file(future, path, processed_dir, failed_dir, unmovable)
+        executor.shutdown(wait=True)
+        watcher.close()
+        signal.signal(signal.SIGTERM, previous_handler)
+    
+    return succeeded
+
+def create_watch_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool de procesos de `run_watch` (ver `reset_worker_signals`)."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=reset_worker_signals)
+
+def restart_watch_pool(broken: ProcessPoolExecutor, workers: int) -> ProcessPoolExecutor:
+    """Reemplaza el pool de `run_watch` después de que uno de sus procesos murió."""
+    logger.error("Un proceso del pool de conversión terminó; se vuelve a crear el pool")
+    broken.shutdown(wait=False)
+    return create_watch_pool(workers)
+
+def is_pool_crash(future: Future) -> bool:
+    """True si la conversión falló porque un proceso del pool murió."""
+    return isinstance(future.exception(), BrokenProcessPool)
+
+def reset_worker_signals() -> None:
+    """
+    Inicializa cada proceso del pool de `run_watch` y del servicio HTTP: SIGTERM
+    vuelve a su acción predeterminada (en lugar del manejador heredado del proceso
+    principal) y se ignora SIGINT, para que Ctrl+C en la terminal no interrumpa
+    las conversiones en curso que el proceso principal espera.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def finish_watched_file(future: Future, path: str, processed_dir: str, failed_dir: str,
+                        unmovable: set) -> int:
+    """
+    Reporta el resultado de un PDF del directorio vigilado y lo mueve a su destino.
     
-    with open(filename, 'wb') as f:
-        f.write(cal.to_ical())
+    Args:
+        future: Conversión terminada
+        path: Ruta del PDF en el directorio vigilado
+        processed_dir: Destino de los PDF convertidos
+        failed_dir: Destino de los PDF con error
+        unmovable: PDF que no se pudieron mover; se añade `path` si tampoco se
+                   puede mover, para no convertirlo otra vez en cada revisión
+    
+    Returns:
+        1 si la conversión fue correcta, 0 si no
+    """
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {'file': path, 'ok': False, 'output': None, 'error': str(e)}
+    
+    try:
+        moved = move_aside(path, processed_dir if result['ok'] else failed_dir)
+    except OSError as e:
+        logger.error("No se pudo mover %s (no se volverá a convertir mientras exista): %s", path, e)
+        unmovable.add(path)
+        moved = path
     
-    print(f"Horario completo guardado en: {filename}")
+    if result['ok']:
+        print(f"[OK] {moved} -> {result['output']}", flush=True)
+        return 1
+    print(f"[ERROR] {moved}: {result['error']}", flush=True)
+    return 0
 
 if __name__ == "__main__":
     main()
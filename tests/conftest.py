@@ -0,0 +1,31 @@
+# conftest.py
+# Utilidades compartidas por las pruebas de horarios.py
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark
+import horarios
+
+CURRENT_DATE = datetime(2025, 1, 1)
+SEMESTER_START = datetime(2025, 2, 10)
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Crea un comprobante PDF sintético y devuelve su ruta."""
+    def make(name: str = 'horario.pdf', subjects: int = 6, seed: int = 0, directory=None) -> str:
+        path = os.path.join(str(directory or tmp_path), name)
+        with open(path, 'wb') as f:
+            f.write(benchmark.write_comprobante_pdf(benchmark.generate_comprobante_lines(subjects, seed)))
+        return path
+    return make
+
+@pytest.fixture(autouse=True)
+def default_calendar(monkeypatch):
+    """Cada prueba usa el calendario académico predeterminado salvo que lo cambie."""
+    monkeypatch.delenv(horarios.CALENDAR_ENV_VAR, raising=False)
@@ -0,0 +1,32 @@
+# test_batch.py
+# Pruebas de la conversión por lotes (run_batch)
+
+import csv
+import io
+import os
+import zipfile
+
+import horarios
+from conftest import CURRENT_DATE, SEMESTER_START
+
+def test_batch_writes_archive_entries(tmp_path, make_pdf):
+    source = tmp_path / 'pdfs'
+    source.mkdir()
+    for seed in range(3):
+        make_pdf(f"alumno{seed}.pdf", seed=seed, directory=source)
+    script_dir = os.path.dirname(os.path.abspath(horarios.__file__))
+    before = set(os.listdir(script_dir))
+    archive_path = str(tmp_path / 'horarios.zip')
+
+    results = horarios.run_batch(str(source), CURRENT_DATE, SEMESTER_START, str(tmp_path / 'salida'),
+                                 workers=1, archive_path=archive_path)
+
+    assert all(result['ok'] for result in results)
+    with zipfile.ZipFile(archive_path) as archive:
+        names = archive.namelist()
+        manifest = list(csv.reader(io.StringIO(archive.read('manifest.csv').decode('utf-8'))))
+    assert sorted(names) == ['MiHorario_05012025_ITC.ics', 'MiHorario_05012025_ITC_1.ics',
+                             'MiHorario_05012025_ITC_2.ics', 'manifest.csv']
+    assert sorted(row[1] for row in manifest[1:]) == sorted(name for name in names if name.endswith('.ics'))
+    assert set(os.listdir(script_dir)) == before
+    assert not (tmp_path / 'salida').exists()
@@ -0,0 +1,60 @@
+# test_cache.py
+# Pruebas de la caché de análisis (ParseCache)
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import horarios
+
+MAX_BYTES = 20000
+
+def cache_size(cache_dir):
+    return sum(os.path.getsize(os.path.join(cache_dir, name))
+               for name in os.listdir(cache_dir) if name.endswith('.json'))
+
+def fill_cache(cache_dir, pdf_path, prefix, count):
+    """Guarda `count` entradas con la caché del proceso actual."""
+    cache = horarios.ParseCache(cache_dir, MAX_BYTES)
+    parsing = horarios.parse_pdf(pdf_path)
+    for i in range(count):
+        cache.put(f"{prefix}{i}", parsing)
+
+def test_cache_round_trip(tmp_path, make_pdf):
+    pdf_path = make_pdf()
+    with open(pdf_path, 'rb') as f:
+        key = horarios.ParseCache.make_key(f.read())
+    cache = horarios.ParseCache(str(tmp_path / 'cache'))
+    parsing = horarios.parse_pdf(pdf_path)
+
+    assert cache.get(key) is None
+    cache.put(key, parsing)
+    assert horarios.parsing_to_json(cache.get(key)) == horarios.parsing_to_json(parsing)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_evicts_least_recently_used(tmp_path, make_pdf):
+    cache_dir = str(tmp_path / 'cache')
+    parsing = horarios.parse_pdf(make_pdf())
+    cache = horarios.ParseCache(cache_dir, MAX_BYTES)
+    entry_size = len(horarios.json.dumps(horarios.parsing_to_json(parsing), ensure_ascii=False).encode('utf-8'))
+    capacity = MAX_BYTES // entry_size
+    for i in range(capacity):
+        cache.put(f"k{i}", parsing)
+        os.utime(cache._entry_path(f"k{i}"), (i, i))
+    cache.get('k0')
+
+    cache.put('nueva', parsing)
+    assert cache.get('k0') is not None
+    assert cache.get('k1') is None
+    assert cache_size(cache_dir) <= MAX_BYTES
+
+def test_cache_limit_holds_across_processes(tmp_path, make_pdf):
+    cache_dir = str(tmp_path / 'cache')
+    os.makedirs(cache_dir)
+    pdf_path = make_pdf()
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(fill_cache, cache_dir, pdf_path, f"p{n}-", 25) for n in range(4)]
+        for future in futures:
+            future.result()
+
+    assert cache_size(cache_dir) <= MAX_BYTES
+    assert os.listdir(cache_dir)
@@ -0,0 +1,49 @@
+# test_calendar.py
+# Pruebas del calendario académico configurable (AcademicCalendar)
+
+import json
+
+import pytest
+
+import horarios
+
+def write_config(tmp_path, config, name='calendario.json'):
+    path = tmp_path / name
+    path.write_text(config if isinstance(config, str) else json.dumps(config), encoding='utf-8')
+    return str(path)
+
+@pytest.mark.parametrize('config', [
+    [1],
+    {'terms': []},
+    {'terms': 'FJ'},
+    {'terms': [{'period_weeks': '55'}]},
+    {'terms': [{'period_weeks': [5, 0]}]},
+    {'terms': [{'period_weeks': [5, 5], 'gap_weeks': [1, 1]}]},
+    {'terms': [{'period_weeks': [5], 'start_months': [13]}]},
+    {'terms': [{'period_weeks': [5]}], 'holidays': {'mondays': [[2, 1]]}},
+    {'terms': [{'period_weeks': [5]}], 'holidays': {'mondays': {'x': [2]}}},
+    {'terms': [{'period_weeks': [5]}], 'holidays': {'fixed': [[2, 30]]}},
+    {'terms': [{'period_weeks': [5]}], 'holidays': {'holy_week': 'no'}},
+    {'terms': [{'period_weeks': [5]}], 'holidays': {'dates': [{'start': '2025-01-01'}]}},
+    {'terms': [{'period_weeks': [5]}], 'holidays': {'dates': ['01-01-2025']}},
+])
+def test_invalid_config_raises_calendar_error(tmp_path, config):
+    with pytest.raises(horarios.CalendarConfigError):
+        horarios.AcademicCalendar.from_file(write_config(tmp_path, config))
+
+@pytest.mark.parametrize('content, name', [
+    ('{"terms": [', 'calendario.json'),
+    ('terms = [', 'calendario.toml'),
+    (None, 'no_existe.json'),
+])
+def test_unreadable_config_raises_calendar_error(tmp_path, content, name):
+    path = write_config(tmp_path, content, name) if content is not None else str(tmp_path / name)
+    with pytest.raises(horarios.CalendarConfigError):
+        horarios.AcademicCalendar.from_file(path)
+
+def test_render_reports_malformed_env_calendar(tmp_path, monkeypatch, make_pdf):
+    with open(make_pdf(), 'rb') as f:
+        parsed = horarios.parse_pdf_bytes(f.read())
+    monkeypatch.setenv(horarios.CALENDAR_ENV_VAR, write_config(tmp_path, '{"terms": ['))
+    with pytest.raises(horarios.CalendarConfigError):
+        horarios.render_calendar(parsed, horarios.date(2025, 3, 5), horarios.date(2025, 2, 10))
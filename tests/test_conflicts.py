@@ -0,0 +1,82 @@
+# test_conflicts.py
+# Pruebas de traslapes y ocurrencias contra la expansión de dateutil (rruleset)
+
+from datetime import datetime, timedelta
+from itertools import combinations
+
+import pytest
+import pytz
+
+import horarios
+from conftest import SEMESTER_START
+
+rrule = pytest.importorskip('dateutil.rrule')
+
+def class_days(weekdays, date_from, date_to):
+    """Días entre dos fechas (incluidas) que caen en alguno de los días de la semana."""
+    return [day.date() for day in rrule.rrule(rrule.WEEKLY, byweekday=weekdays,
+                                              dtstart=datetime.combine(date_from, datetime.min.time()),
+                                              until=datetime.combine(date_to, datetime.min.time()))]
+
+def oracle_conflicts(schedule_data):
+    """Traslapes por fecha concreta comparando cada par de clases."""
+    periods = horarios.get_period_table(SEMESTER_START)
+    sessions = []
+    for record in schedule_data:
+        if record.is_special_class:
+            ranges = [(record.start_date, record.end_date)]
+        else:
+            ranges = [(date_from, date_to) for _, date_from, date_to
+                      in periods.clip(record.start_date, record.end_date)]
+        weekdays = horarios.WEEKDAYS_BY_MASK[record.days_mask]
+        sessions.append({day for date_from, date_to in ranges
+                         for day in class_days(weekdays, date_from, date_to)})
+
+    found = set()
+    for i, j in combinations(range(len(schedule_data)), 2):
+        first, second = schedule_data[i], schedule_data[j]
+        start = max(horarios.time_to_minutes(first.start_time), horarios.time_to_minutes(second.start_time))
+        end = min(horarios.time_to_minutes(first.end_time), horarios.time_to_minutes(second.end_time))
+        if start < end:
+            found.update((day, i, j, start, end) for day in sessions[i] & sessions[j])
+    return found
+
+@pytest.mark.parametrize('seed', range(4))
+def test_conflicts_match_pairwise_oracle(make_pdf, seed):
+    schedule_data = horarios.parse_pdf(make_pdf(subjects=15, seed=seed))['schedule_data']
+    index = {id(record): i for i, record in enumerate(schedule_data)}
+
+    found = set()
+    for conflict in horarios.find_schedule_conflicts(schedule_data, SEMESTER_START):
+        i, j = sorted((index[id(conflict.first)], index[id(conflict.second)]))
+        found.update((day, i, j, conflict.start_minute, conflict.end_minute)
+                     for day in class_days([conflict.weekday], conflict.date_from, conflict.date_to))
+
+    expected = oracle_conflicts(schedule_data)
+    assert expected
+    assert found == expected
+
+@pytest.mark.parametrize('current_date', [datetime(2025, 1, 1), datetime(2025, 3, 12)])
+def test_occurrences_match_rruleset(make_pdf, current_date):
+    pytest.importorskip('numpy')
+    parsing = horarios.parse_pdf(make_pdf(subjects=15))
+    tz = pytz.timezone(horarios.TIMEZONE)
+    events = list(horarios.iter_calendar_events(parsing, current_date, SEMESTER_START, tz))
+
+    expected = []
+    for idx, event_data in enumerate(events):
+        dtstart = event_data['dtstart'].replace(tzinfo=None)
+        occurrences = rrule.rruleset()
+        occurrences.rdate(dtstart)
+        if event_data['rrule']:
+            byday = [rrule.weekdays[horarios.DAY_CODES.index(code)] for code in event_data['rrule']['byday']]
+            until = event_data['rrule']['until'].replace(tzinfo=None) - timedelta(minutes=1)
+            occurrences.rrule(rrule.rrule(rrule.WEEKLY, byweekday=byday, dtstart=dtstart, until=until))
+        for exdate in event_data['exdate']:
+            occurrences.exdate(exdate.replace(tzinfo=None))
+        expected.extend((idx, start) for start in occurrences)
+
+    table = horarios.expand_occurrences(('alumno', event_data) for event_data in events)
+    found = list(zip(table.event.tolist(), table.start.tolist()))
+    assert sorted(found) == sorted(expected)
+    assert len(table) > len(events)
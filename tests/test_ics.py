@@ -0,0 +1,51 @@
+# test_ics.py
+# Pruebas de la generación del archivo ICS
+
+import json
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+import horarios
+from conftest import CURRENT_DATE, SEMESTER_START
+
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('current_date', [CURRENT_DATE, datetime(2025, 4, 2)])
+def test_stream_writer_matches_icalendar(tmp_path, make_pdf, current_date, compact):
+    parsing = horarios.parse_pdf(make_pdf(subjects=15))
+    outputs = []
+    for streaming in (False, True):
+        output_dir = tmp_path / str(streaming)
+        output_dir.mkdir()
+        path = horarios.create_ics_file(parsing, current_date, SEMESTER_START, str(output_dir),
+                                        streaming=streaming, compact=compact)
+        with open(path, 'rb') as f:
+            outputs.append(f.read())
+
+    assert outputs[0] == outputs[1]
+    assert outputs[0].count(b'BEGIN:VEVENT') > 0
+
+def excluded_days(parsing):
+    tz = pytz.timezone(horarios.TIMEZONE)
+    return {exdate.date() for event_data in horarios.iter_calendar_events(parsing, CURRENT_DATE, SEMESTER_START, tz)
+            for exdate in event_data['exdate']}
+
+def test_exclusions_come_from_calendar_config(tmp_path, monkeypatch, make_pdf):
+    parsing = horarios.parse_pdf(make_pdf(subjects=15))
+    default_days = excluded_days(parsing)
+    assert date(2025, 5, 1) in default_days
+    assert date(2025, 4, 17) in default_days  # Semana Santa
+
+    config = {
+        'terms': horarios.DEFAULT_ACADEMIC_CALENDAR['terms'],
+        'holidays': {'fixed': [], 'mondays': {}, 'holy_week': False,
+                     'dates': ['2025-03-04', {'start': '2025-04-21', 'end': '2025-04-22'}]},
+    }
+    path = tmp_path / 'calendario.json'
+    path.write_text(json.dumps(config), encoding='utf-8')
+    monkeypatch.setenv(horarios.CALENDAR_ENV_VAR, str(path))
+
+    expected = [date(2025, 3, 4), date(2025, 4, 21), date(2025, 4, 22)]
+    assert horarios.calculate_exclusions(date(2025, 1, 1), date(2025, 12, 31)) == expected
+    assert excluded_days(parsing) == set(expected)
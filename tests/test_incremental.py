@@ -0,0 +1,59 @@
+# test_incremental.py
+# Pruebas de la actualización incremental del calendario (CalendarSync)
+
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import horarios
+from conftest import SEMESTER_START
+
+def sync_events(path, parsing, current_date, edit=None):
+    """Compara con el archivo anterior los eventos generados en `current_date`."""
+    sync = horarios.CalendarSync.from_file(path)
+    tz = pytz.timezone(horarios.TIMEZONE)
+    for event_data in horarios.iter_calendar_events(parsing, current_date, SEMESTER_START, tz):
+        if edit is not None:
+            edit(event_data)
+        sync.apply(event_data)
+    return sync
+
+def test_regenerating_later_keeps_events_unchanged(tmp_path, make_pdf):
+    parsing = horarios.parse_pdf(make_pdf(subjects=8))
+    path = horarios.create_ics_file(parsing, datetime(2025, 3, 5), SEMESTER_START,
+                                    str(tmp_path), incremental=True)
+
+    sync = sync_events(path, parsing, datetime(2025, 3, 12))
+    assert sync.changed == 0
+    assert sync.unchanged > 0
+
+def test_changed_class_time_increments_sequence(tmp_path, make_pdf):
+    parsing = horarios.parse_pdf(make_pdf())
+    path = horarios.create_ics_file(parsing, datetime(2025, 3, 5), SEMESTER_START,
+                                    str(tmp_path), incremental=True)
+
+    def move_one_hour(event_data):
+        event_data['dtstart'] += timedelta(hours=1)
+        event_data['dtend'] += timedelta(hours=1)
+
+    sync = sync_events(path, parsing, datetime(2025, 3, 12), move_one_hour)
+    assert sync.changed > 0
+    assert sync.unchanged == 0
+
+def test_earlier_start_counts_as_change(tmp_path, make_pdf):
+    parsing = horarios.parse_pdf(make_pdf())
+    path = horarios.create_ics_file(parsing, datetime(2025, 3, 12), SEMESTER_START,
+                                    str(tmp_path), incremental=True)
+
+    sync = sync_events(path, parsing, datetime(2025, 3, 5))
+    assert sync.changed > 0
+
+@pytest.mark.parametrize('option', [['--naming', 'hash'], ['--shard-depth', '1']])
+def test_incremental_rejects_content_based_paths(monkeypatch, capsys, option):
+    monkeypatch.setattr(sys, 'argv', ['horarios.py', 'batch', 'pdfs', '--current-date', '05-03-2025',
+                                      '--semester-start', '10-02-2025', '--incremental'] + option)
+    with pytest.raises(SystemExit):
+        horarios.parse_arguments()
+    assert '--incremental no se puede usar' in capsys.readouterr().err
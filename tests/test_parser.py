@@ -0,0 +1,50 @@
+# test_parser.py
+# Pruebas del análisis del PDF contra el resultado de la versión original
+
+import json
+import os
+
+import pytest
+
+import benchmark
+import horarios
+
+# Resultado de `parse_pdf` de la versión original (antes del clasificador de una
+# pasada) para los comprobantes sintéticos de 15 materias con las semillas 0-3
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'parse_baseline.json')
+
+def normalize(parsing):
+    """Convierte el resultado de `parse_pdf` al formato del archivo de referencia."""
+    schedule_data = []
+    for record in parsing['schedule_data']:
+        schedule_data.append({
+            'subject_code': record.subject_code,
+            'subject': record.subject,
+            'professor': record.professor,
+            'days': record.days,
+            'start_time': horarios.format_time(record.start_time),
+            'end_time': horarios.format_time(record.end_time),
+            'start_date': record.start_date.isoformat(),
+            'end_date': record.end_date.isoformat(),
+            'location': record.location,
+            'format': record.format,
+            'sub_period': record.sub_period,
+            'sub_period_clean': record.sub_period_clean,
+            'crn': record.crn,
+            'in_english': record.in_english,
+            'is_special_class': record.is_special_class,
+        })
+    return {'process_date': parsing['process_date'], 'campus': parsing['campus'],
+            'career': parsing['career'], 'schedule_data': schedule_data}
+
+with open(BASELINE_PATH, encoding='utf-8') as f:
+    BASELINE = json.load(f)
+
+@pytest.mark.parametrize('backend', sorted(horarios.PDF_LINE_BACKENDS))
+@pytest.mark.parametrize('seed', sorted(BASELINE))
+def test_parse_matches_baseline(make_pdf, backend, seed):
+    path = make_pdf(subjects=15, seed=int(seed))
+    assert normalize(horarios.parse_pdf(path, backend=backend)) == BASELINE[seed]
+
+def test_regression_blocks():
+    assert benchmark.check_regression_blocks() == []
@@ -0,0 +1,98 @@
+# test_server.py
+# Pruebas del servicio HTTP de conversión (ConversionServer)
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+import horarios
+from conftest import CURRENT_DATE, SEMESTER_START
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'horarios.py')
+
+convert_pdf_bytes = horarios.convert_pdf_bytes
+
+def crash_on_marker(pdf_bytes, *args):
+    """Termina el proceso del pool si el cuerpo recibido es `CRASH`."""
+    if pdf_bytes == b'CRASH':
+        os._exit(1)
+    return convert_pdf_bytes(pdf_bytes, *args)
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(horarios, 'convert_pdf_bytes', crash_on_marker)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    conversion_server = horarios.ConversionServer(workers=1, timeout=30)
+    yield conversion_server, loop
+    conversion_server.shutdown()
+    loop.close()
+    asyncio.set_event_loop(None)
+
+def test_server_converts_pdf(server, make_pdf):
+    conversion_server, loop = server
+    with open(make_pdf(), 'rb') as f:
+        pdf_bytes = f.read()
+
+    ics_bytes, process_date, career, _ = loop.run_until_complete(
+        conversion_server.convert(pdf_bytes, CURRENT_DATE, SEMESTER_START))
+    assert ics_bytes.startswith(b'BEGIN:VCALENDAR')
+    assert (process_date, career) == ('05012025', 'ITC')
+
+def test_server_recovers_after_worker_crash(server, make_pdf):
+    conversion_server, loop = server
+    with open(make_pdf(), 'rb') as f:
+        pdf_bytes = f.read()
+
+    with pytest.raises(horarios.HttpError) as error:
+        loop.run_until_complete(conversion_server.convert(b'CRASH', CURRENT_DATE, SEMESTER_START))
+    assert error.value.status == 500
+
+    ics_bytes, _, _, _ = loop.run_until_complete(
+        conversion_server.convert(pdf_bytes, CURRENT_DATE, SEMESTER_START))
+    assert ics_bytes.startswith(b'BEGIN:VCALENDAR')
+    health = conversion_server.health()
+    assert (health['status'], health['pool_restarts'], health['active']) == ('ok', 1, 0)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGTERM') or os.name == 'nt', reason="requiere señales POSIX")
+def test_server_stops_on_sigterm(tmp_path, make_pdf):
+    port = free_port()
+    log_path = tmp_path / 'serve.log'
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen([sys.executable, SCRIPT, 'serve', '--port', str(port), '--workers', '1'],
+                                   stdout=log, stderr=subprocess.STDOUT)
+    try:
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.time() + 20
+        while True:
+            try:
+                urllib.request.urlopen(f"{url}/health", timeout=1).read()
+                break
+            except OSError:
+                assert time.time() < deadline, log_path.read_text()
+                time.sleep(0.1)
+
+        with open(make_pdf(), 'rb') as f:
+            request = urllib.request.Request(f"{url}/convert?current_date=01-01-2025&semester_start=10-02-2025",
+                                             data=f.read(), method='POST')
+        assert urllib.request.urlopen(request, timeout=20).read().startswith(b'BEGIN:VCALENDAR')
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=20) == 0
+        assert 'Deteniendo el servicio' in log_path.read_text(encoding='utf-8')
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
@@ -0,0 +1,59 @@
+# test_watch.py
+# Pruebas del modo vigilancia de directorio (run_watch)
+
+import os
+
+import horarios
+from conftest import CURRENT_DATE, SEMESTER_START
+
+convert_pdf_file = horarios.convert_pdf_file
+
+def crash_on_marker(file_path, *args):
+    """Termina el proceso del pool si existe `<pdf>.crash` (lo borra antes si es `once`)."""
+    marker = file_path + '.crash'
+    if os.path.exists(marker):
+        with open(marker) as f:
+            once = f.read() == 'once'
+        if once:
+            os.remove(marker)
+        os._exit(1)
+    return convert_pdf_file(file_path, *args)
+
+def run_once(spool, tmp_path):
+    return horarios.run_watch(str(spool), CURRENT_DATE, SEMESTER_START, str(tmp_path / 'salida'),
+                              workers=1, once=True, interval=0.05)
+
+def test_watch_converts_and_moves_inputs(tmp_path, make_pdf):
+    spool = tmp_path / 'spool'
+    spool.mkdir()
+    make_pdf('a.pdf', directory=spool)
+    (spool / 'roto.pdf').write_bytes(b'no es un pdf')
+
+    assert run_once(spool, tmp_path) == 1
+    assert os.listdir(spool / 'procesados') == ['a.pdf']
+    assert os.listdir(spool / 'fallidos') == ['roto.pdf']
+    assert len(os.listdir(tmp_path / 'salida')) == 1
+
+def test_watch_recovers_after_worker_crash(tmp_path, make_pdf, monkeypatch):
+    monkeypatch.setattr(horarios, 'convert_pdf_file', crash_on_marker)
+    spool = tmp_path / 'spool'
+    spool.mkdir()
+    first = make_pdf('a.pdf', directory=spool)
+    make_pdf('b.pdf', seed=1, directory=spool)
+    with open(first + '.crash', 'w') as f:
+        f.write('once')
+
+    assert run_once(spool, tmp_path) == 2
+    assert sorted(os.listdir(spool / 'procesados')) == ['a.pdf', 'b.pdf']
+
+def test_watch_gives_up_on_pdf_that_always_crashes(tmp_path, make_pdf, monkeypatch):
+    monkeypatch.setattr(horarios, 'convert_pdf_file', crash_on_marker)
+    spool = tmp_path / 'spool'
+    spool.mkdir()
+    poison = make_pdf('a.pdf', directory=spool)
+    open(poison + '.crash', 'w').close()
+    make_pdf('b.pdf', seed=1, directory=spool)
+
+    assert run_once(spool, tmp_path) == 1
+    assert os.listdir(spool / 'fallidos') == ['a.pdf']
+    assert os.listdir(spool / 'procesados') == ['b.pdf']